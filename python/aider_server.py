@@ -8,33 +8,79 @@ import sys
 import os
 import threading
 from asyncio import Event
+
+# --profile-startup has to be installed before the imports it times
+try:
+    from .startup_profiler import ImportProfiler
+except ImportError:
+    from startup_profiler import ImportProfiler
+import_profiler = ImportProfiler.start_if_requested()
+
 from jrpc_oo import JRPCServer
 
 try:
     from .io_wrapper import IOWrapper
-    from .coder_wrapper import CoderWrapper
+    from .coder_wrapper import CoderWrapper, forwarding_component
     from .repo import Repo
     from .chat_history import ChatHistory
+    from .log_control import LogControl
+    from .diagnostics import Diagnostics
+    from .confirm_policy import ConfirmPolicy
+    from .session_manager import SessionManager
+    from .repo_map_warmer import RepoMapWarmer
+    from .run_metrics import RunMetricsStore
+    from .coder_process import CoderProcessBridge
+    from .startup_timer import StartupTimer
+    from .logger import Logger
     from .webapp_server import start_npm_dev_server, open_browser, cleanup_npm_process
     from .lsp_server import start_lsp_server, cleanup_lsp_process
     from .port_utils import find_available_port
     from .server_config import ServerConfig
 except ImportError:
     from io_wrapper import IOWrapper
-    from coder_wrapper import CoderWrapper
+    from coder_wrapper import CoderWrapper, forwarding_component
     from repo import Repo
     from chat_history import ChatHistory
+    from log_control import LogControl
+    from diagnostics import Diagnostics
+    from confirm_policy import ConfirmPolicy
+    from session_manager import SessionManager
+    from repo_map_warmer import RepoMapWarmer
+    from run_metrics import RunMetricsStore
+    from coder_process import CoderProcessBridge
+    from startup_timer import StartupTimer
+    from logger import Logger
     from webapp_server import start_npm_dev_server, open_browser, cleanup_npm_process
     from lsp_server import start_lsp_server, cleanup_lsp_process
     from port_utils import find_available_port
     from server_config import ServerConfig
 
-# Apply the monkey patch before importing aider modules
-CoderWrapper.apply_coder_create_patch()
+shutdown_event = None
 
-from aider.main import main
+def run_aider(aider_args):
+    """Import and run aider; its import is the slowest part of startup, so it runs on the aider thread"""
+    # Apply the monkey patch before importing aider modules
+    CoderWrapper.apply_coder_create_patch()
+    from aider.main import main
+    return main(aider_args)
 
-shutdown_event = None
+async def wait_for_coder(bridge, timeout):
+    """Wait until the coder exists, in this process or in the coder process"""
+    if bridge is not None:
+        try:
+            await bridge.wait_ready(timeout)
+            return True
+        except (asyncio.TimeoutError, RuntimeError) as e:
+            print(f"Coder process failed to start: {e or 'timed out'}")
+            return False
+    
+    # Resolved from the Coder.create patch on aider's thread - no polling
+    try:
+        await asyncio.wait_for(CoderWrapper.coder_ready(), timeout)
+        return True
+    except asyncio.TimeoutError:
+        print(f"Timed out waiting for coder initialization after {timeout} seconds")
+        return False
 
 async def main_starter_async():
     global shutdown_event
@@ -66,6 +112,10 @@ async def main_starter_async():
     # Print configuration summary
     config.print_summary()
     
+    Logger.configure(level=config.log_level, disk_budget=config.log_budget_mb * 1024 * 1024)
+    
+    timer = StartupTimer()
+    
     # Find available port for Aider server
     try:
         server_port = find_available_port(start_port=config.aider_port)
@@ -74,64 +124,95 @@ async def main_starter_async():
         print(f"Error finding available port for Aider server: {e}")
         return 1
     
-    # Start LSP server if enabled
-    lsp_port = None
+    # Start the LSP server, the webapp dev server and aider concurrently; each
+    # phase ends on a readiness signal (port accepting connections, coder created)
+    loop = asyncio.get_running_loop()
+    lsp_task = None
     if config.is_lsp_enabled():
-        lsp_port = start_lsp_server(config)
-        if lsp_port:
-            print(f"LSP server running on port {lsp_port}")
-        else:
-            print("LSP server failed to start, continuing without LSP features")
-    
-    # Start webapp dev server
-    dev_server_started = start_npm_dev_server(config)
-    if not dev_server_started:
-        print("Warning: Failed to start webapp dev server")
+        lsp_task = asyncio.ensure_future(
+            timer.run('LSP server', loop.run_in_executor(None, start_lsp_server, config))
+        )
+    webapp_task = asyncio.ensure_future(
+        timer.run('Webapp dev server', loop.run_in_executor(None, start_npm_dev_server, config))
+    )
     
     # Create and configure JRPC server
     jrpc_server = JRPCServer(port=server_port)
     
-    # Start aider in a separate thread
-    aider_config = config.get_aider_config()
-    aider_thread = threading.Thread(
-        target=main, 
-        args=(aider_config['args'],), 
-        daemon=True
-    )
-    aider_thread.start()
+    bridge = None
+    repo_map_warmer = None
+    if config.coder_process:
+        # Run aider in a child process so its CPU-heavy work does not stall this loop
+        bridge = CoderProcessBridge(config)
+        bridge.start()
+    else:
+        # Start aider in a separate thread
+        aider_config = config.get_aider_config()
+        aider_thread = threading.Thread(
+            target=run_aider, 
+            args=(aider_config['args'],), 
+            daemon=True
+        )
+        aider_thread.start()
     
     # Wait for coder initialization
     print("Waiting for coder initialization...")
-    timeout = 60
-    start_time = asyncio.get_event_loop().time()
-    while CoderWrapper._coder_instance is None:
-        if asyncio.get_event_loop().time() - start_time > timeout:
-            print(f"Timed out waiting for coder initialization after {timeout} seconds")
-            break
-        await asyncio.sleep(0.5)
-    
-    if CoderWrapper._coder_instance:
-        print(f"Coder initialized after {asyncio.get_event_loop().time() - start_time:.1f} seconds")
+    if not await timer.run('Coder', wait_for_coder(bridge, timeout=60)):
+        if bridge is not None:
+            bridge.stop()
+        return 1
     
     # Create wrappers and add to server
+    timer.start('RPC classes')
     try:
-        coder_wrapper = CoderWrapper()
-        coder = coder_wrapper.coder
-        coder.io.yes = None
-        
-        jrpc_server.add_class(coder, 'EditBlockCoder')
-        jrpc_server.add_class(coder.commands, 'Commands')
-        jrpc_server.add_class(coder_wrapper, 'CoderWrapper')
-        
         repo = Repo()
         jrpc_server.add_class(repo, 'Repo')
         
-        io_wrapper = IOWrapper(coder.io, port=server_port)
-        jrpc_server.add_class(io_wrapper, 'IOWrapper')
+        if bridge is not None:
+            # Pushes and confirmations from the coder process go out through Repo's connection
+            bridge.call_source = repo
+            for name, proxy in bridge.proxies.items():
+                jrpc_server.add_class(proxy, name)
+            if 'RepoMap' in bridge.proxies:
+                repo._add_file_change_callback(bridge.proxies['RepoMap'].refresh_file)
+        else:
+            coder_wrapper = CoderWrapper()
+            coder = coder_wrapper.coder
+            coder.io.yes = None
+            
+            # These follow the coder when aider re-creates it
+            jrpc_server.add_class(forwarding_component('EditBlockCoder', CoderWrapper.get_coder), 'EditBlockCoder')
+            jrpc_server.add_class(forwarding_component('Commands', lambda: CoderWrapper.get_coder().commands), 'Commands')
+            jrpc_server.add_class(coder_wrapper, 'CoderWrapper')
+            
+            io_wrapper = IOWrapper(coder.io, port=server_port, stream_max_rate=config.stream_max_rate,
+                                   confirm_policy=ConfirmPolicy.from_config(config))
+            jrpc_server.add_class(io_wrapper, 'IOWrapper')
+            coder_wrapper.io_wrapper = io_wrapper
+            
+            metrics_store = RunMetricsStore()
+            jrpc_server.add_class(metrics_store, 'Metrics')
+            coder_wrapper.metrics_store = metrics_store
+            
+            sessions = SessionManager(coder_wrapper, io_wrapper)
+            jrpc_server.add_class(sessions, 'Sessions')
+            
+            # Parse the repo map's tags now rather than inside the first run
+            repo_map_warmer = RepoMapWarmer(coder_wrapper)
+            jrpc_server.add_class(repo_map_warmer, 'RepoMap')
+            repo._add_file_change_callback(repo_map_warmer.refresh_file)
+            loop.run_in_executor(None, repo_map_warmer.warm_up)
         
         chat_history = ChatHistory()
         jrpc_server.add_class(chat_history, 'ChatHistory')
         
+        log_control = LogControl()
+        jrpc_server.add_class(log_control, 'LogControl')
+        
+        diagnostics = Diagnostics()
+        jrpc_server.add_class(diagnostics, 'Diagnostics')
+        
+        timer.finish('RPC classes')
         print(f"JSON-RPC server running on port {server_port}")
         
     except Exception as e:
@@ -139,13 +220,27 @@ async def main_starter_async():
         return 1
     
     try:
-        await jrpc_server.start()
+        await timer.run('JSON-RPC server', jrpc_server.start())
         print("Server running. Press Ctrl+C to exit.")
         
-        # Open browser after servers are started
+        if lsp_task is not None:
+            lsp_port = await lsp_task
+            if lsp_port:
+                print(f"LSP server running on port {lsp_port}")
+            else:
+                print("LSP server failed to start, continuing without LSP features")
+        
+        dev_server_started = await webapp_task
+        if not dev_server_started:
+            print("Warning: Failed to start webapp dev server")
+        
+        timer.print_summary()
+        if import_profiler is not None:
+            import_profiler.stop()
+            print(f"Startup profile written to {import_profiler.write_report(timer=timer)}")
+        
+        # Open browser once the dev server accepts connections and the LSP port is known
         if dev_server_started:
-            # Wait a bit more for the dev server to be fully ready
-            await asyncio.sleep(2)
             open_browser(config)
         
         await shutdown_event.wait()
@@ -165,16 +260,15 @@ async def main_starter_async():
         return 3
     finally:
         # Clean up processes
+        if repo_map_warmer is not None:
+            repo_map_warmer.close()
+        if bridge is not None:
+            bridge.stop()
         cleanup_npm_process()
         cleanup_lsp_process()
 
 def main_starter():
     try:
-        try:
-            from .logger import Logger
-        except ImportError:
-            from logger import Logger
-
         Logger.configure(log_dir='/tmp', default_name='AiderServer')
         Logger.info("Starting aider-server")
         
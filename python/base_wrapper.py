@@ -3,11 +3,18 @@ import threading
 from datetime import datetime
 try:
     from .logger import Logger
+    from .outbound_queue import OutboundHub
 except ImportError:
     from logger import Logger
+    from outbound_queue import OutboundHub
 
 class BaseWrapper:
     """Base class for wrappers that provides common functionality"""
+
+    OUTBOUND_QUEUE_SIZE = 256
+    # One hub shared by every wrapper, so each client has a single queue and writer
+    _outbound_hub = None
+    _outbound_lock = threading.Lock()
     
     def __init__(self):
         # Register this class instance with the logger
@@ -21,9 +28,23 @@ class BaseWrapper:
         except RuntimeError:
             Logger.info("No running event loop found during initialization")
     
-    def log(self, message):
-        """Write a log message to the log file with timestamp (legacy method)"""
-        Logger.info(message)
+    @property
+    def outbound(self):
+        """The outbound hub all wrappers push to the webapp clients through"""
+        hub = BaseWrapper._outbound_hub
+        if hub is None:
+            with BaseWrapper._outbound_lock:
+                hub = BaseWrapper._outbound_hub
+                if hub is None:
+                    hub = BaseWrapper._outbound_hub = OutboundHub(self, maxsize=self.OUTBOUND_QUEUE_SIZE)
+        if not hasattr(hub.wrapper, 'get_remotes') and hasattr(self, 'get_remotes'):
+            # The hub needs a wrapper that has been added to the JRPC server
+            hub.wrapper = self
+        return hub
+
+    def log(self, message, *args):
+        """Write a log message to this class's log file, %-style args are formatted lazily"""
+        Logger.info(message, *args, name=self.__class__.__name__)
 
     def _safe_create_task(self, coro):
         """Safely create an async task using main_loop if available"""
@@ -0,0 +1,108 @@
+import threading
+import time
+
+try:
+    from .logger import Logger
+except ImportError:
+    from logger import Logger
+
+
+class RunCancelled(KeyboardInterrupt):
+    """Raised inside a coder run at a safe point once cancellation was requested
+
+    Subclasses KeyboardInterrupt so aider unwinds it the same way as Ctrl-C.
+    """
+
+
+def close_stream(stream):
+    """Close an LLM streaming response, aborting a network read blocked on it
+
+    Works through the layers litellm and openai wrap around the HTTP response
+    and closes every one that can be closed.
+    """
+    closed = False
+    candidates = [stream]
+    inner = getattr(stream, 'completion_stream', None)
+    if inner is not None:
+        candidates.append(inner)
+        candidates.append(getattr(inner, 'response', None))
+    candidates.append(getattr(stream, 'response', None))
+
+    for candidate in candidates:
+        close = getattr(candidate, 'close', None)
+        if callable(close):
+            try:
+                close()
+                closed = True
+            except Exception as e:
+                Logger.debug("Closing %r failed: %s", candidate, e, name='CancelToken')
+    return closed
+
+
+class CancelToken:
+    """Cooperative cancellation for one coder run
+
+    cancel() may be called from any thread. It closes any attached LLM stream
+    so a blocked read returns at once, and check() raises RunCancelled at the
+    next safe point: between stream chunks, in stream hooks, or before edits
+    are written.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._streams = []
+        self.requested_at = None
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self):
+        """Request cancellation; returns False if it was already requested"""
+        with self._lock:
+            if self._event.is_set():
+                return False
+            self.requested_at = time.monotonic()
+            self._event.set()
+            streams = list(self._streams)
+        for stream in streams:
+            close_stream(stream)
+        return True
+
+    def check(self):
+        """Raise RunCancelled if cancellation was requested"""
+        if self._event.is_set():
+            raise RunCancelled()
+
+    def latency(self):
+        """Seconds since cancellation was requested, or None"""
+        if self.requested_at is None:
+            return None
+        return time.monotonic() - self.requested_at
+
+    def iterate(self, stream):
+        """Yield the chunks of an LLM stream, stopping cleanly once cancelled"""
+        with self._lock:
+            self._streams.append(stream)
+            cancelled = self._event.is_set()
+        if cancelled:
+            close_stream(stream)
+        try:
+            iterator = iter(stream)
+            while True:
+                self.check()
+                try:
+                    chunk = next(iterator)
+                except StopIteration:
+                    return
+                except Exception as e:
+                    # Closing the response under a blocked read surfaces as a read error
+                    if self._event.is_set():
+                        raise RunCancelled() from e
+                    raise
+                yield chunk
+        finally:
+            with self._lock:
+                if stream in self._streams:
+                    self._streams.remove(stream)
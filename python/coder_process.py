@@ -0,0 +1,454 @@
+"""
+coder_process.py - Run the aider coder in a child process, bridged to the JRPC server
+
+The child runs aider, the Coder and its CoderWrapper/IOWrapper, so tag
+parsing, diffing and tokenization hold the child's GIL instead of stalling
+the server's event loop. A multiprocessing pipe carries:
+
+  parent -> child  ('invoke', id, component, method, args)   RPC from the webapp
+                   ('hook', component, method, args, remote_ids, call_methods)
+                   ('reply', id, ok, value)                  answer to a 'call'
+                   ('stop',)
+  child -> parent  ('ready', {component: [method, ...]})
+                   ('failed', message)
+                   ('push', method, args, options)             push to the webapp, no answer
+                   ('call', id, method, args)                confirmation to the webapp
+                   ('reply', id, ok, value)                  answer to an 'invoke'
+"""
+import asyncio
+import concurrent.futures
+import itertools
+import multiprocessing
+import os
+import pickle
+import threading
+
+try:
+    from .coder_wrapper import CoderWrapper, forwarding_component
+    from .io_wrapper import IOWrapper
+    from .confirm_policy import ConfirmPolicy
+    from .repo_map_warmer import RepoMapWarmer
+    from .run_metrics import RunMetricsStore
+    from .startup_profiler import ImportProfiler, DEFAULT_REPORT
+    from .base_wrapper import BaseWrapper
+    from .logger import Logger
+except ImportError:
+    from coder_wrapper import CoderWrapper, forwarding_component
+    from io_wrapper import IOWrapper
+    from confirm_policy import ConfirmPolicy
+    from repo_map_warmer import RepoMapWarmer
+    from run_metrics import RunMetricsStore
+    from startup_profiler import ImportProfiler, DEFAULT_REPORT
+    from base_wrapper import BaseWrapper
+    from logger import Logger
+
+
+# JRPC lifecycle callbacks, forwarded to the child without waiting
+LIFECYCLE_HOOKS = ('remote_is_up', 'setup_done', 'remote_disconnected')
+# Calls whose answer the child needs; all other calls are pushes
+ANSWERED_CALLS = ('MessageHandler.confirmation_request',)
+
+
+def _public_methods(obj):
+    methods = []
+    for name in dir(obj):
+        if name.startswith('_') or name in LIFECYCLE_HOOKS or name in ('get_call', 'get_remotes'):
+            continue
+        try:
+            if callable(getattr(obj, name)):
+                methods.append(name)
+        except Exception:
+            continue
+    return methods
+
+
+class _PipeEnd:
+    """A pipe connection that several threads can send on"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self._lock = threading.Lock()
+
+    def send(self, message):
+        with self._lock:
+            self.conn.send(message)
+
+    def reply(self, request_id, ok, value):
+        try:
+            self.send(('reply', request_id, ok, value))
+        except Exception as e:
+            # The value could not be pickled
+            self.send(('reply', request_id, False, f"Unsendable result: {e}"))
+
+    def recv(self):
+        return self.conn.recv()
+
+
+class _BridgeCallTable:
+    """Stands in for jrpc-oo's get_call() table inside the child process"""
+
+    def __init__(self, child):
+        self.child = child
+
+    def __getitem__(self, method):
+        async def call(*args):
+            return await self.child.call_parent(method, args)
+        return call
+
+    def keys(self):
+        return list(self.child.call_methods)
+
+
+class _BridgeOutboundHub:
+    """Stands in for the outbound hub inside the child process
+
+    Pushes go straight over the pipe with their droppable/merge options, so
+    they are queued, merged and dropped by the parent's hub.
+    """
+
+    def __init__(self, child):
+        self.child = child
+
+    def push(self, method, *args, droppable=False, merge_key=None, merge=None):
+        if merge is not None:
+            try:
+                pickle.dumps(merge)
+            except Exception:
+                # Closures cannot cross the pipe; the push is then only never merged
+                merge = merge_key = None
+        options = {'droppable': droppable, 'merge_key': merge_key, 'merge': merge}
+        try:
+            self.child.pipe.send(('push', method, list(args), options))
+        except Exception as e:
+            Logger.warning("Could not forward push %s: %s", method, e, name='CoderProcess')
+
+    def remove_client(self, client_id):
+        # The parent's hub owns the queue
+        pass
+
+    def get_stats(self):
+        return {}
+
+
+class _CoderProcessChild:
+    """The child side: hosts the coder and its wrappers and serves the pipe"""
+
+    def __init__(self, conn, config, import_profiler=None):
+        self.pipe = _PipeEnd(conn)
+        self.config = config
+        self.import_profiler = import_profiler
+        self.loop = None
+        self.components = {}
+        self.remote_ids = []
+        self.call_methods = []
+        self._pending = {}
+        self._ids = itertools.count()
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=4, thread_name_prefix='CoderBridge')
+
+    def get_call(self):
+        return _BridgeCallTable(self)
+
+    def get_remotes(self):
+        # Only the ids cross the pipe; pushes are sent by the parent's hub
+        return {remote_id: None for remote_id in self.remote_ids}
+
+    async def call_parent(self, method, args):
+        request_id = next(self._ids)
+        future = self.loop.create_future()
+        self._pending[request_id] = future
+        try:
+            self.pipe.send(('call', request_id, method, list(args)))
+            return await future
+        finally:
+            self._pending.pop(request_id, None)
+
+    def _resolve(self, request_id, ok, value):
+        future = self._pending.get(request_id)
+        if future is None or future.done():
+            return
+        if ok:
+            future.set_result(value)
+        else:
+            future.set_exception(RuntimeError(value))
+
+    async def _build(self):
+        """Create the wrappers on the child's loop so they capture it"""
+        BaseWrapper._outbound_hub = _BridgeOutboundHub(self)
+        coder_wrapper = CoderWrapper()
+        coder = coder_wrapper.coder
+        coder.io.yes = None
+
+        io_wrapper = IOWrapper(coder.io, port=self.config.actual_aider_port or self.config.aider_port,
+                               stream_max_rate=self.config.stream_max_rate,
+                               confirm_policy=ConfirmPolicy.from_config(self.config))
+        coder_wrapper.io_wrapper = io_wrapper
+        metrics_store = RunMetricsStore()
+        coder_wrapper.metrics_store = metrics_store
+        repo_map_warmer = RepoMapWarmer(coder_wrapper)
+
+        for wrapper in (coder_wrapper, io_wrapper, metrics_store, repo_map_warmer):
+            wrapper.get_call = self.get_call
+            wrapper.get_remotes = self.get_remotes
+
+        self.components = {
+            'EditBlockCoder': forwarding_component('EditBlockCoder', CoderWrapper.get_coder),
+            'Commands': forwarding_component('Commands', lambda: CoderWrapper.get_coder().commands),
+            'CoderWrapper': coder_wrapper,
+            'IOWrapper': io_wrapper,
+            'Metrics': metrics_store,
+            'RepoMap': repo_map_warmer
+        }
+
+    def serve(self, aider_main, timeout=60):
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, name='CoderProcessLoop', daemon=True).start()
+
+        # aider's own prompt loop has no terminal here and ends; the coder stays in use
+        threading.Thread(target=aider_main, args=(self.config.aider_args,), name='AiderMain', daemon=True).start()
+
+        if not CoderWrapper.coder_created.wait(timeout):
+            self.pipe.send(('failed', f"Timed out waiting for coder initialization after {timeout} seconds"))
+            return
+
+        try:
+            asyncio.run_coroutine_threadsafe(self._build(), self.loop).result()
+        except Exception as e:
+            self.pipe.send(('failed', f"Error initializing coder components: {e}"))
+            return
+
+        self.pipe.send(('ready', {name: _public_methods(obj) for name, obj in self.components.items()}))
+        self._executor.submit(self.components['RepoMap'].warm_up)
+        if self.import_profiler is not None:
+            self.import_profiler.stop()
+            path = self.import_profiler.write_report(os.path.splitext(DEFAULT_REPORT)[0] + '-coder.txt')
+            Logger.info("Coder process startup profile written to %s", path, name='CoderProcess')
+
+        while True:
+            try:
+                message = self.pipe.recv()
+            except (EOFError, OSError):
+                return
+            kind = message[0]
+            if kind == 'invoke':
+                self._executor.submit(self._invoke, *message[1:])
+            elif kind == 'hook':
+                self._executor.submit(self._hook, *message[1:])
+            elif kind == 'reply':
+                self.loop.call_soon_threadsafe(self._resolve, *message[1:])
+            elif kind == 'stop':
+                return
+
+    def _invoke(self, request_id, component, method, args):
+        target = self.components.get(component)
+        func = getattr(target, method, None) if target is not None and not method.startswith('_') else None
+        if not callable(func):
+            self.pipe.reply(request_id, False, f"{component} has no method {method}")
+            return
+        try:
+            self.pipe.reply(request_id, True, func(*args))
+        except BaseException as e:
+            self.pipe.reply(request_id, False, str(e) or e.__class__.__name__)
+
+    def _hook(self, component, method, args, remote_ids, call_methods):
+        self.remote_ids = remote_ids
+        self.call_methods = call_methods
+        func = getattr(self.components.get(component), method, None)
+        if callable(func):
+            try:
+                func(*args)
+            except Exception as e:
+                Logger.warning("Error in forwarded %s.%s: %s", component, method, e, name='CoderProcess')
+
+
+def run_coder_process(conn, config):
+    """Entry point of the child process"""
+    import_profiler = None
+    if config.profile_startup:
+        import_profiler = ImportProfiler()
+        import_profiler.start()
+    Logger.configure(default_name='CoderProcess', level=config.log_level,
+                     disk_budget=config.log_budget_mb * 1024 * 1024)
+    # Apply the monkey patch before importing aider modules
+    CoderWrapper.apply_coder_create_patch()
+    from aider.main import main
+
+    child = _CoderProcessChild(conn, config, import_profiler)
+    try:
+        child.serve(main)
+    finally:
+        repo_map_warmer = child.components.get('RepoMap')
+        if repo_map_warmer is not None:
+            repo_map_warmer.close()
+
+
+def _make_proxy(bridge, component, methods):
+    """Build an object whose methods forward to a component in the child process"""
+
+    def forwarder(name):
+        def method(self, *args):
+            return bridge.invoke(component, name, args)
+        method.__name__ = name
+        return method
+
+    def hook(name):
+        def method(self, *args):
+            remote_ids = list((self.get_remotes() or {}).keys())
+            if name == 'remote_disconnected' and args:
+                remote_ids = [remote_id for remote_id in remote_ids if remote_id != args[0]]
+            try:
+                call_methods = list(self.get_call().keys())
+            except Exception:
+                call_methods = []
+            bridge.send(('hook', component, name, list(args), remote_ids, call_methods))
+        method.__name__ = name
+        return method
+
+    attrs = {name: forwarder(name) for name in methods}
+    attrs.update({name: hook(name) for name in LIFECYCLE_HOOKS})
+    attrs['__doc__'] = f"{component} running in the coder process"
+    return type(component, (), attrs)()
+
+
+class CoderProcessBridge:
+    """The parent side: starts the coder process and stands in for its RPC classes
+
+    proxies holds one object per RPC class for jrpc_server.add_class; their
+    methods return futures so the event loop is not held while the child
+    works. Pushes from the child keep their droppable and merge options and
+    go through call_source's outbound hub; confirmations wait for the
+    webapp's answer.
+    """
+
+    INVOKE_TIMEOUT = 120.0
+
+    def __init__(self, config):
+        self.config = config
+        self.call_source = None
+        self.proxies = {}
+        self.process = None
+        self.loop = None
+        self._pipe = None
+        self._ready = None
+        self._waiters = {}
+        self._ids = itertools.count()
+
+    def start(self):
+        """Start the child process and the pipe reader (call from the event loop)"""
+        self.loop = asyncio.get_running_loop()
+        self._ready = self.loop.create_future()
+
+        context = multiprocessing.get_context('spawn')
+        parent_conn, child_conn = context.Pipe()
+        self._pipe = _PipeEnd(parent_conn)
+        self.process = context.Process(target=run_coder_process, args=(child_conn, self.config),
+                                       name='CoderProcess', daemon=True)
+        self.process.start()
+        threading.Thread(target=self._read, name='CoderBridgeReader', daemon=True).start()
+        Logger.info("Coder process started with pid %s", self.process.pid, name='CoderProcessBridge')
+
+    async def wait_ready(self, timeout=60):
+        """Wait for the child to report its components, then build the proxies"""
+        components = await asyncio.wait_for(self._ready, timeout)
+        self.proxies = {name: _make_proxy(self, name, methods) for name, methods in components.items()}
+        return self.proxies
+
+    def send(self, message):
+        self._pipe.send(message)
+
+    def invoke(self, component, method, args):
+        """Call a method in the child
+
+        On the event loop this returns a future of the result, resolved by the
+        pipe reader, so the loop keeps serving while the child works; from
+        any other thread it waits for the result.
+        """
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self.loop:
+            return asyncio.ensure_future(self._invoke(component, method, args))
+        return asyncio.run_coroutine_threadsafe(self._invoke(component, method, args), self.loop).result()
+
+    async def _invoke(self, component, method, args):
+        request_id = next(self._ids)
+        waiter = self.loop.create_future()
+        self._waiters[request_id] = waiter
+        try:
+            self.send(('invoke', request_id, component, method, list(args)))
+            ok, value = await asyncio.wait_for(waiter, self.INVOKE_TIMEOUT)
+            return value if ok else {"error": value}
+        except asyncio.TimeoutError:
+            return {"error": f"{component}.{method} timed out in the coder process"}
+        except (EOFError, OSError) as e:
+            return {"error": f"Coder process unavailable: {e}"}
+        finally:
+            self._waiters.pop(request_id, None)
+
+    def _resolve(self, request_id, ok, value):
+        waiter = self._waiters.get(request_id)
+        if waiter is not None and not waiter.done():
+            waiter.set_result((ok, value))
+
+    def _fail_waiters(self, error):
+        for request_id in list(self._waiters):
+            self._resolve(request_id, False, error)
+
+    def _read(self):
+        while True:
+            try:
+                message = self._pipe.recv()
+            except (EOFError, OSError):
+                Logger.warning("Coder process pipe closed", name='CoderProcessBridge')
+                self.loop.call_soon_threadsafe(self._set_ready, None, "Coder process exited")
+                self.loop.call_soon_threadsafe(self._fail_waiters, "Coder process exited")
+                return
+            kind = message[0]
+            if kind == 'ready':
+                self.loop.call_soon_threadsafe(self._set_ready, message[1], None)
+            elif kind == 'failed':
+                self.loop.call_soon_threadsafe(self._set_ready, None, message[1])
+            elif kind == 'reply':
+                self.loop.call_soon_threadsafe(self._resolve, *message[1:])
+            elif kind == 'push':
+                self._forward_push(*message[1:])
+            elif kind == 'call':
+                asyncio.run_coroutine_threadsafe(self._forward_call(*message[1:]), self.loop)
+
+    def _set_ready(self, components, error):
+        if self._ready.done():
+            return
+        if error:
+            self._ready.set_exception(RuntimeError(error))
+        else:
+            self._ready.set_result(components)
+
+    def _forward_push(self, method, args, options):
+        try:
+            self.call_source.outbound.push(method, *args, **options)
+        except Exception as e:
+            Logger.warning("Error forwarding push %s: %s", method, e, name='CoderProcessBridge')
+
+    async def _forward_call(self, request_id, method, args):
+        try:
+            if method in ANSWERED_CALLS:
+                result = await self.call_source.get_call()[method](*args)
+            else:
+                self.call_source.outbound.push(method, *args)
+                result = None
+            self._pipe.reply(request_id, True, result)
+        except Exception as e:
+            self._pipe.reply(request_id, False, str(e))
+
+    def stop(self):
+        """Ask the child to exit, then terminate it if it does not"""
+        if self.process is None:
+            return
+        try:
+            self.send(('stop',))
+        except (EOFError, OSError):
+            pass
+        self.process.join(2)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.process = None
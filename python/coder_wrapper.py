@@ -1,21 +1,86 @@
 import asyncio
+import contextlib
 import os
 import signal
+import sys
 import threading
+import time
 import traceback
 from datetime import datetime
 
 try:
     from .base_wrapper import BaseWrapper
     from .logger import Logger
+    from .job_queue import CoderJobQueue
+    from .cancellation import RunCancelled
+    from .run_metrics import RunMetrics
 except ImportError:
     from base_wrapper import BaseWrapper
     from logger import Logger
+    from job_queue import CoderJobQueue
+    from cancellation import RunCancelled
+    from run_metrics import RunMetrics
+
+
+def _resolve_future(future, result):
+    if not future.done():
+        future.set_result(result)
+
+
+def merge_file_deltas(earlier_args, later_args):
+    """Fold two queued RepoTree.applyChatFilesDelta pushes into one spanning both versions"""
+    earlier, later = earlier_args[0], later_args[0]
+    added = (set(earlier['added']) - set(later['dropped'])) | set(later['added'])
+    dropped = (set(earlier['dropped']) - set(later['added'])) | set(later['dropped'])
+    return ({
+        'base_version': earlier['base_version'],
+        'version': later['version'],
+        'added': sorted(added),
+        'dropped': sorted(dropped)
+    },)
+
+
+def forwarding_component(name, resolve):
+    """An object with the public methods of resolve(), each forwarded to resolve() at call time
+
+    Registered with JRPC in place of the coder and its Commands, so RPCs reach
+    the current coder after aider re-creates it (/chat-mode, /model).
+    """
+    template = resolve()
+    
+    def forwarder(method_name):
+        def method(self, *args):
+            return getattr(resolve(), method_name)(*args)
+        method.__name__ = method_name
+        return method
+    
+    attrs = {}
+    for method_name in dir(template):
+        if method_name.startswith('_'):
+            continue
+        try:
+            if callable(getattr(template, method_name)):
+                attrs[method_name] = forwarder(method_name)
+        except Exception:
+            continue
+    attrs['__doc__'] = f"{name} of the current coder"
+    return type(name, (), attrs)()
 
 
 class CoderWrapper(BaseWrapper):
     # Class variable to store the coder instance
     _coder_instance = None
+    # Seconds stop() waits for a cooperative cancel before interrupting the thread
+    STOP_ESCALATE_AFTER = 5.0
+    # Set once aider has created its first coder
+    coder_created = threading.Event()
+    # (loop, future) pairs from coder_ready(), resolved when the first coder is created
+    _ready_waiters = []
+    _ready_lock = threading.Lock()
+    # Set while a session coder is created, so it does not replace the primary coder
+    _session_create = threading.local()
+    # Set while a job applies a SwitchCoder to the primary coder, as aider's main loop would
+    _primary_switch = threading.local()
     @staticmethod
     def apply_coder_create_patch():
         """
@@ -30,27 +95,53 @@ class CoderWrapper(BaseWrapper):
         # Add a field to track the current coder type
         Coder._current_coder_type = None
         Coder._coder_change_callbacks = []
+        # Called with every new primary coder, whether or not its type changed
+        Coder._coder_created_callbacks = []
         
         @classmethod
         def patched_create(cls, *args, **kwargs):
             # Call the original create method
             result = original_create(*args, **kwargs)
             
+            if getattr(CoderWrapper._session_create, 'active', False):
+                return result
+            
+            # Only aider's main loop replaces the primary coder (at startup and on
+            # SwitchCoder). Other creates are aider's temporary coders - the
+            # architect's editor, /ask and /code with a message, clones - which
+            # run inline and must leave the wrappers where they are
+            replaces_primary = (
+                CoderWrapper._coder_instance is None
+                or sys._getframe(1).f_globals.get('__name__') == 'aider.main'
+                or getattr(CoderWrapper._primary_switch, 'active', False)
+            )
+            if not replaces_primary:
+                return result
+            
             # Get coder details
             coder_type = result.__class__.__name__
             edit_format = getattr(result, 'edit_format', 'unknown')
             
-            # Store the coder instance in CoderWrapper
-            CoderWrapper._coder_instance = result
+            # Store the coder instance in CoderWrapper and wake whoever waits for it
+            CoderWrapper._signal_coder_ready(result)
+            
+            # Re-bind wrappers before aider starts using the new coder
+            for callback in list(Coder._coder_created_callbacks):
+                try:
+                    callback(result)
+                except Exception as e:
+                    print(f"Error in coder created callback: {e}")
             
             # Check if coder type has changed
             if Coder._current_coder_type != coder_type:
                 print(f"🔄 Coder switched to: {coder_type} (edit_format: {edit_format})")
                 
                 # Log the change
-                with open('/tmp/coder_changes.log', 'a') as f:
-                    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')
-                    f.write(f"[{timestamp}] Coder switched to: {coder_type} (edit_format: {edit_format})\n")
+                Logger.info(
+                    "Coder switched to: %s (edit_format: %s)", coder_type, edit_format,
+                    name='CoderChanges',
+                    log_file=os.path.join(Logger.DEFAULT_LOG_DIR, 'coder_changes.log')
+                )
                 
                 # Update current type
                 Coder._current_coder_type = coder_type
@@ -75,12 +166,58 @@ class CoderWrapper(BaseWrapper):
             return True
         return False
     
+    @staticmethod
+    @contextlib.contextmanager
+    def creating_session_coder():
+        """Create coders for secondary sessions inside this, leaving the primary coder in place"""
+        CoderWrapper._session_create.active = True
+        try:
+            yield
+        finally:
+            CoderWrapper._session_create.active = False
+
+    @staticmethod
+    @contextlib.contextmanager
+    def switching_primary_coder():
+        """Create the coder that replaces the primary one inside this, as aider's main loop does"""
+        CoderWrapper._primary_switch.active = True
+        try:
+            yield
+        finally:
+            CoderWrapper._primary_switch.active = False
+
+    @classmethod
+    def coder_ready(cls):
+        """A future on the running event loop that resolves with the coder once aider has created it"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with cls._ready_lock:
+            if cls._coder_instance is None:
+                cls._ready_waiters.append((loop, future))
+                return future
+        future.set_result(cls._coder_instance)
+        return future
+
+    @classmethod
+    def _signal_coder_ready(cls, coder):
+        """Store the coder and resolve the waiting futures (called on the thread that created it)"""
+        with cls._ready_lock:
+            cls._coder_instance = coder
+            waiters, cls._ready_waiters = cls._ready_waiters, []
+        cls.coder_created.set()
+        for loop, future in waiters:
+            try:
+                loop.call_soon_threadsafe(_resolve_future, future, coder)
+            except RuntimeError:
+                # The waiting loop has been closed
+                pass
+
     @classmethod
     def get_coder(cls):
         """Get the current coder instance"""
         return cls._coder_instance
 
-    def __init__(self, coder=None):
+    def __init__(self, coder=None, track_coder_changes=True):
         if coder is None:
             coder = self.__class__._coder_instance
             if coder is None:
@@ -89,13 +226,44 @@ class CoderWrapper(BaseWrapper):
         self.coder = coder
         Logger.info(f"CoderWrapper initialized with coder: {coder}")
         
+        # Set by the server once the IOWrapper exists, so completion follows buffered output
+        self.io_wrapper = None
+        
+        # RunMetricsStore that finished runs are recorded in, set by the server
+        self.metrics_store = None
+        
+        # Bumped on every change to the in-chat files; clients apply deltas in version order
+        self.files_version = 0
+        self._files_lock = threading.RLock()
+        
         # Initialize base class
         super().__init__()
         
+        # One worker thread runs queued messages through the coder in turn
+        self.job_queue = CoderJobQueue(self._run_job, self._on_job_done)
+        
+        self._bind(coder)
+        
+        # Register for coder re-creation - only the primary session follows the global coder
+        self.track_coder_changes = track_coder_changes
+        from aider.coders.base_coder import Coder
+        if track_coder_changes and hasattr(Coder, '_coder_created_callbacks'):
+            self.log("Registering for coder change notifications")
+            Coder._coder_created_callbacks.append(self._on_coder_created)
+            self.register_coder_change_callback(self.on_coder_type_changed)
+    
+    def _bind(self, coder):
+        """Install the wrapper methods on a coder, keeping its originals"""
+        self.coder = coder
+        
         # Store the original methods
         self.original_run = coder.run
         self.original_add_rel_fname = getattr(coder, 'add_rel_fname', None)
         self.original_drop_rel_fname = getattr(coder, 'drop_rel_fname', None)
+        self.original_show_send_output_stream = getattr(coder, 'show_send_output_stream', None)
+        self.original_apply_edits = getattr(coder, 'apply_edits', None)
+        self.original_send = getattr(coder, 'send', None)
+        self.original_auto_commit = getattr(coder, 'auto_commit', None)
         
         # Replace with our wrapper methods
         coder.run = self.run_wrapper
@@ -109,59 +277,197 @@ class CoderWrapper(BaseWrapper):
             self.log("Wrapping drop_rel_fname method")
             coder.drop_rel_fname = self.drop_rel_fname_wrapper
         
-        # Register for coder type changes
-        from aider.coders.base_coder import Coder
-        if hasattr(Coder, '_coder_change_callbacks'):
-            self.log("Registering for coder change notifications")
-            self.register_coder_change_callback(self.on_coder_type_changed)
+        # Cancellation safe points: between LLM stream chunks and before edits are written
+        if self.original_show_send_output_stream:
+            coder.show_send_output_stream = self.show_send_output_stream_wrapper
+        if self.original_apply_edits:
+            coder.apply_edits = self.apply_edits_wrapper
+        
+        # Run telemetry: when each LLM request goes out and how long commits take
+        if self.original_send:
+            coder.send = self.send_wrapper
+        if self.original_auto_commit:
+            coder.auto_commit = self.auto_commit_wrapper
+    
+    def _on_coder_created(self, coder):
+        """Move the wrappers to a coder aider created to replace ours (/chat-mode, /model)"""
+        if coder is self.coder:
+            return
+        self.log(f"Re-binding wrappers to new coder: {coder}")
+        self._bind(coder)
+        if self.io_wrapper is not None:
+            # from_coder normally hands over the same InputOutput, whose hooks stay in place
+            self.io_wrapper._attach_io(coder.io)
+        coder.io.yes = None
     
     def on_coder_type_changed(self, coder_type, edit_format, coder_instance):
         """Handle coder type change events"""
         self.log(f"Coder type changed to: {coder_type} (edit_format: {edit_format})")
-        self.coder = coder_instance
         # You could send this to the webapp
-        self._safe_create_task(self.get_call()['MessageHandler.onCoderTypeChanged'](
-            coder_type, 
-            edit_format
-        ))
+        self._push('MessageHandler.onCoderTypeChanged', coder_type, edit_format)
+    
+    def _push(self, method, *args, **kwargs):
+        """Push through the IOWrapper, so a secondary session's pushes go to its SessionHandler"""
+        push = self.io_wrapper._push if self.io_wrapper is not None else self.outbound.push
+        push(method, *args, **kwargs)
     
     def add_rel_fname_wrapper(self, filename):
         """Wrapper for coder's add_rel_fname method to notify RepoTree after adding file"""
         self.log(f"add_rel_fname_wrapper called for {filename}")
-        
-        # Call original method and store result
-        result = self.original_add_rel_fname(filename)
-        
-        # Notify RepoTree to refresh its file list
-        self.log(f"Notifying RepoTree about file addition: {filename}")
-        self._safe_create_task(self.get_call()['RepoTree.loadFileTree']())
-        
+        with self._files_lock:
+            before = self._inchat_files()
+            result = self.original_add_rel_fname(filename)
+            self._push_files_delta(before)
         return result
     
     def drop_rel_fname_wrapper(self, filename):
         """Wrapper for coder's drop_rel_fname method to notify RepoTree after dropping file"""
         self.log(f"drop_rel_fname_wrapper called for {filename}")
-        
-        # Call original method and store result
-        result = self.original_drop_rel_fname(filename)
-        
-        # Notify RepoTree to refresh its file list
-        self.log(f"Notifying RepoTree about file removal: {filename}")
-        self._safe_create_task(self.get_call()['RepoTree.loadFileTree']())
-        
+        with self._files_lock:
+            before = self._inchat_files()
+            result = self.original_drop_rel_fname(filename)
+            self._push_files_delta(before)
+        return result
+    
+    def add_files(self, paths):
+        """Add several repo-relative files to the chat with a single notification to clients"""
+        return self._change_files(self.original_add_rel_fname, paths)
+    
+    def drop_files(self, paths):
+        """Drop several repo-relative files from the chat with a single notification to clients"""
+        return self._change_files(self.original_drop_rel_fname, paths)
+    
+    def get_chat_files(self):
+        """Get the in-chat files with the version the next delta will build on"""
+        with self._files_lock:
+            return {"version": self.files_version, "files": sorted(self._inchat_files())}
+    
+    def _change_files(self, change, paths):
+        if change is None:
+            return {"error": "The coder does not support changing its files"}
+        self.log(f"{change.__name__} for {len(paths)} files")
+        errors = {}
+        with self._files_lock:
+            before = self._inchat_files()
+            for path in paths:
+                try:
+                    change(path)
+                except Exception as e:
+                    errors[path] = str(e)
+            delta = self._push_files_delta(before)
+        result = dict(delta)
+        if errors:
+            result['errors'] = errors
         return result
+    
+    def _inchat_files(self):
+        return set(self.coder.get_inchat_relative_files())
+    
+    def _push_files_delta(self, before):
+        """Send RepoTree the paths that entered or left the chat since before, if any"""
+        after = self._inchat_files()
+        delta = {
+            'base_version': self.files_version,
+            'version': self.files_version,
+            'added': sorted(after - before),
+            'dropped': sorted(before - after)
+        }
+        if not delta['added'] and not delta['dropped']:
+            return delta
+        
+        self.files_version += 1
+        delta['version'] = self.files_version
+        self.log(f"Notifying RepoTree of chat files delta v{delta['version']}: "
+                 f"+{len(delta['added'])} -{len(delta['dropped'])}")
+        self._push('RepoTree.applyChatFilesDelta', delta,
+                   merge_key=('RepoTree.applyChatFilesDelta',), merge=merge_file_deltas)
+        return delta
+
+    def _current_cancel_token(self):
+        job = self.job_queue.current_job
+        return job.cancel_token if job is not None else None
+
+    def _current_metrics(self):
+        job = self.job_queue.current_job
+        return job.metrics if job is not None else None
+
+    def send_wrapper(self, *args, **kwargs):
+        """Note each LLM request of the run; aider's send is a generator, so this is one too"""
+        metrics = self._current_metrics()
+        if metrics is not None:
+            metrics.mark_request()
+        return (yield from self.original_send(*args, **kwargs))
+
+    def auto_commit_wrapper(self, *args, **kwargs):
+        """Time aider's commit of the edits"""
+        started = time.monotonic()
+        try:
+            return self.original_auto_commit(*args, **kwargs)
+        finally:
+            metrics = self._current_metrics()
+            if metrics is not None:
+                metrics.add_commit(time.monotonic() - started)
+
+    def show_send_output_stream_wrapper(self, completion):
+        """Feed the LLM stream through the job's cancel token, so a cancel closes the response"""
+        token = self._current_cancel_token()
+        if token is None or not hasattr(completion, '__iter__'):
+            return self.original_show_send_output_stream(completion)
+        return self.original_show_send_output_stream(token.iterate(completion))
+
+    def apply_edits_wrapper(self, edits, *args, **kwargs):
+        """Refuse to start writing edits once the run has been cancelled"""
+        token = self._current_cancel_token()
+        if token is not None and token.cancelled:
+            self.log("Run cancelled - skipping %d edits", len(edits) if edits else 0)
+            raise RunCancelled()
+        started = time.monotonic()
+        try:
+            return self.original_apply_edits(edits, *args, **kwargs)
+        finally:
+            metrics = self._current_metrics()
+            if metrics is not None:
+                metrics.add_edit_apply(time.monotonic() - started)
 
     def stop(self):
-        """Stop the current running operation by raising KeyboardInterrupt"""
+        """Cancel the running job
+
+        Cancellation is cooperative: the job's LLM stream is closed and the
+        run stops at its next safe point. Only if it is still running after
+        STOP_ESCALATE_AFTER seconds is KeyboardInterrupt raised in the thread.
+        """
         self.log("Stop requested - interrupting coder operation only")
         
-        # Use a custom event to signal threads to stop
-        # This will not affect the main server
-        if hasattr(self, '_current_run_thread') and self._current_run_thread:
-            self.log(f"Sending interrupt to thread: {self._current_run_thread.name}")
+        job = self.job_queue.current_job
+        if job is None:
+            self.log("No active job to stop")
+            return {"status": "error", "message": "No active thread to interrupt"}
+        
+        if not job.cancel_token.cancel():
+            return {"status": "cancel_already_requested", "job_id": job.id}
+        
+        timer = threading.Timer(self.STOP_ESCALATE_AFTER, self._escalate_stop, args=(job,))
+        timer.daemon = True
+        timer.start()
+        self.log("Cancel requested for job %s", job.id)
+        return {"status": "cancel_requested", "job_id": job.id}
+
+    def _escalate_stop(self, job):
+        """Interrupt the worker if a cancelled job has still not finished"""
+        if self.job_queue.current_job is not job:
+            return
+        self.log("Job %s still running %.1fs after cancel - interrupting thread", job.id, job.cancel_token.latency())
+        self._interrupt_worker()
+
+    def _interrupt_worker(self):
+        """Raise KeyboardInterrupt in the worker thread - this will not affect the main server"""
+        # Only interrupt the worker while it is running a job, never while it waits for one
+        if self.job_queue.current_job is not None:
+            worker = self.job_queue.worker
+            self.log(f"Sending interrupt to thread: {worker.name} (job {self.job_queue.current_job.id})")
             # Raise exception in the coder thread using ctypes
             import ctypes
-            thread_id = self._current_run_thread.ident
+            thread_id = worker.ident
             if thread_id:
                 # This raises KeyboardInterrupt in the target thread
                 res = ctypes.pythonapi.PyThreadState_SetAsyncExc(
@@ -187,8 +493,13 @@ class CoderWrapper(BaseWrapper):
         """Signal that command processing is complete"""
         self.log("Signaling command completion to webapp")
         try:
+            if self.io_wrapper is not None:
+                # Flushes batched command output, then queues streamComplete behind it
+                self.io_wrapper.signal_command_complete(force=True)
+                return
+            
             # Send completion signal to MessageHandler
-            self._safe_create_task(self.get_call()['MessageHandler.streamComplete']())
+            self.outbound.push('MessageHandler.streamComplete')
             self.log("streamComplete call initiated")
         except Exception as e:
             self.log(f"Error signaling completion: {e}")
@@ -206,11 +517,23 @@ class CoderWrapper(BaseWrapper):
             return message in terminal_commands
         return False
 
-    def run_wrapper(self, message):
+    def run_wrapper(self, message=None, priority=0, with_message=None, preproc=None):
         """
         Wrapper for the coder's run method to execute it non-blockingly.
-        This method is intended to be called via JRPC and return immediately.
+        This method is intended to be called via JRPC and return immediately;
+        the message is queued and run by the single coder worker thread.
+        
+        Calls from aider itself (its prompt loop, or run(with_message=...,
+        preproc=...)) run inline on the calling thread, as they would unwrapped.
         """
+        if message is None:
+            kwargs = {}
+            if with_message is not None:
+                kwargs['with_message'] = with_message
+            if preproc is not None:
+                kwargs['preproc'] = preproc
+            return self.original_run(**kwargs)
+        
         self.log(f"run_wrapper called with message (first 100 chars): {str(message)[:100]}...")
         
         # Iterate through all remotes and print their call variable
@@ -227,58 +550,128 @@ class CoderWrapper(BaseWrapper):
         if self._is_terminal_command(message):
             self.log(f"Terminal command detected: {message}")
             # Send immediate response that this command should be executed in the terminal
-            self._safe_create_task(self.get_call()['MessageHandler.streamWrite'](
+            self._push(
+                'MessageHandler.streamWrite',
                 f"The command `{message}` (without suffix string) should be executed directly in your terminal, not in the web interface.", 
                 True, 
                 'assistant'
-            ))
+            )
             # Signal completion to reset UI state
             self.signal_completion()
             return {"status": "terminal_command_detected", "command": message}
 
-        actual_run_method = self.original_run
+        # Runs queue behind each other on the single worker instead of sharing the coder
+        job = self.job_queue.submit(message, priority)
+        position = self.job_queue.position(job.id)
+        self.log("Job %s queued for coder.run at position %s", job.id, position)
+        return {"status": "queued", "job_id": job.id, "position": position}
 
-        def task_to_run_in_thread():
-            thread_name = threading.current_thread().name
-            self.log(f"Thread '{thread_name}' started for coder.run with message (first 100 chars): {str(message)[:100]}...")
-            try:
-                if asyncio.iscoroutinefunction(actual_run_method):
-                    self.log(f"coder.run ('{actual_run_method.__name__}') is an async function. Running in a new event loop.")
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                    try:
-                        loop.run_until_complete(actual_run_method(message))
-                    finally:
-                        loop.close()
-                else:
-                    self.log(f"coder.run ('{actual_run_method.__name__}') is a sync function. Running directly.")
+    def _run_job(self, job):
+        """Run one queued message through the coder (called on the worker thread)"""
+        actual_run_method = self.original_run
+        message = job.message
+        self.log(f"Job {job.id} started for coder.run with message (first 100 chars): {str(message)[:100]}...")
+        job.metrics = RunMetrics(job, self.io_wrapper.session_id if self.io_wrapper is not None else None)
+        tokens_before = self._token_totals()
+        if self.io_wrapper is not None:
+            self.io_wrapper.cancel_token = job.cancel_token
+            self.io_wrapper.run_metrics = job.metrics
+        try:
+            if asyncio.iscoroutinefunction(actual_run_method):
+                self.log(f"coder.run ('{actual_run_method.__name__}') is an async function. Running in a new event loop.")
+                loop = asyncio.new_event_loop()
+                asyncio.set_event_loop(loop)
+                try:
+                    loop.run_until_complete(actual_run_method(message))
+                finally:
+                    loop.close()
+            else:
+                self.log(f"coder.run ('{actual_run_method.__name__}') is a sync function. Running directly.")
+                try:
                     actual_run_method(message)
-                
-                self.log(f"Thread '{thread_name}' for coder.run completed for message (first 100 chars): {str(message)[:100]}...")
-                
-                # Signal completion to MessageHandler
-                self.signal_completion()
-                
-            except Exception as e:
-                self.log(f"Exception in threaded coder.run (Thread '{thread_name}'): {e}")
-                self.log(f"Traceback: {traceback.format_exc()}")
-                
-                # Signal completion even on error to reset the UI
-                self.signal_completion()
-            finally:
-                # Clear the thread reference when done
-                if hasattr(self, '_current_run_thread') and self._current_run_thread == threading.current_thread():
-                    self._current_run_thread = None
-                    self.log(f"Thread reference cleared for '{thread_name}'")
-
-        # Create and start a daemon thread to run the task
-        thread = threading.Thread(target=task_to_run_in_thread, name="CoderRunThread")
-        thread.daemon = True  # Allows the main program to exit even if this thread is running
-        
-        # Store the thread reference for later interruption
-        self._current_run_thread = thread
+                except Exception as e:
+                    if e.__class__.__name__ != 'SwitchCoder':
+                        raise
+                    # /model, /chat-mode or the switch back after /ask with a message
+                    self._switch_coder(e)
+            
+            self.log(f"Job {job.id} for coder.run completed for message (first 100 chars): {str(message)[:100]}...")
+        except BaseException as e:
+            self.log(f"Exception in queued coder.run (job {job.id}): {e!r}")
+            self.log(f"Traceback: {traceback.format_exc()}")
+            raise
+        finally:
+            tokens_after = self._token_totals()
+            if tokens_before is not None and tokens_after is not None:
+                job.metrics.set_tokens(tokens_after[0] - tokens_before[0], tokens_after[1] - tokens_before[1])
+            if self.io_wrapper is not None and self.io_wrapper.cancel_token is job.cancel_token:
+                self.io_wrapper.cancel_token = None
+                self.io_wrapper.run_metrics = None
+
+    def _switch_coder(self, switch):
+        """Replace the coder the way aider's main loop handles SwitchCoder"""
+        from aider.coders.base_coder import Coder
         
-        thread.start()
+        kwargs = dict(io=self.coder.io, from_coder=self.coder)
+        kwargs.update(switch.kwargs)
+        kwargs.pop('show_announcements', None)
+        self.log(f"Switching coder: {', '.join(sorted(switch.kwargs))}")
         
-        self.log(f"Thread '{thread.name}' launched for coder.run, run_wrapper returning immediately.")
-        return {"status": "coder.run initiated", "thread_name": thread.name}
+        if self.track_coder_changes:
+            # Re-binds this wrapper through _on_coder_created
+            with CoderWrapper.switching_primary_coder():
+                Coder.create(**kwargs)
+        else:
+            with CoderWrapper.creating_session_coder():
+                coder = Coder.create(**kwargs)
+            self._bind(coder)
+            coder.io.yes = None
+    
+    def _token_totals(self):
+        """aider's running (sent, received) token totals, if this version keeps them"""
+        sent = getattr(self.coder, 'total_tokens_sent', None)
+        received = getattr(self.coder, 'total_tokens_received', None)
+        if sent is None or received is None:
+            return None
+        return sent, received
+
+    def _on_job_done(self, job):
+        """Record the run's telemetry, then signal completion after every job, even on error, to reset the UI
+
+        A queued job cancelled before it ran only signals completion when
+        nothing else is running or queued, so it cannot end another job's run.
+        """
+        if job.metrics is not None:
+            job.metrics.finish(job.status)
+            if self.metrics_store is not None:
+                try:
+                    self.metrics_store.record(job.metrics)
+                except Exception as e:
+                    self.log(f"Error recording run metrics: {e}")
+        if job.started_at is None and self.job_queue.is_busy():
+            return
+        self.signal_completion()
+
+    def list_jobs(self):
+        """Get the running job, queued jobs in run order and recently finished jobs"""
+        return self.job_queue.list_jobs()
+
+    def reorder_job(self, job_id, position=None, priority=None):
+        """Move a queued job to a position in the queue and/or change its priority"""
+        job = self.job_queue.reorder(job_id, position, priority)
+        if job is None:
+            return {"error": f"No queued job {job_id}"}
+        return {"status": "reordered", "job_id": job_id, "position": self.job_queue.position(job_id)}
+
+    def cancel_job(self, job_id):
+        """Cancel a queued job, or stop it if it is the one running"""
+        running = self.job_queue.current_job
+        if running is not None and running.id == job_id:
+            return self.stop()
+        if self.job_queue.cancel(job_id) is None:
+            return {"error": f"No queued job {job_id}"}
+        return {"status": "cancelled", "job_id": job_id}
+
+    def get_job_metrics(self):
+        """Get queue depth, wait times and cancel-to-idle latency for coder runs"""
+        return self.job_queue.get_metrics()
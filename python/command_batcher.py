@@ -0,0 +1,65 @@
+import threading
+
+try:
+    from .stream_coalescer import start_timer
+except ImportError:
+    from stream_coalescer import start_timer
+
+
+class CommandOutputBatcher:
+    """Buffers typed command output lines and sends them as ordered batches
+
+    Commands like /tokens or /ls call tool_output and friends hundreds of
+    times in a burst. Lines are collected as {'type', 'message'} entries and
+    handed to send_batch when the flush interval expires, when max_entries or
+    max_bytes is reached, or when flush() is called.
+    """
+
+    def __init__(self, send_batch, flush_interval=0.05, max_entries=200, max_bytes=64 * 1024, loop=None):
+        self.send_batch = send_batch
+        self.flush_interval = flush_interval
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.loop = loop
+        self._lock = threading.RLock()
+        self._entries = []
+        self._bytes = 0
+        self._timer = None
+        self.batches_sent = 0
+        self.entries_sent = 0
+
+    def add(self, msg_type, message):
+        """Buffer one line of command output"""
+        message = str(message) if message is not None else ''
+        with self._lock:
+            self._entries.append({'type': msg_type, 'message': message})
+            self._bytes += len(message)
+
+            if len(self._entries) >= self.max_entries or self._bytes >= self.max_bytes:
+                self._flush_locked()
+            elif self._timer is None:
+                self._timer = start_timer(self.loop, self.flush_interval, self._on_timer)
+
+    def flush(self):
+        """Send everything buffered so far, synchronously"""
+        with self._lock:
+            self._flush_locked()
+
+    def _on_timer(self):
+        with self._lock:
+            self._timer = None
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._entries:
+            return
+
+        entries = self._entries
+        self._entries = []
+        self._bytes = 0
+        self.batches_sent += 1
+        self.entries_sent += len(entries)
+        self.send_batch(entries)
@@ -0,0 +1,150 @@
+import json
+import re
+import threading
+
+try:
+    from .logger import Logger
+except ImportError:
+    from logger import Logger
+
+
+YES_ANSWERS = ('y', 'yes', 'true', '1')
+NO_ANSWERS = ('n', 'no', 'false', '0')
+
+
+def normalize_answer(answer):
+    """Turn a rule or config answer into what confirm_ask returns: True, False or 'd'"""
+    if isinstance(answer, bool):
+        return answer
+    text = str(answer).strip().lower()
+    if text in YES_ANSWERS:
+        return True
+    if text in NO_ANSWERS:
+        return False
+    if text in ('d', "don't"):
+        return 'd'
+    raise ValueError(f"Unknown confirmation answer: {answer}")
+
+
+class ConfirmRule:
+    """One row of the confirmation rule table
+
+    A rule matches when every pattern it sets is found (re.search, case
+    insensitive) in the corresponding field. A rule with an answer settles the
+    confirmation on the server; a rule without one only names the group whose
+    timeout and default answer apply while waiting for the webapp.
+    """
+
+    def __init__(self, group='default', question=None, subject=None, answer=None, timeout=None, default=None):
+        self.group = group or 'default'
+        self.question = question
+        self.subject = subject
+        self.answer = normalize_answer(answer) if answer is not None else None
+        self.timeout = float(timeout) if timeout is not None else None
+        self.default = normalize_answer(default) if default is not None else None
+        self._question_re = re.compile(question, re.IGNORECASE) if question else None
+        self._subject_re = re.compile(subject, re.IGNORECASE) if subject else None
+        self.hits = 0
+
+    def matches(self, question, subject):
+        if self._question_re is not None and not self._question_re.search(question or ''):
+            return False
+        if self._subject_re is not None and not self._subject_re.search(subject or ''):
+            return False
+        return True
+
+    def to_dict(self):
+        return {
+            'group': self.group,
+            'question': self.question,
+            'subject': self.subject,
+            'answer': self.answer,
+            'timeout': self.timeout,
+            'default': self.default,
+            'hits': self.hits
+        }
+
+
+class ConfirmPolicy:
+    """Decides how long to wait for a confirmation and what to answer without one
+
+    Rules are checked in order before any RPC is made; the first match
+    decides. Confirmations that reach the webapp wait at most the group's
+    timeout (default_timeout when the rule sets none, None to wait forever)
+    and then fall back to the group's default answer. Without one the answer
+    is no: aider's own default is often yes, and nobody saw the question.
+    """
+
+    def __init__(self, default_timeout=None, rules=None):
+        self.default_timeout = default_timeout
+        self._lock = threading.Lock()
+        self._rules = []
+        self.auto_answered = 0
+        self.timed_out = 0
+        if rules:
+            self.set_rules(rules)
+
+    @classmethod
+    def from_file(cls, path, default_timeout=None):
+        """Load the rule table from a JSON file holding a list of rule objects"""
+        with open(path, 'r', encoding='utf-8') as f:
+            rules = json.load(f)
+        policy = cls(default_timeout=default_timeout, rules=rules)
+        Logger.info("Loaded %d confirmation rules from %s", len(policy._rules), path)
+        return policy
+
+    @classmethod
+    def from_config(cls, config):
+        """Build the policy from the server's --confirm-timeout and --confirm-rules options"""
+        default_timeout = config.confirm_timeout or None
+        if config.confirm_rules:
+            try:
+                return cls.from_file(config.confirm_rules, default_timeout=default_timeout)
+            except (OSError, ValueError) as e:
+                print(f"Warning: could not load confirmation rules from {config.confirm_rules}: {e}")
+        return cls(default_timeout=default_timeout)
+
+    def set_rules(self, rules):
+        """Replace the rule table, raising ValueError on a bad rule"""
+        try:
+            compiled = [ConfirmRule(**rule) for rule in rules]
+        except (TypeError, re.error) as e:
+            raise ValueError(f"Invalid confirmation rule: {e}")
+        with self._lock:
+            self._rules = compiled
+
+    def get_rules(self):
+        with self._lock:
+            return [rule.to_dict() for rule in self._rules]
+
+    def match(self, question, subject):
+        """Find the first rule matching this confirmation, or None"""
+        with self._lock:
+            for rule in self._rules:
+                if rule.matches(question, subject):
+                    rule.hits += 1
+                    return rule
+        return None
+
+    def timeout_for(self, rule):
+        if rule is not None and rule.timeout is not None:
+            return rule.timeout if rule.timeout > 0 else None
+        return self.default_timeout
+
+    @staticmethod
+    def fallback_answer(rule):
+        """The answer used when the webapp does not reply in time
+
+        Only a rule's explicit default can answer yes on the user's behalf.
+        """
+        if rule is not None and rule.default is not None:
+            return rule.default
+        return False
+
+    def get_stats(self):
+        return {
+            'default_timeout': self.default_timeout,
+            'auto_answered': self.auto_answered,
+            'timed_out': self.timed_out,
+            'rules': self.get_rules()
+        }
@@ -0,0 +1,146 @@
+import collections
+import itertools
+import tracemalloc
+from datetime import datetime
+
+try:
+    from .base_wrapper import BaseWrapper
+except ImportError:
+    from base_wrapper import BaseWrapper
+
+
+class Diagnostics(BaseWrapper):
+    """Opt-in memory profiling over RPC using tracemalloc
+
+    Tracing is off until start_tracing is called, so normal runs pay no
+    allocation-tracing overhead. Snapshots are kept in a small bounded store
+    and referred to by id.
+    """
+    
+    MAX_SNAPSHOTS = 10
+    KEY_TYPES = ('lineno', 'filename', 'traceback')
+    
+    def __init__(self):
+        super().__init__()
+        self._snapshots = collections.OrderedDict()
+        self._snapshot_ids = itertools.count(1)
+        
+        # Allocations made by tracemalloc and the import system are noise
+        self._filters = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+            tracemalloc.Filter(False, '<unknown>'),
+        ]
+    
+    def start_tracing(self, frames=1):
+        """Start tracing allocations, keeping up to frames frames per traceback"""
+        self.log(f"start_tracing called with frames: {frames}")
+        if tracemalloc.is_tracing():
+            return {"status": "info", "message": "Tracing already running", **self.get_tracing_status()}
+        
+        tracemalloc.start(max(1, int(frames)))
+        return {"status": "success", "message": "Tracing started", **self.get_tracing_status()}
+    
+    def stop_tracing(self):
+        """Stop tracing and discard stored snapshots"""
+        self.log("stop_tracing called")
+        if not tracemalloc.is_tracing():
+            return {"status": "info", "message": "Tracing not running"}
+        
+        tracemalloc.stop()
+        self._snapshots.clear()
+        return {"status": "success", "message": "Tracing stopped"}
+    
+    def get_tracing_status(self):
+        """Get whether tracing is on, traced memory and the stored snapshots"""
+        status = {
+            "tracing": tracemalloc.is_tracing(),
+            "snapshots": [
+                {"id": snapshot_id, "label": label, "taken_at": taken_at}
+                for snapshot_id, (label, taken_at, _) in self._snapshots.items()
+            ]
+        }
+        if status["tracing"]:
+            current, peak = tracemalloc.get_traced_memory()
+            status.update({
+                "traced_current_bytes": current,
+                "traced_peak_bytes": peak,
+                "tracemalloc_overhead_bytes": tracemalloc.get_tracemalloc_memory(),
+                "traceback_limit": tracemalloc.get_traceback_limit()
+            })
+        return status
+    
+    def take_snapshot(self, label=None):
+        """Take a snapshot of current allocations and return its id"""
+        self.log(f"take_snapshot called with label: {label}")
+        if not tracemalloc.is_tracing():
+            return {"error": "Tracing is not running, call start_tracing first"}
+        
+        snapshot = tracemalloc.take_snapshot().filter_traces(self._filters)
+        snapshot_id = next(self._snapshot_ids)
+        self._snapshots[snapshot_id] = (label, datetime.now().isoformat(), snapshot)
+        
+        # Keep the store bounded - snapshots of a large process are big
+        while len(self._snapshots) > self.MAX_SNAPSHOTS:
+            self._snapshots.popitem(last=False)
+        
+        return {"id": snapshot_id, "label": label, "traces": len(snapshot.traces)}
+    
+    def delete_snapshot(self, snapshot_id):
+        """Forget a stored snapshot"""
+        if self._snapshots.pop(snapshot_id, None) is None:
+            return {"error": f"Unknown snapshot: {snapshot_id}"}
+        return {"status": "success", "message": f"Snapshot {snapshot_id} deleted"}
+    
+    def get_top_allocations(self, snapshot_id=None, limit=20, key_type='lineno'):
+        """Get the top allocation sites of a snapshot (the latest if no id is given)"""
+        self.log(f"get_top_allocations called with snapshot_id: {snapshot_id}, limit: {limit}, key_type: {key_type}")
+        if key_type not in self.KEY_TYPES:
+            return {"error": f"Invalid key_type: {key_type}. Use one of {', '.join(self.KEY_TYPES)}"}
+        
+        snapshot = self._get_snapshot(snapshot_id)
+        if snapshot is None:
+            return {"error": f"No snapshot available for id: {snapshot_id}"}
+        
+        stats = snapshot.statistics(key_type)
+        return {
+            "total_bytes": sum(stat.size for stat in stats),
+            "top": [self._stat_to_dict(stat) for stat in stats[:limit]]
+        }
+    
+    def compare_snapshots(self, old_id, new_id=None, limit=20, key_type='lineno'):
+        """Get the allocation sites that grew most between two snapshots"""
+        self.log(f"compare_snapshots called with old_id: {old_id}, new_id: {new_id}, limit: {limit}, key_type: {key_type}")
+        if key_type not in self.KEY_TYPES:
+            return {"error": f"Invalid key_type: {key_type}. Use one of {', '.join(self.KEY_TYPES)}"}
+        
+        old_snapshot = self._get_snapshot(old_id)
+        new_snapshot = self._get_snapshot(new_id)
+        if old_snapshot is None or new_snapshot is None:
+            return {"error": f"Snapshots not available: {old_id}, {new_id}"}
+        
+        stats = new_snapshot.compare_to(old_snapshot, key_type)
+        return {
+            "size_diff_bytes": sum(stat.size_diff for stat in stats),
+            "top": [
+                dict(self._stat_to_dict(stat), size_diff=stat.size_diff, count_diff=stat.count_diff)
+                for stat in stats[:limit]
+            ]
+        }
+    
+    def _get_snapshot(self, snapshot_id):
+        if snapshot_id is None:
+            if not self._snapshots:
+                return None
+            return next(reversed(self._snapshots.values()))[2]
+        entry = self._snapshots.get(snapshot_id)
+        return entry[2] if entry else None
+    
+    @staticmethod
+    def _stat_to_dict(stat):
+        return {
+            "size": stat.size,
+            "count": stat.count,
+            "traceback": [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback]
+        }
@@ -0,0 +1,354 @@
+import concurrent.futures
+import hashlib
+import mmap
+import os
+import threading
+from array import array
+from collections import OrderedDict
+
+
+def blob_hash(data):
+    """The git blob hash of data, so a working file's etag matches its committed blob when unchanged"""
+    digest = hashlib.sha1(b'blob %d\0' % len(data))
+    digest.update(data)
+    return digest.hexdigest()
+
+
+def _utf8_start(data, pos):
+    """Move pos forward past UTF-8 continuation bytes so it starts a character"""
+    while pos < len(data) and (data[pos] & 0xC0) == 0x80:
+        pos += 1
+    return pos
+
+
+def _utf8_end(data, pos, limit):
+    """Move pos back so data[:pos] does not end inside a character (unless pos is limit)"""
+    if pos >= limit:
+        return limit
+    while pos > 0 and (data[pos] & 0xC0) == 0x80:
+        pos -= 1
+    return pos
+
+
+class LineIndex:
+    """Byte offset of the start of every line of a file, so line N is one lookup"""
+
+    def __init__(self, offsets, size, mtime_ns):
+        self.offsets = offsets
+        self.size = size
+        self.mtime_ns = mtime_ns
+
+    @classmethod
+    def build(cls, path):
+        stat = os.stat(path)
+        offsets = array('Q', [0])
+        if stat.st_size:
+            with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                pos = mm.find(b'\n')
+                while pos != -1:
+                    offsets.append(pos + 1)
+                    pos = mm.find(b'\n', pos + 1)
+        # A trailing newline does not start another line
+        if len(offsets) > 1 and offsets[-1] == stat.st_size:
+            offsets.pop()
+        return cls(offsets, stat.st_size, stat.st_mtime_ns)
+
+    @property
+    def line_count(self):
+        return len(self.offsets) if self.size else 0
+
+    def byte_range(self, start_line, end_line):
+        """Byte offsets covering lines [start_line, end_line)"""
+        count = self.line_count
+        start_line = max(0, min(start_line, count))
+        end_line = count if end_line is None else max(start_line, min(end_line, count))
+        start = self.offsets[start_line] if start_line < count else self.size
+        end = self.offsets[end_line] if end_line < count else self.size
+        return start, end, start_line, end_line
+
+
+class FileReader:
+    """Ranged, chunked and size-aware reads of working tree files
+
+    Files are mmapped so a range costs only the pages it touches. Files over
+    LARGE_FILE_BYTES are not meant to be loaded whole: get_file_info returns
+    their metadata and a head preview, and clients page through them with
+    read_file_range or read_file_chunk. Line ranges use a per-file LineIndex
+    that is built on first use and kept until the file's mtime or size
+    changes. Building one scans the whole file, so for files over
+    LARGE_FILE_BYTES it is built on a worker thread and a line read returns
+    {'status': 'indexing'} until it is ready; the client asks again.
+
+    Paging is pulled by the client rather than pushed: pushes reach every
+    connected client, and an RPC call does not say which remote made it.
+
+    Whole-file reads (read_text) are served from a content cache bounded to
+    CACHE_BYTES and keyed by (path, mtime_ns, size), so reopening an
+    unchanged file skips the disk.
+    """
+
+    LARGE_FILE_BYTES = 8 * 1024 * 1024
+    PREVIEW_BYTES = 64 * 1024
+    CHUNK_BYTES = 1024 * 1024
+    MAX_RANGE_BYTES = 4 * 1024 * 1024
+    MAX_INDEXES = 8
+    CACHE_BYTES = 32 * 1024 * 1024
+    MAX_CACHED_FILE_BYTES = 2 * 1024 * 1024
+
+    def __init__(self, repo_instance):
+        self.repo = repo_instance
+        self._indexes = OrderedDict()
+        self._contents = OrderedDict()
+        self._cached_bytes = 0
+        self._lock = threading.Lock()
+        self._executor = None
+        self._building = set()
+
+    def _full_path(self, file_path):
+        return os.path.join(self.repo.repo.working_tree_dir, file_path)
+
+    def _line_index(self, full_path, stat):
+        """The file's line index, rebuilt if the file changed since it was built"""
+        with self._lock:
+            index = self._indexes.get(full_path)
+            if index is not None and index.mtime_ns == stat.st_mtime_ns and index.size == stat.st_size:
+                self._indexes.move_to_end(full_path)
+                return index
+        index = LineIndex.build(full_path)
+        with self._lock:
+            self._indexes[full_path] = index
+            self._indexes.move_to_end(full_path)
+            while len(self._indexes) > self.MAX_INDEXES:
+                self._indexes.popitem(last=False)
+        return index
+
+    def _index_or_build(self, full_path, stat):
+        """The file's line index, or None while it is built in the background (files over LARGE_FILE_BYTES)"""
+        index = self._cached_index(full_path, stat)
+        if index is not None:
+            return index
+        if stat.st_size <= self.LARGE_FILE_BYTES:
+            return self._line_index(full_path, stat)
+        with self._lock:
+            if full_path not in self._building:
+                self._building.add(full_path)
+                if self._executor is None:
+                    self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1,
+                                                                           thread_name_prefix='LineIndex')
+                self._executor.submit(self._build_in_background, full_path, stat)
+        return None
+
+    def _build_in_background(self, full_path, stat):
+        try:
+            self._line_index(full_path, stat)
+        except OSError as e:
+            self.repo.log(f"Error indexing {full_path}: {e}")
+        finally:
+            with self._lock:
+                self._building.discard(full_path)
+
+    def _cached_index(self, full_path, stat):
+        with self._lock:
+            index = self._indexes.get(full_path)
+        if index is not None and index.mtime_ns == stat.st_mtime_ns and index.size == stat.st_size:
+            return index
+        return None
+
+    def read_text(self, file_path, if_none_match=None):
+        """A working file's text and etag, or None if it does not exist
+
+        Returns (content, etag); content is None when the file's etag equals
+        if_none_match, in which case nothing is decoded. Raises
+        UnicodeDecodeError for files that are not UTF-8.
+        """
+        full_path = self._full_path(file_path)
+        try:
+            stat = os.stat(full_path)
+        except FileNotFoundError:
+            return None
+        key = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            entry = self._contents.get(full_path)
+            if entry is not None and entry[0] == key:
+                self._contents.move_to_end(full_path)
+                etag, content = entry[1], entry[2]
+                return (None if etag == if_none_match else content), etag
+
+        with open(full_path, 'rb') as f:
+            data = f.read()
+        etag = blob_hash(data)
+        if etag == if_none_match:
+            return None, etag
+        # Universal newlines, as reading the file in text mode would give
+        content = data.decode('utf-8').replace('\r\n', '\n').replace('\r', '\n')
+        if len(data) <= self.MAX_CACHED_FILE_BYTES:
+            self._cache_content(full_path, key, etag, content, len(data))
+        return content, etag
+
+    def _cache_content(self, full_path, key, etag, content, size):
+        with self._lock:
+            old = self._contents.pop(full_path, None)
+            if old is not None:
+                self._cached_bytes -= old[3]
+            self._contents[full_path] = (key, etag, content, size)
+            self._cached_bytes += size
+            while self._cached_bytes > self.CACHE_BYTES:
+                _, evicted = self._contents.popitem(last=False)
+                self._cached_bytes -= evicted[3]
+
+    def forget(self, path):
+        """Drop the cached content and line index of a file (absolute or repo-relative path)"""
+        full_path = path if os.path.isabs(path) else self._full_path(path)
+        with self._lock:
+            entry = self._contents.pop(full_path, None)
+            if entry is not None:
+                self._cached_bytes -= entry[3]
+            self._indexes.pop(full_path, None)
+
+    def get_file_info(self, file_path):
+        """Size, line count and a head preview; large says the file should be read in ranges"""
+        if not self.repo.repo:
+            return {"error": "No Git repository available"}
+        full_path = self._full_path(file_path)
+        try:
+            stat = os.stat(full_path)
+            info = self.preview(file_path, full_path, stat)
+        except FileNotFoundError:
+            return {"error": f"File {file_path} not found in working directory"}
+        except OSError as e:
+            return {"error": f"Error reading file {file_path}: {e}"}
+
+        if info['binary']:
+            return info
+        try:
+            # Counting lines of a large file is left to the index, built when lines are asked for
+            index = self._cached_index(full_path, stat) if info['large'] else self._line_index(full_path, stat)
+        except OSError as e:
+            return {"error": f"Error reading file {file_path}: {e}"}
+        if index is not None:
+            info['line_count'] = index.line_count
+        return info
+
+    def large_preview(self, file_path):
+        """The preview of a file over LARGE_FILE_BYTES, or None for smaller or missing files"""
+        full_path = self._full_path(file_path)
+        try:
+            stat = os.stat(full_path)
+        except FileNotFoundError:
+            return None
+        if stat.st_size <= self.LARGE_FILE_BYTES:
+            return None
+        return self.preview(file_path, full_path, stat)
+
+    def preview(self, file_path, full_path=None, stat=None):
+        """Metadata and the head of a file, ending on a line boundary; raises OSError"""
+        full_path = full_path or self._full_path(file_path)
+        stat = stat or os.stat(full_path)
+        info = {
+            'path': file_path,
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'large': stat.st_size > self.LARGE_FILE_BYTES,
+            'binary': False,
+            'line_count': None,
+            'preview': '',
+            'preview_truncated': False
+        }
+        with open(full_path, 'rb') as f:
+            head = f.read(self.PREVIEW_BYTES)
+        if b'\0' in head[:8192]:
+            info['binary'] = True
+            return info
+
+        truncated = stat.st_size > len(head)
+        if truncated:
+            # End the preview on a line boundary
+            cut = head.rfind(b'\n')
+            if cut != -1:
+                head = head[:cut + 1]
+        info['preview'] = head.decode('utf-8', errors='replace')
+        info['preview_truncated'] = truncated
+        return info
+
+    def read_file_range(self, file_path, start=0, end=None, unit='bytes'):
+        """Read part of a working tree file
+
+        Args:
+            start (int): First byte or line, counted from 0
+            end (int): Byte or line to stop before; None for the end of the file
+            unit (str): 'bytes' or 'lines'
+
+        At most MAX_RANGE_BYTES are returned; next is where to continue, or
+        None at the end of the file. Byte ranges are moved to UTF-8
+        character boundaries. A line range of a large file whose index is
+        still being built returns status 'indexing'; ask again shortly.
+        """
+        if not self.repo.repo:
+            return {"error": "No Git repository available"}
+        if unit not in ('bytes', 'lines'):
+            return {"error": f"Invalid unit: {unit}. Use 'bytes' or 'lines'"}
+        if start is None or start < 0 or (end is not None and end < start):
+            return {"error": f"Invalid range: {start}-{end}"}
+
+        full_path = self._full_path(file_path)
+        try:
+            stat = os.stat(full_path)
+            if unit == 'lines':
+                index = self._index_or_build(full_path, stat)
+                if index is None:
+                    return {'path': file_path, 'unit': unit, 'size': stat.st_size, 'status': 'indexing'}
+                return self._read_range(file_path, full_path, stat, start, end, index)
+            return self._read_range(file_path, full_path, stat, start, end)
+        except FileNotFoundError:
+            return {"error": f"File {file_path} not found in working directory"}
+        except (OSError, ValueError) as e:
+            return {"error": f"Error reading file {file_path}: {e}"}
+
+    def _read_range(self, file_path, full_path, stat, start, end, index=None):
+        """Read a byte range, or a line range when given the file's index"""
+        unit = 'bytes' if index is None else 'lines'
+        try:
+            result = {'path': file_path, 'unit': unit, 'size': stat.st_size}
+            if index is not None:
+                byte_start, byte_end, start, end = index.byte_range(start, end)
+                result['line_count'] = index.line_count
+            else:
+                byte_start = min(start, stat.st_size)
+                byte_end = stat.st_size if end is None else min(end, stat.st_size)
+
+            clipped_end = min(byte_end, byte_start + self.MAX_RANGE_BYTES)
+            content, byte_start, read_end = self._read_bytes(full_path, byte_start, clipped_end, stat.st_size)
+
+            if index is not None:
+                if read_end < byte_end:
+                    # Clipped: stop after the last whole line read (a single longer line is cut)
+                    cut = content.rfind('\n')
+                    if cut != -1:
+                        content = content[:cut + 1]
+                    end = start + max(content.count('\n'), 1)
+                result.update(start=start, end=end, next=end if end < index.line_count else None)
+            else:
+                result.update(start=byte_start, end=read_end, next=read_end if read_end < stat.st_size else None)
+            result['content'] = content
+            return result
+        except FileNotFoundError:
+            return {"error": f"File {file_path} not found in working directory"}
+        except (OSError, ValueError) as e:
+            return {"error": f"Error reading file {file_path}: {e}"}
+
+    def read_file_chunk(self, file_path, offset=0, chunk_bytes=None):
+        """Read the next fixed-size chunk of a file; call again with the returned next until it is None"""
+        chunk_bytes = min(chunk_bytes or self.CHUNK_BYTES, self.MAX_RANGE_BYTES)
+        return self.read_file_range(file_path, offset, offset + chunk_bytes, 'bytes')
+
+    def _read_bytes(self, full_path, start, end, size):
+        """Decode bytes [start, end) moved to character boundaries; returns (text, start, end)"""
+        if start >= end or size == 0:
+            return '', start, start
+        with open(full_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            start = _utf8_start(mm, start)
+            end = _utf8_end(mm, end, size)
+            if end <= start:
+                return '', start, start
+            return mm[start:end].decode('utf-8', errors='replace'), start, end
@@ -0,0 +1,246 @@
+import os
+import re
+import subprocess
+import threading
+from collections import OrderedDict
+
+import git
+
+HUNK_HEADER = re.compile(r'^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@ ?(.*)$')
+
+
+class GitDiff:
+    """Computes file diffs on the server so clients only receive the hunks
+
+    Versions are 'working', 'index', 'HEAD' or any commit-ish. Diffs between
+    two commits never change, so they are kept in an LRU keyed by the
+    resolved commit hashes.
+    """
+
+    ALGORITHMS = ('histogram', 'patience', 'myers', 'minimal')
+    MAX_CACHED_DIFFS = 64
+
+    def __init__(self, repo_instance):
+        self.repo = repo_instance
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_file_diff(self, file_path, from_version='HEAD', to_version='working', algorithm='histogram', context=3):
+        """Get the diff of one file between two versions
+
+        Args:
+            file_path (str): Path relative to the repository root
+            from_version (str): 'working', 'index', 'HEAD' or a commit-ish
+            to_version (str): 'working', 'index', 'HEAD' or a commit-ish
+            algorithm (str): git diff algorithm, histogram or patience for readable hunks
+            context (int): Unchanged lines around each change
+
+        Returns:
+            dict: Hunks with their lines numbered in both versions, and
+            line_map, the unchanged segments [old_start, new_start, count]
+            (count None for "to the end of the file") for mapping lines
+            between versions without loading either one
+        """
+        self.repo.log(f"get_file_diff called for {file_path}, {from_version} -> {to_version}, algorithm: {algorithm}")
+
+        if not self.repo.repo:
+            error_msg = {"error": "No Git repository available"}
+            self.repo.log(f"get_file_diff returning error: {error_msg}")
+            return error_msg
+
+        if algorithm not in self.ALGORITHMS:
+            error_msg = {"error": f"Invalid algorithm: {algorithm}. Use one of {', '.join(self.ALGORITHMS)}"}
+            self.repo.log(f"get_file_diff returning error: {error_msg}")
+            return error_msg
+
+        try:
+            context = max(0, int(context))
+            from_commit = self._resolve(from_version)
+            to_commit = self._resolve(to_version)
+
+            cache_key = None
+            if from_commit and to_commit:
+                cache_key = (from_commit, to_commit, file_path, algorithm, context)
+                with self._lock:
+                    cached = self._cache.get(cache_key)
+                    if cached is not None:
+                        self._cache.move_to_end(cache_key)
+                        self.repo.log(f"get_file_diff returning cached diff for {file_path}")
+                        return dict(cached, cached=True)
+
+            output = self._run_diff(file_path, from_version, to_version, from_commit, to_commit,
+                                    algorithm, context)
+            result = self._parse(output)
+            result.update({
+                'path': file_path,
+                'from': from_version,
+                'to': to_version,
+                'algorithm': algorithm,
+                'cached': False
+            })
+
+            if cache_key is not None:
+                with self._lock:
+                    self._cache[cache_key] = result
+                    while len(self._cache) > self.MAX_CACHED_DIFFS:
+                        self._cache.popitem(last=False)
+
+            self.repo.log(f"get_file_diff returning {len(result['hunks'])} hunks for {file_path}")
+            return result
+
+        except (git.exc.BadName, ValueError) as e:
+            error_msg = {"error": f"Invalid version for {file_path}: {e}"}
+            self.repo.log(f"get_file_diff returning error: {error_msg}")
+            return error_msg
+        except Exception as e:
+            error_msg = {"error": f"Error diffing file {file_path}: {e}"}
+            self.repo.log(f"get_file_diff returning error: {error_msg}")
+            return error_msg
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+
+    def _resolve(self, version):
+        """The commit hash of a commit-ish, or None for 'working' and 'index'"""
+        if version in ('working', 'index'):
+            return None
+        return self.repo.repo.commit(version).hexsha
+
+    def _run_diff(self, file_path, from_version, to_version, from_commit, to_commit, algorithm, context):
+        args = ['diff', '--no-color', '--no-ext-diff', '--no-renames',
+                f'--diff-algorithm={algorithm}', f'-U{context}']
+
+        # git diff compares commit -> index (--cached), commit -> working or
+        # index -> working; other orders are those reversed with -R
+        order = {'commit': 0, 'index': 1, 'working': 2}
+        from_kind = 'commit' if from_commit else from_version
+        to_kind = 'commit' if to_commit else to_version
+        reverse = order[from_kind] > order[to_kind]
+        if reverse:
+            from_kind, to_kind = to_kind, from_kind
+            from_commit, to_commit = to_commit, from_commit
+
+        if from_kind == 'commit' and to_kind == 'commit':
+            args += [from_commit, to_commit]
+        elif from_kind == 'commit':
+            if to_kind == 'index':
+                args.append('--cached')
+            args.append(from_commit)
+        elif from_kind == 'index' and to_kind == 'index':
+            return ''
+        elif from_kind == 'working':
+            return ''
+        if reverse:
+            args.append('-R')
+        args += ['--', file_path]
+
+        output = self._git(args)
+        if not output and to_kind == 'working' and self._is_untracked(file_path):
+            # git diff leaves untracked files out; diff them against an empty file
+            output = self._git(['diff', '--no-color', '--no-ext-diff', '--no-index',
+                                f'-U{context}'] + (['-R'] if reverse else []) + ['--', os.devnull, file_path])
+        return output
+
+    def _git(self, args):
+        result = subprocess.run(['git'] + args, cwd=self.repo.repo.working_tree_dir, capture_output=True)
+        # --no-index exits with 1 when the files differ
+        if result.returncode not in (0, 1):
+            raise RuntimeError(result.stderr.decode('utf-8', errors='replace').strip())
+        return result.stdout.decode('utf-8', errors='replace')
+
+    def _is_untracked(self, file_path):
+        full_path = os.path.join(self.repo.repo.working_tree_dir, file_path)
+        if not os.path.isfile(full_path):
+            return False
+        return not self._git(['ls-files', '--', file_path]).strip()
+
+    @staticmethod
+    def _parse(output):
+        """Turn unified diff output into hunks and a line map"""
+        hunks = []
+        binary = False
+        additions = deletions = 0
+        hunk = None
+        old_line = new_line = 0
+
+        # Only '\n' ends a diff line; splitlines() would also split on '\r',
+        # form feeds and other separators inside the file's own lines
+        lines = output.split('\n')
+        if lines and lines[-1] == '':
+            lines.pop()
+
+        for line in lines:
+            match = HUNK_HEADER.match(line)
+            if match:
+                old_start, old_count, new_start, new_count, section = match.groups()
+                hunk = {
+                    'old_start': int(old_start),
+                    'old_lines': int(old_count) if old_count is not None else 1,
+                    'new_start': int(new_start),
+                    'new_lines': int(new_count) if new_count is not None else 1,
+                    'header': section,
+                    'lines': []
+                }
+                hunks.append(hunk)
+                # A count of 0 means the range is empty and starts after that line
+                old_line = hunk['old_start'] if hunk['old_lines'] else hunk['old_start'] + 1
+                new_line = hunk['new_start'] if hunk['new_lines'] else hunk['new_start'] + 1
+                continue
+            if hunk is None:
+                if line.startswith('Binary files '):
+                    binary = True
+                continue
+
+            tag = line[:1]
+            if tag == ' ':
+                hunk['lines'].append({'type': 'context', 'old': old_line, 'new': new_line, 'text': line[1:]})
+                old_line += 1
+                new_line += 1
+            elif tag == '-':
+                hunk['lines'].append({'type': 'del', 'old': old_line, 'new': None, 'text': line[1:]})
+                old_line += 1
+                deletions += 1
+            elif tag == '+':
+                hunk['lines'].append({'type': 'add', 'old': None, 'new': new_line, 'text': line[1:]})
+                new_line += 1
+                additions += 1
+            elif tag == '\\' and hunk['lines']:
+                # "\ No newline at end of file" belongs to the line before it
+                hunk['lines'][-1]['no_newline'] = True
+
+        return {
+            'binary': binary,
+            'hunks': hunks,
+            'line_map': GitDiff._line_map(hunks),
+            'additions': additions,
+            'deletions': deletions
+        }
+
+    @staticmethod
+    def _line_map(hunks):
+        """Unchanged segments [old_start, new_start, count] around the changed lines of the hunks"""
+        segments = []
+
+        def add(old, new, count):
+            last = segments[-1] if segments else None
+            if last and last[0] + last[2] == old and last[1] + last[2] == new:
+                last[2] += count
+            else:
+                segments.append([old, new, count])
+
+        old_next = new_next = 1
+        for hunk in hunks:
+            # An empty range starts after the line it names
+            first_old = hunk['old_start'] if hunk['old_lines'] else hunk['old_start'] + 1
+            first_new = hunk['new_start'] if hunk['new_lines'] else hunk['new_start'] + 1
+            if first_old > old_next:
+                add(old_next, new_next, first_old - old_next)
+            for line in hunk['lines']:
+                if line['type'] == 'context':
+                    add(line['old'], line['new'], 1)
+            old_next = first_old + hunk['old_lines']
+            new_next = first_new + hunk['new_lines']
+        # Everything after the last hunk is unchanged
+        segments.append([old_next, new_next, None])
+        return segments
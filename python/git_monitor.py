@@ -1,18 +1,23 @@
 import os
+import threading
 import time
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
 
 
-class GitChangeHandler(FileSystemEventHandler):
-    """File system event handler that triggers on Git repository changes"""
+class GitChangeHandler:
+    """File system event handler that triggers on Git repository changes
+    
+    watchdog's observer only calls dispatch(), so this does not subclass
+    FileSystemEventHandler and watchdog is not imported until the monitor starts.
+    """
     
     def __init__(self, repo_instance):
-        super().__init__()
         self.repo = repo_instance
         self.last_event_time = 0
         self.debounce_interval = 0.5  # seconds
     
+    def dispatch(self, event):
+        self.on_any_event(event)
+    
     def on_any_event(self, event):
         # Only respond to events that actually change files
         # Ignore read-only events like 'opened', 'closed', 'accessed'
@@ -57,6 +62,8 @@ class GitChangeHandler(FileSystemEventHandler):
                 self.repo.log(f"File modified externally: {event.src_path}")
                 # Notify MergeEditor about the file save
                 self.repo._notify_file_saved(event.src_path)
+            if event.event_type in ('modified', 'created', 'moved') and not event.is_directory:
+                self.repo._notify_file_changed(getattr(event, 'dest_path', None) or event.src_path)
         
         # Debounce events to avoid multiple rapid notifications
         current_time = time.time()
@@ -76,9 +83,14 @@ class GitMonitor:
         self.repo = repo_instance
         self._observer = None
         self._event_handler = None
+        self._lock = threading.Lock()
     
     def start_git_monitor(self, interval=None):
         """Start monitoring the git repository for changes"""
+        with self._lock:
+            return self._start_git_monitor()
+    
+    def _start_git_monitor(self):
         if not self.repo.repo:
             self.repo.log("Cannot start git monitor: No git repository available")
             return {"error": "No git repository available"}
@@ -88,6 +100,7 @@ class GitMonitor:
             return {"status": "info", "message": "Git monitor already running"}
             
         self.repo.log(f"Starting git monitor using watchdog")
+        from watchdog.observers import Observer
         
         # Create the event handler and file system observer
         self._event_handler = GitChangeHandler(self.repo)
@@ -109,6 +122,10 @@ class GitMonitor:
             
     def stop_git_monitor(self):
         """Stop the git repository monitor"""
+        with self._lock:
+            return self._stop_git_monitor()
+    
+    def _stop_git_monitor(self):
         if not self._observer or not self._observer.is_alive():
             self.repo.log("Git monitor is not running")
             return {"status": "info", "message": "Git monitor not running"}
@@ -4,12 +4,8 @@ import tempfile
 
 try:
     from .git_operations_basic import GitBasicOperations
-    from .git_operations_rebase import GitRebaseOperations
-    from .git_operations_editor import GitEditorOperations
 except ImportError:
     from git_operations_basic import GitBasicOperations
-    from git_operations_rebase import GitRebaseOperations
-    from git_operations_editor import GitEditorOperations
 
 
 class GitOperations:
@@ -18,10 +14,31 @@ class GitOperations:
     def __init__(self, repo_instance):
         self.repo = repo_instance
         
-        # Initialize specialized operation handlers
+        # Initialize specialized operation handlers; rebase and editor
+        # operations are loaded on first use, they are not needed at startup
         self.basic_ops = GitBasicOperations(repo_instance)
-        self.rebase_ops = GitRebaseOperations(repo_instance)
-        self.editor_ops = GitEditorOperations(repo_instance)
+        self._rebase_ops = None
+        self._editor_ops = None
+    
+    @property
+    def rebase_ops(self):
+        if self._rebase_ops is None:
+            try:
+                from .git_operations_rebase import GitRebaseOperations
+            except ImportError:
+                from git_operations_rebase import GitRebaseOperations
+            self._rebase_ops = GitRebaseOperations(self.repo)
+        return self._rebase_ops
+    
+    @property
+    def editor_ops(self):
+        if self._editor_ops is None:
+            try:
+                from .git_operations_editor import GitEditorOperations
+            except ImportError:
+                from git_operations_editor import GitEditorOperations
+            self._editor_ops = GitEditorOperations(self.repo)
+        return self._editor_ops
     
     # Basic file operations - delegate to basic_ops
     def get_file_content(self, file_path, version='working'):
@@ -48,6 +65,18 @@ class GitOperations:
         """Discard changes to a specific file in the repository by checking it out from HEAD"""
         return self.basic_ops.discard_changes(file_path)
             
+    def stage_files(self, file_paths):
+        """Stage several files with one git invocation"""
+        return self.basic_ops.stage_files(file_paths)
+
+    def unstage_files(self, file_paths):
+        """Unstage several files with one git invocation"""
+        return self.basic_ops.unstage_files(file_paths)
+
+    def discard_changes_for_files(self, file_paths):
+        """Discard the changes to several files with one git invocation"""
+        return self.basic_ops.discard_changes_for_files(file_paths)
+            
     def commit_file(self, file_path, commit_message):
         """Commit a specific file to the repository"""
         return self.basic_ops.commit_file(file_path, commit_message)
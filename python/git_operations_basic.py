@@ -207,6 +207,106 @@ class GitBasicOperations:
             self.repo.log(f"discard_changes returning error: {error_msg}")
             return error_msg
             
+    # Bulk variants: one status query to validate every path, one git call to apply
+    def stage_files(self, file_paths):
+        """Stage several files (including deletions) with a single git add"""
+        return self._apply_to_paths(
+            'stage_files', file_paths,
+            lambda x, y: y != ' ',
+            "has no changes to stage",
+            ['add', '-A'])
+
+    def unstage_files(self, file_paths):
+        """Unstage several files with a single git restore --staged"""
+        return self._apply_to_paths(
+            'unstage_files', file_paths,
+            lambda x, y: x not in (' ', '?', '!'),
+            "is not staged",
+            ['restore', '--staged'])
+
+    def discard_changes_for_files(self, file_paths):
+        """Discard the unstaged changes of several tracked files with a single git restore"""
+        return self._apply_to_paths(
+            'discard_changes_for_files', file_paths,
+            lambda x, y: x != '?' and y in ('M', 'D', 'T'),
+            "has no changes to discard",
+            ['restore'])
+
+    # Pathspecs longer than this are not passed to git status; the whole tree is queried instead
+    MAX_STATUS_PATHSPEC_CHARS = 16 * 1024
+
+    def _path_status(self, file_paths):
+        """Map each changed path (of file_paths) to its porcelain (X, Y) status"""
+        args = ['git', 'status', '--porcelain=v1', '-z', '--no-renames', '--untracked-files=all']
+        if sum(len(path) + 1 for path in file_paths) <= self.MAX_STATUS_PATHSPEC_CHARS:
+            args = ['git', '--literal-pathspecs'] + args[1:] + ['--'] + list(file_paths)
+        result = subprocess.run(args, cwd=self.repo.repo.working_tree_dir, capture_output=True)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.decode('utf-8', errors='replace').strip())
+
+        status = {}
+        for entry in result.stdout.decode('utf-8', errors='surrogateescape').split('\0'):
+            if len(entry) > 3:
+                status[entry[3:]] = (entry[0], entry[1])
+        return status
+
+    def _apply_to_paths(self, name, file_paths, applies, reason, git_args):
+        """Validate file_paths against one status query and run git_args once on those that apply
+
+        Returns per-path results: {"results": {path: {"status": "success"} or {"error": ...}}}
+        """
+        self.repo.log(f"{name} called for {len(file_paths)} files")
+
+        if not self.repo.repo:
+            error_msg = {"error": "No Git repository available"}
+            self.repo.log(f"{name} returning error: {error_msg}")
+            return error_msg
+
+        try:
+            # Preserve order, drop duplicates
+            file_paths = list(dict.fromkeys(file_paths))
+            status = self._path_status(file_paths)
+
+            results = {}
+            valid = []
+            for path in file_paths:
+                xy = status.get(path)
+                if xy is None and not os.path.lexists(os.path.join(self.repo.repo.working_tree_dir, path)):
+                    results[path] = {"error": f"File {path} does not exist"}
+                elif xy is None or not applies(*xy):
+                    results[path] = {"error": f"File {path} {reason}"}
+                else:
+                    valid.append(path)
+
+            if valid:
+                # The paths go on stdin, so any number of them is one invocation
+                result = subprocess.run(
+                    ['git', '--literal-pathspecs'] + git_args + ['--pathspec-from-file=-', '--pathspec-file-nul'],
+                    cwd=self.repo.repo.working_tree_dir, capture_output=True,
+                    input='\0'.join(valid).encode('utf-8', errors='surrogateescape'))
+                if result.returncode == 0:
+                    for path in valid:
+                        results[path] = {"status": "success"}
+                else:
+                    message = result.stderr.decode('utf-8', errors='replace').strip()
+                    for path in valid:
+                        results[path] = {"error": f"git {git_args[0]} failed: {message}"}
+
+            results = {path: results[path] for path in file_paths}
+            succeeded = sum(1 for result in results.values() if "status" in result)
+            self.repo.log(f"{name}: {succeeded} of {len(file_paths)} files succeeded")
+            return {
+                "status": "success" if succeeded == len(file_paths) else ("partial" if succeeded else "failed"),
+                "succeeded": succeeded,
+                "failed": len(file_paths) - succeeded,
+                "results": results
+            }
+
+        except Exception as e:
+            error_msg = {"error": f"Error in {name}: {e}"}
+            self.repo.log(f"{name} returning error: {error_msg}")
+            return error_msg
+
     def commit_file(self, file_path, commit_message):
         """Commit a specific file to the repository"""
         self.repo.log(f"commit_file called for {file_path} with message: {commit_message}")
@@ -1,8 +1,8 @@
 import asyncio
 import os
 import time
-import tracemalloc
 import traceback
+import uuid
 from datetime import datetime
 import concurrent.futures
 import threading
@@ -10,30 +10,70 @@ import threading
 try:
     from .base_wrapper import BaseWrapper
     from .logger import Logger
+    from .stream_delta import StreamDeltaEncoder, merge_frame_args
+    from .stream_coalescer import StreamCoalescer
+    from .command_batcher import CommandOutputBatcher
+    from .confirm_policy import ConfirmPolicy
 except ImportError:
     from base_wrapper import BaseWrapper
     from logger import Logger
+    from stream_delta import StreamDeltaEncoder, merge_frame_args
+    from stream_coalescer import StreamCoalescer
+    from command_batcher import CommandOutputBatcher
+    from confirm_policy import ConfirmPolicy
+
+def _session_merge(merge):
+    """Adapt a merge function to push args that carry the session id first"""
+    def merge_session_args(earlier_args, later_args):
+        merged = merge(earlier_args[1:], later_args[1:])
+        return None if merged is None else (earlier_args[0],) + tuple(merged)
+    return merge_session_args
 
-# Enable tracemalloc for debugging
-tracemalloc.start()
 
 class IOWrapper(BaseWrapper):
     """Wrapper for InputOutput that intercepts LLM responses for webapp display"""
     
-    def __init__(self, io_instance, port=8999):
+    def __init__(self, io_instance, port=8999, stream_max_rate=30, confirm_policy=None, session_id=None):
         self.io = io_instance
+        # None for the primary session; others push to SessionHandler instead of MessageHandler
+        self.session_id = session_id
         Logger.info(f"IOWrapper initialized with io_instance: {io_instance}")
         
         # Initialize base class
         super().__init__()
         
-        # Keep track of connection status
-        self.connection_status_check_interval = 0.5  # seconds
-        self.is_connected = True  # Start optimistic
-        self._connection_check_task = None
+        # tool_output/tool_error/tool_warning/print lines are sent in batches
+        self.command_batcher = CommandOutputBatcher(self._send_command_batch, loop=self.main_loop)
+        
+        # Set by CoderWrapper while a job runs, checked in the stream hooks
+        self.cancel_token = None
+        self.run_metrics = None
+        
+        # Server-side auto-answer rules and timeouts for confirm_ask
+        self.confirm_policy = confirm_policy or ConfirmPolicy()
+        
+        # Connection status, driven by the JRPC remote_is_up/remote_disconnected callbacks
+        self._connected = threading.Event()
+        self._known_remotes = set()
         # Define webapp URL - use port provided or default from environment variable
         self.webapp_url = os.environ.get('WS URI', f'ws://localhost:{port}')
-        self._start_connection_monitor()
+        
+        # Storage for responses
+        self.last_response = None
+        
+        # Delta encoder and rate limiter for the assistant message currently being streamed
+        self.stream_max_rate = stream_max_rate
+        self._stream_encoder = None
+        self._stream_coalescer = None
+
+        # Track if we've seen any command output for this request
+        self.has_command_output = False
+        
+        self._hook_io(io_instance)
+    
+    def _hook_io(self, io_instance):
+        """Replace the InputOutput methods the webapp needs to see with our wrappers"""
+        self.io = io_instance
         
         # Store the original method
         self.original_assistant_output = io_instance.assistant_output
@@ -45,9 +85,6 @@ class IOWrapper(BaseWrapper):
             self.original_get_assistant_mdstream = io_instance.get_assistant_mdstream
             io_instance.get_assistant_mdstream = self.get_mdstream_wrapper
         
-        # Storage for responses
-        self.last_response = None
-        
         # Set up command output interception
         # Store the original methods
         self.original_tool_output = io_instance.tool_output
@@ -64,68 +101,159 @@ class IOWrapper(BaseWrapper):
         # Set up confirmation interception
         self.original_confirm_ask = io_instance.confirm_ask
         io_instance.confirm_ask = self.confirm_ask_wrapper
-
-        # Track if we've seen any command output for this request
-        self.has_command_output = False
         
         # Override prompt input to check for connections
         self.override_prompt_input()
+    
+    def _attach_io(self, io_instance):
+        """Move the hooks to another InputOutput, e.g. one brought by a re-created coder"""
+        if io_instance is self.io:
+            return
+        self.log(f"Attaching IOWrapper to new io_instance: {io_instance}")
+        self._hook_io(io_instance)
         
-    def _start_connection_monitor(self):
-        """Start a background task to monitor connection status"""
-        def check_connection():
-            while True:
-                try:
-                    # Check connection status
-                    was_connected = self.is_connected
-                    self.is_connected = self._has_remote_connections()
-                    
-                    # If connection status changed
-                    if was_connected != self.is_connected:
-                        if self.is_connected:
-                            # Connection restored
-                            self.log("Remote connection established - enabling input")
-                            self.io.console.print("[green]Remote connection established - input enabled[/green]")
-                        else:
-                            # Connection lost
-                            self.log("No remote connections - disabling input")
-                            self.io.console.print("[red]No remote connections - input disabled[/red]")
-                            self.io.console.print(f"[yellow]In the webapp, use the server URI : [bold]{self.webapp_url}[/bold][/yellow]")
-                            self.io.console.print("[yellow]If the web app is already running, check its connection[/yellow]")
-                except Exception as e:
-                    self.log(f"Error in connection monitor: {e}")
-                
-                time.sleep(self.connection_status_check_interval)
-        
-        # Start the thread
-        thread = threading.Thread(target=check_connection, daemon=True)
-        thread.start()
+    @property
+    def is_connected(self):
+        """True while at least one remote is connected"""
+        return self._connected.is_set()
+    
+    def remote_is_up(self):
+        """JRPC callback: a remote has connected"""
+        self._set_connected(True)
+        self._replay_to_new_remotes()
+    
+    def setup_done(self):
+        """JRPC callback: a remote has finished setup and is ready to be used"""
+        self._set_connected(True)
+        self._replay_to_new_remotes()
+    
+    def remote_disconnected(self, uuid):
+        """JRPC callback: a remote has disconnected"""
+        self.log(f"Remote disconnected: {uuid}")
+        self.outbound.remove_client(uuid)
+        self._known_remotes.discard(uuid)
         
-    def _has_remote_connections(self):
-        """Check if any remotes are connected"""
+        # Other tabs may still be attached
         try:
-            remotes = self.get_remotes()
-            return bool(remotes and len(remotes) > 0)
+            remaining = [remote_uuid for remote_uuid in (self.get_remotes() or {}) if remote_uuid != uuid]
         except Exception as e:
             self.log(f"Error checking remote connections: {e}")
-            return False
+            remaining = []
+        self._set_connected(bool(remaining))
+    
+    def _replay_to_new_remotes(self):
+        """Send clients that joined mid-stream one catch-up frame of the in-flight assistant message
+
+        The replay buffer is the current stream's delta encoder, which holds
+        the one message being streamed and is replaced by the next stream.
+        """
+        try:
+            remotes = set(self.get_remotes() or {})
+        except Exception as e:
+            self.log(f"Error checking remote connections: {e}")
+            return
+        
+        new_remotes = remotes - self._known_remotes
+        self._known_remotes = remotes
+        
+        encoder, coalescer = self._stream_encoder, self._stream_coalescer
+        if not new_remotes or encoder is None or encoder.final:
+            return
+        
+        # Build and queue the frame between flushes so live appends continue from it.
+        # jrpc-oo cannot call one remote, so clients already attached get it too and resync.
+        with coalescer.lock:
+            frame = encoder.catchup_frame()
+            self.log(f"Replaying {encoder.byte_length} bytes of stream {encoder.stream_id} for {sorted(new_remotes)}")
+            self._push(
+                'MessageHandler.streamDelta', frame,
+                merge_key=('streamDelta', frame['id']),
+                merge=merge_frame_args
+            )
     
+    def _push(self, method, *args, **kwargs):
+        """Queue a MessageHandler push, or for a secondary session its SessionHandler equivalent
+
+        SessionHandler methods take the session id first; pushes are skipped
+        while no client implements them.
+        """
+        if self.session_id is None:
+            self.outbound.push(method, *args, **kwargs)
+            return
+        
+        session_method = self._session_method(method)
+        try:
+            available = session_method in self.get_call().keys()
+        except Exception:
+            available = False
+        if not available:
+            return
+        
+        merge = kwargs.get('merge')
+        if merge is not None:
+            kwargs['merge'] = _session_merge(merge)
+        if kwargs.get('merge_key') is not None:
+            kwargs['merge_key'] = (self.session_id, kwargs['merge_key'])
+        self.outbound.push(session_method, self.session_id, *args, **kwargs)
+    
+    def _session_method(self, method):
+        if self.session_id is None:
+            return method
+        return 'SessionHandler.' + method.split('.', 1)[1]
+    
+    def _set_connected(self, connected):
+        """Update the connection event and report changes on the console"""
+        was_connected = self._connected.is_set()
+        if connected:
+            self._connected.set()
+        else:
+            self._connected.clear()
+        
+        if was_connected == connected:
+            return
+        
+        if connected:
+            self.log("Remote connection established - enabling input")
+            self.io.console.print("[green]Remote connection established - input enabled[/green]")
+        else:
+            self.log("No remote connections - disabling input")
+            self.io.console.print("[red]No remote connections - input disabled[/red]")
+            self.io.console.print(f"[yellow]In the webapp, use the server URI : [bold]{self.webapp_url}[/bold][/yellow]")
+            self.io.console.print("[yellow]If the web app is already running, check its connection[/yellow]")
+        
     def confirm_ask_wrapper(self, question, default=None, subject=None, explicit_yes_required=False, group=None, allow_never=False):
-        """Intercept confirm_ask calls and send to webapp"""
-        self.log(f"confirm_ask_wrapper called with question: {question}")
+        """Intercept confirm_ask calls, answer them from the rule table or send them to the webapp"""
+        self.log("confirm_ask_wrapper called with question: %s", question)
         
         question_id = (question, subject)
         if question_id in self.io.never_prompts:
             return False
         
         try:
+            question_text = str(question) if question is not None else ''
+            subject_text = str(subject) if subject is not None else None
+            
+            # Rules are evaluated before any RPC so routine prompts never leave the process
+            rule = self.confirm_policy.match(question_text, subject_text)
+            if rule is not None and rule.answer is not None:
+                if explicit_yes_required and rule.answer is True:
+                    # Like aider's --yes, a rule never says yes where the user must
+                    self.log("Rule (group %s) cannot answer yes, explicit yes required", rule.group)
+                else:
+                    self.confirm_policy.auto_answered += 1
+                    self.log("Confirmation answered by rule (group %s): %s", rule.group, rule.answer)
+                    return self._finish_confirmation(rule.answer, question_text, question_id, allow_never, auto=True)
+            
+            timeout = self.confirm_policy.timeout_for(rule)
             confirmation_data = {
-                'question': str(question) if question is not None else '',
+                'question_id': uuid.uuid4().hex,
+                'question': question_text,
                 'default': default,
-                'subject': str(subject) if subject is not None else None,
+                'subject': subject_text,
                 'explicit_yes_required': explicit_yes_required,
                 'group': str(group) if group is not None else None,
-                'allow_never': allow_never
+                'allow_never': allow_never,
+                'timeout': timeout
             }
             
             # Use main_loop if available, otherwise fall back to original method
@@ -134,29 +262,62 @@ class IOWrapper(BaseWrapper):
                     self._async_confirmation_request(confirmation_data),
                     self.main_loop
                 )
-                response = future.result()  # No timeout - wait indefinitely
-                self.log(f"Received response from webapp: {response}")
-                if response == "d" and allow_never:
-                    self.io.never_prompts.add(question_id)
-                    hist = f"{question.strip()} {response}"
-                    self.io.append_chat_history(hist, linebreak=True, blockquote=True)
-                    return False
-
-                return response
+                try:
+                    response = future.result(timeout=timeout)
+                except concurrent.futures.TimeoutError:
+                    future.cancel()
+                    response = self.confirm_policy.fallback_answer(rule)
+                    if explicit_yes_required and response is True:
+                        response = False
+                    self.confirm_policy.timed_out += 1
+                    self.log("No confirmation from webapp within %ss, answering %s", timeout, response)
+                    # Close the dialog the webapp may still be showing
+                    self._push('MessageHandler.confirmationDismissed', {
+                        'question_id': confirmation_data['question_id'],
+                        'answer': response,
+                        'reason': 'timeout'
+                    })
+                    return self._finish_confirmation(response, question_text, question_id, allow_never, auto=True)
+                
+                self.log("Received response from webapp: %s", response)
+                return self._finish_confirmation(response, question_text, question_id, allow_never)
             else:
                 self.log("No main loop available, falling back to original method")
                 return self.original_confirm_ask(question, default, subject, explicit_yes_required, group, allow_never)
                 
         except Exception as e:
             self.log(f"Error in confirm_ask_wrapper: {e}")
+            if self.session_id is not None:
+                # Secondary sessions have no terminal to fall back to
+                return self.confirm_policy.fallback_answer(None)
             return self.original_confirm_ask(question, default, subject, explicit_yes_required, group, allow_never)
     
+    def _finish_confirmation(self, response, question, question_id, allow_never, auto=False):
+        """Record a "don't ask again" answer and turn it into False
+
+        Answers given without asking the user (auto) are written to the chat
+        history the way aider records its --yes answers.
+        """
+        if response == "d" and allow_never:
+            self.io.never_prompts.add(question_id)
+        if auto or (response == "d" and allow_never):
+            answer = {True: 'y', False: 'n'}.get(response, response)
+            hist = f"{question.strip()} {answer}"
+            self.io.append_chat_history(hist, linebreak=True, blockquote=True)
+        if response == "d":
+            return False
+        return response
+    
     async def _async_confirmation_request(self, confirmation_data):
         """Make the async RPC call to the webapp"""
         self.log('Making RPC call to webapp')
         try:
-            call_func = self.get_call()['MessageHandler.confirmation_request']
-            response = await call_func(confirmation_data)  # No timeout - wait indefinitely
+            call_func = self.get_call()[self._session_method('MessageHandler.confirmation_request')]
+            # The caller bounds the wait with the confirmation group's timeout
+            if self.session_id is None:
+                response = await call_func(confirmation_data)
+            else:
+                response = await call_func(self.session_id, confirmation_data)
             # Extract response from dict if needed
             if isinstance(response, dict) and len(response) == 1:
                 response = next(iter(response.values()))
@@ -181,7 +342,7 @@ class IOWrapper(BaseWrapper):
         # Send to webapp if connected - fire and forget
         self.log(f"Sending message to webapp")
         if self.is_connected:
-            self._safe_create_task(self.send_to_webapp(message))
+            self.send_to_webapp(message)
         else:
             self.log("No remote connections - skipping send_to_webapp")
         
@@ -194,18 +355,40 @@ class IOWrapper(BaseWrapper):
         self.log(f"get_mdstream_wrapper called")
         mdstream = self.original_get_assistant_mdstream()
         
+        # Each markdown stream is one assistant message with its own stream id
+        encoder = StreamDeltaEncoder(role='assistant')
+        self._stream_encoder = encoder
+        
+        def flush_frame(content, final):
+            frame = encoder.encode(content, final)
+            self.send_stream_update(frame)
+            if final:
+                self.log(f"Stream {encoder.stream_id} finished: {coalescer.get_stats()}")
+        
+        # Merge bursts of updates so at most stream_max_rate frames per second are sent
+        coalescer = StreamCoalescer(flush_frame, self.stream_max_rate, loop=self.main_loop)
+        self._stream_coalescer = coalescer
+        
         # Store the original update method
         original_update = mdstream.update
         
         # Replace with our wrapper
         def update_wrapper(content, final=False):
-            self.log(f"mdstream.update called with content (first 100 chars): {content[:100] if content else 'None'}, final: {final}")
+            self.log("mdstream.update called with content length: %d, final: %s", len(content) if content else 0, final)
             
-            # Send to webapp asynchronously - fire and forget
-            self._safe_create_task(self.send_stream_update(content, final))
+            # A safe point to stop a cancelled run - the final update is aider's cleanup, let it through
+            token = self.cancel_token
+            if token is not None and not final:
+                token.check()
+            
+            metrics = self.run_metrics
+            if metrics is not None:
+                metrics.mark_stream_update(len(content) if content else 0, final)
+            
+            # Coalesced, and only the appended suffix goes over the wire - fire and forget
+            coalescer.update(content, final)
             
             # Call original method with error handling for Rich LiveError
-            self.log("Calling original mdstream.update")
             try:
                 return original_update(content, final)
             except Exception as e:
@@ -226,39 +409,39 @@ class IOWrapper(BaseWrapper):
     # Command output wrapper methods
     def tool_output_wrapper(self, message='', **kwargs):
         """Intercept standard informational output"""
-        self.log(f"tool_output_wrapper called with message: {message}, kwargs: {kwargs}")
+        self.log("tool_output_wrapper called with message: %s, kwargs: %s", message, kwargs)
         
         # Mark that we've seen command output
         self.has_command_output = True
         
-        # Send to webapp - fire and forget
-        self._safe_create_task(self.send_to_webapp_command('output', message))
+        # Queue for the webapp - delivered in order
+        self.send_to_webapp_command('output', message)
         
         # Call original method with all arguments
         return self.original_tool_output(message, **kwargs)
     
     def tool_error_wrapper(self, message='', **kwargs):
         """Intercept error messages"""
-        self.log(f"tool_error_wrapper called with message: {message}, kwargs: {kwargs}")
+        self.log("tool_error_wrapper called with message: %s, kwargs: %s", message, kwargs)
         
         # Mark that we've seen command output
         self.has_command_output = True
         
-        # Send to webapp - fire and forget
-        self._safe_create_task(self.send_to_webapp_command('error', message))
+        # Queue for the webapp - delivered in order
+        self.send_to_webapp_command('error', message)
         
         # Call original method with all arguments
         return self.original_tool_error(message, **kwargs)
     
     def tool_warning_wrapper(self, message='', **kwargs):
         """Intercept warning messages"""
-        self.log(f"tool_warning_wrapper called with message: {message}, kwargs: {kwargs}")
+        self.log("tool_warning_wrapper called with message: %s, kwargs: %s", message, kwargs)
         
         # Mark that we've seen command output
         self.has_command_output = True
         
-        # Send to webapp - fire and forget
-        self._safe_create_task(self.send_to_webapp_command('warning', message))
+        # Queue for the webapp - delivered in order
+        self.send_to_webapp_command('warning', message)
         
         # Call original method with all arguments
         return self.original_tool_warning(message, **kwargs)
@@ -269,92 +452,153 @@ class IOWrapper(BaseWrapper):
         message = ' '.join(str(arg) for arg in args)
         
         # Log debug information
-        self.log(f"print_wrapper called with message: {message}, kwargs: {kwargs}")
+        self.log("print_wrapper called with message: %s, kwargs: %s", message, kwargs)
         
         # Mark that we've seen command output
         self.has_command_output = True
         
-        # Send to webapp - fire and forget
-        self._safe_create_task(self.send_to_webapp_command('print', message))
+        # Queue for the webapp - delivered in order
+        self.send_to_webapp_command('print', message)
         
         # Call original method
         return self.original_print(*args, **kwargs)
     
-    def signal_command_complete(self):
-        """Signal that command processing is complete"""
+    def signal_command_complete(self, force=False):
+        """Signal that command processing is complete
+
+        Buffered command output is flushed first so it reaches the webapp
+        before streamComplete. With force the completion is sent even if no
+        command output was seen.
+        """
         self.log("Signaling command completion to webapp")
-        if self.has_command_output:
+        self.command_batcher.flush()
+        if self.has_command_output or force:
             # Reset the flag
             self.has_command_output = False
             # Send completion signal
-            self._safe_create_task(self.get_call()['MessageHandler.streamComplete']())
+            self._push('MessageHandler.streamComplete')
     
-    async def send_to_webapp(self, message):
-        """Send completed response to webapp - OPTIMIZED VERSION"""
+    def send_to_webapp(self, message):
+        """Queue completed response for the webapp"""
         self.log(f"send_to_webapp called with message length: {len(str(message))}")
         print(f"IOWrapper: send_to_webapp called with message length: {len(str(message))}")
         
         try:
-            # Fire and forget - don't wait for response
-            self.log("About to call MessageHandler.streamWrite with role 'assistant'")
-            self._safe_create_task(self.get_call()['MessageHandler.streamWrite'](message, True, 'assistant'))
-            self.log("streamWrite call initiated with final=True and role='assistant'")
+            # Keep command output ahead of the assistant message it preceded
+            self.command_batcher.flush()
+            self.log("Queueing MessageHandler.streamWrite with role 'assistant'")
+            self._push('MessageHandler.streamWrite', message, True, 'assistant')
+            self.log("streamWrite queued with final=True and role='assistant'")
             
         except Exception as e:
             err_msg = f"Error sending to webapp: {e}"
             self.log(f"{err_msg}\n{type(e)}\n{e.__traceback__}")
             print(err_msg)
             
-            # Try to notify the webapp about the error - fire and forget
+            # Try to notify the webapp about the error
             try:
-                self._safe_create_task(self.get_call()['MessageHandler.streamError'](str(e)))
+                self._push('MessageHandler.streamError', str(e))
                 self.log("Sent error notification to webapp")
             except Exception as e2:
                 self.log(f"Failed to send error notification: {e2}")
     
-    async def send_stream_update(self, content, final):
-        """Send streaming update to webapp - OPTIMIZED VERSION"""
-        current_time = time.time()
-        self.log(f"[TIME: {current_time:.6f}] send_stream_update called with content length: {len(content) if content else 0}, final: {final}")
+    def send_stream_update(self, frame):
+        """Queue a streaming delta frame for the webapp"""
+        self.log("send_stream_update called with %s frame %d of stream %s, data length: %d, final: %s",
+                 frame['op'], frame['seq'], frame['id'], len(frame['data']), frame['final'])
         
         if not self.is_connected:
             self.log("No remote connections - skipping send_stream_update")
             return
             
         try:
-            self.log(f"[TIME: {current_time:.6f}] Calling MessageHandler.streamWrite with content, final param, and role 'assistant'")
-            # Fire and forget - don't wait for response
-            self._safe_create_task(self.get_call()['MessageHandler.streamWrite'](content, final, 'assistant'))
-            self.log("streamWrite call initiated with role='assistant'")
+            # Keep command output ahead of the assistant message it preceded
+            self.command_batcher.flush()
+            
+            # Intermediate frames may be merged or dropped by a backed-up client queue,
+            # the final frame is always delivered
+            self._push(
+                'MessageHandler.streamDelta', frame,
+                droppable=not frame['final'],
+                merge_key=('streamDelta', frame['id']),
+                merge=merge_frame_args
+            )
             
         except Exception as e:
             err_msg = f"Error sending stream update to webapp: {e}"
             self.log(f"{err_msg}\n{type(e)}")
             print(err_msg)
             
-            # Try to notify the webapp about the error - fire and forget
+            # Try to notify the webapp about the error
             try:
-                self._safe_create_task(self.get_call()['MessageHandler.streamError'](str(e)))
+                self._push('MessageHandler.streamError', str(e))
                 self.log("Sent error notification to webapp")
             except Exception as e2:
                 self.log(f"Failed to send error notification: {e2}")
                 
-    async def send_to_webapp_command(self, msg_type, message):
-        """Send command output to webapp using streamWrite with 'command' role"""
-        self.log(f"send_to_webapp_command called with type: {msg_type}, message: {message}")
+    def get_stream_stats(self):
+        """Get frame counters for the current or last assistant stream"""
+        if self._stream_coalescer is None or self._stream_encoder is None:
+            return {"status": "no_stream"}
+        
+        stats = self._stream_coalescer.get_stats()
+        stats['stream_id'] = self._stream_encoder.stream_id
+        stats['bytes_sent'] = self._stream_encoder.byte_length
+        return stats
+    
+    def get_outbound_stats(self):
+        """Get outbound queue depth, drop counters and the number of connected clients"""
+        return self.outbound.get_stats()
+
+    def get_confirm_policy(self):
+        """Get the confirmation rule table, default timeout and answer counters"""
+        return self.confirm_policy.get_stats()
+
+    def set_confirm_rules(self, rules):
+        """Replace the confirmation rule table
+
+        Each rule is a dict with optional 'question' and 'subject' regexes, a
+        'group' name, and either an 'answer' given without asking the webapp or
+        a 'timeout' in seconds and 'default' answer for when the webapp is silent.
+        """
+        try:
+            self.confirm_policy.set_rules(rules or [])
+        except ValueError as e:
+            return {"error": str(e)}
+        return self.confirm_policy.get_stats()
+
+    def set_confirm_timeout(self, seconds=None):
+        """Set how long confirmations without a rule timeout wait, None or 0 to wait forever"""
+        self.confirm_policy.default_timeout = float(seconds) if seconds else None
+        return self.confirm_policy.get_stats()
+
+    def request_stream_resync(self, stream_id=None):
+        """Called by the webapp when its copy of a stream is out of step - next frame is sent in full"""
+        self.log(f"request_stream_resync called for stream: {stream_id}")
+        encoder = self._stream_encoder
+        if encoder is None or (stream_id is not None and stream_id != encoder.stream_id):
+            return {"status": "error", "message": "No matching active stream"}
+        
+        # Push a full frame straight away - the stream may already be final
+        encoder.request_resync()
+        self._stream_coalescer.resend_last()
+        return {"status": "resync_sent", "stream_id": encoder.stream_id}
+                
+    def send_to_webapp_command(self, msg_type, message):
+        """Buffer command output for the next batch sent to the webapp"""
+        self.log("send_to_webapp_command called with type: %s, message: %s", msg_type, message)
         
         if not self.is_connected:
             self.log("No remote connections - skipping send_to_webapp_command")
             return
             
+        self.command_batcher.add(msg_type, message)
+    
+    def _send_command_batch(self, entries):
+        """Queue one batch of typed command output lines for the webapp"""
         try:
-            # Format the message with type prefix for parsing in JavaScript
-            formatted_message = f"{msg_type}:{message}"
-            
-            # Fire and forget - don't wait for response
-            # Use streamWrite with 'command' role instead of displayCommandOutput
-            self._safe_create_task(self.get_call()['MessageHandler.streamWrite'](formatted_message, False, 'command'))
-            self.log("streamWrite call initiated with role='command'")
+            self._push('MessageHandler.streamCommandBatch', entries)
+            self.log("streamCommandBatch queued with %d entries", len(entries))
         except Exception as e:
             err_msg = f"Error sending command output to webapp (if you're exiting, ctl-c again please): {e}"
             self.log(f"{err_msg}\n{type(e)}")
@@ -362,7 +606,8 @@ class IOWrapper(BaseWrapper):
     
     def override_prompt_input(self):
         """Override the prompt_session to check for connections before accepting input"""
-        if not hasattr(self.io, 'prompt_session'):
+        # aider sets prompt_session to None when fancy_input is off (session IOs)
+        if getattr(self.io, 'prompt_session', None) is None:
             self.log("No prompt_session to override")
             return
         
@@ -377,15 +622,13 @@ class IOWrapper(BaseWrapper):
                 self.io.console.print(f"[yellow]In your application use the Server URI : [bold]{self.webapp_url}[/bold][/yellow]")
                 self.io.console.print("[yellow]Waiting for connection... (Press Ctrl+C to exit)[/yellow]")
             
-                # Wait for connection to be restored, checking periodically
-                while not self.is_connected:
-                    try:
-                        # Sleep to avoid high CPU usage and repeated prints
-                        time.sleep(3)
-                    except KeyboardInterrupt:
-                        # Allow exit with Ctrl+C
-                        self.io.console.print("[yellow]Keyboard interrupt detected, exiting...[/yellow]")
-                        return "exit"
+                # Block until remote_is_up sets the event - no polling while idle
+                try:
+                    self._connected.wait()
+                except KeyboardInterrupt:
+                    # Allow exit with Ctrl+C
+                    self.io.console.print("[yellow]Keyboard interrupt detected, exiting...[/yellow]")
+                    return "exit"
             
                 # Connection restored
                 self.io.console.print("[green]Connection restored, input enabled[/green]")
@@ -0,0 +1,257 @@
+import threading
+import time
+import uuid
+from collections import deque
+
+try:
+    from .logger import Logger
+    from .cancellation import CancelToken
+except ImportError:
+    from logger import Logger
+    from cancellation import CancelToken
+
+
+class CoderJob:
+    """One message waiting for, or being run by, the coder"""
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'
+
+    def __init__(self, message, priority=0):
+        self.id = uuid.uuid4().hex[:12]
+        self.message = message
+        self.priority = priority
+        self.status = self.QUEUED
+        self.enqueued_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.finished_monotonic = None
+        self.error = None
+        self.cancel_token = CancelToken()
+        # RunMetrics, set by the runner while the job runs
+        self.metrics = None
+
+    @property
+    def cancel_latency(self):
+        """Seconds from the cancel request until the job finished, or None"""
+        requested = self.cancel_token.requested_at
+        if requested is None or self.finished_at is None:
+            return None
+        return max(0.0, self.finished_monotonic - requested)
+
+    @property
+    def wait_time(self):
+        """Seconds spent queued, so far if the job has not started"""
+        return (self.started_at or time.time()) - self.enqueued_at
+
+    @property
+    def run_time(self):
+        if self.started_at is None:
+            return None
+        return (self.finished_at or time.time()) - self.started_at
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'message': str(self.message)[:200],
+            'priority': self.priority,
+            'status': self.status,
+            'enqueued_at': self.enqueued_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'wait_time': self.wait_time,
+            'run_time': self.run_time,
+            'cancel_latency': self.cancel_latency,
+            'error': self.error
+        }
+
+
+class CoderJobQueue:
+    """Runs coder jobs one at a time on a single worker thread
+
+    Jobs are ordered by priority (higher first) and then by submission
+    order; queued jobs can be moved or cancelled. run_job(job) is called on
+    the worker thread for each job and on_job_done(job) after it, whatever
+    the outcome. A queued job that is cancelled never runs; on_job_done is
+    called for it on the cancelling thread. Neither callback runs under the
+    queue's lock.
+    """
+
+    HISTORY_SIZE = 50
+
+    def __init__(self, run_job, on_job_done=None, name="CoderRunThread"):
+        self.run_job = run_job
+        self.on_job_done = on_job_done
+        self.name = name
+        self._cond = threading.Condition()
+        self._queued = []
+        self._history = deque(maxlen=self.HISTORY_SIZE)
+        self._recent_waits = deque(maxlen=self.HISTORY_SIZE)
+        self._cancel_latencies = deque(maxlen=self.HISTORY_SIZE)
+        self.current_job = None
+        self.completed = 0
+        self._closed = False
+        self.worker = threading.Thread(target=self._work, name=name, daemon=True)
+        self.worker.start()
+
+    def submit(self, message, priority=0):
+        """Queue a message for the coder, returning the job"""
+        job = CoderJob(message, priority)
+        with self._cond:
+            self._insert_locked(job)
+            # The worker and any wait_idle() callers share the condition
+            self._cond.notify_all()
+        Logger.info("Queued job %s (priority %s, %d waiting)", job.id, priority, len(self._queued),
+                    name='CoderJobQueue')
+        return job
+
+    def _insert_locked(self, job, position=None):
+        if position is None:
+            # After every job of the same or higher priority
+            position = next((i for i, queued in enumerate(self._queued) if queued.priority < job.priority),
+                            len(self._queued))
+        self._queued.insert(max(0, min(position, len(self._queued))), job)
+
+    def position(self, job_id):
+        """Index of a queued job, 0 being next to run, or None"""
+        with self._cond:
+            for i, job in enumerate(self._queued):
+                if job.id == job_id:
+                    return i
+        return None
+
+    def list_jobs(self):
+        """Get the running job, the queued jobs in run order and recently finished jobs"""
+        with self._cond:
+            return {
+                'running': self.current_job.to_dict() if self.current_job else None,
+                'queued': [job.to_dict() for job in self._queued],
+                'finished': [job.to_dict() for job in reversed(self._history)]
+            }
+
+    def reorder(self, job_id, position=None, priority=None):
+        """Move a queued job to position and/or give it a new priority
+
+        Without a position the job is placed by its (new) priority.
+        """
+        with self._cond:
+            job = next((queued for queued in self._queued if queued.id == job_id), None)
+            if job is None:
+                return None
+            self._queued.remove(job)
+            if priority is not None:
+                job.priority = priority
+            self._insert_locked(job, position)
+            return job
+
+    def cancel(self, job_id):
+        """Remove a queued job; returns the job, or None if it is not queued"""
+        with self._cond:
+            job = next((queued for queued in self._queued if queued.id == job_id), None)
+            if job is None:
+                return None
+            self._queued.remove(job)
+            job.status = CoderJob.CANCELLED
+            job.cancel_token.cancel()
+            job.finished_at = time.time()
+            job.finished_monotonic = time.monotonic()
+            self._history.append(job)
+            self._cond.notify_all()
+        Logger.info("Cancelled queued job %s", job_id, name='CoderJobQueue')
+        if self.on_job_done is not None:
+            self.on_job_done(job)
+        return job
+
+    def is_busy(self):
+        """True while a job is running or waiting to run"""
+        with self._cond:
+            return self.current_job is not None or bool(self._queued)
+
+    def wait_idle(self, timeout=None):
+        """Block until no job is running or queued; False if timeout passes first"""
+        with self._cond:
+            return self._cond.wait_for(lambda: self.current_job is None and not self._queued, timeout)
+
+    def get_metrics(self):
+        """Queue depth and wait times"""
+        with self._cond:
+            depth = len(self._queued)
+            oldest_wait = max((job.wait_time for job in self._queued), default=0.0)
+            waits = list(self._recent_waits)
+            running = self.current_job.to_dict() if self.current_job else None
+            latencies = list(self._cancel_latencies)
+        return {
+            'depth': depth,
+            'oldest_wait': oldest_wait,
+            'avg_wait': sum(waits) / len(waits) if waits else 0.0,
+            'max_wait': max(waits, default=0.0),
+            'completed': self.completed,
+            'last_cancel_latency': latencies[-1] if latencies else None,
+            'avg_cancel_latency': sum(latencies) / len(latencies) if latencies else None,
+            'running': running
+        }
+
+    def close(self):
+        """Cancel every queued job and let the worker exit once the running job ends"""
+        with self._cond:
+            queued_ids = [job.id for job in self._queued]
+        for job_id in queued_ids:
+            self.cancel(job_id)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def _next_job(self):
+        with self._cond:
+            while not self._queued and not self._closed:
+                self._cond.wait()
+            if self._closed:
+                return None
+            job = self._queued.pop(0)
+            job.status = CoderJob.RUNNING
+            job.started_at = time.time()
+            self._recent_waits.append(job.wait_time)
+            self.current_job = job
+            return job
+
+    def _work(self):
+        while True:
+            job = None
+            try:
+                job = self._next_job()
+                if job is None:
+                    return
+                try:
+                    self.run_job(job)
+                    # aider handles an interrupt itself and returns normally
+                    job.status = CoderJob.CANCELLED if job.cancel_token.cancelled else CoderJob.DONE
+                except BaseException as e:
+                    # KeyboardInterrupt from stop() ends the job, never the worker
+                    if isinstance(e, KeyboardInterrupt):
+                        job.status = CoderJob.CANCELLED
+                    else:
+                        job.status = CoderJob.FAILED
+                        job.error = str(e) or e.__class__.__name__
+                finally:
+                    job.finished_at = time.time()
+                    job.finished_monotonic = time.monotonic()
+                    with self._cond:
+                        self.current_job = None
+                        self.completed += 1
+                        self._cond.notify_all()
+                        self._history.append(job)
+                        if job.cancel_latency is not None:
+                            self._cancel_latencies.append(job.cancel_latency)
+                    Logger.info("Job %s %s after %.2fs (waited %.2fs)", job.id, job.status, job.run_time,
+                                job.wait_time, name='CoderJobQueue')
+                    if job.cancel_latency is not None:
+                        Logger.info("Job %s idle %.3fs after cancel was requested", job.id, job.cancel_latency,
+                                    name='CoderJobQueue')
+                    if self.on_job_done is not None:
+                        self.on_job_done(job)
+            except BaseException as e:
+                # An interrupt that arrived between jobs
+                Logger.warning("Worker interrupted outside a job: %r", e, name='CoderJobQueue')
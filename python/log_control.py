@@ -0,0 +1,28 @@
+try:
+    from .base_wrapper import BaseWrapper
+    from .logger import Logger
+except ImportError:
+    from base_wrapper import BaseWrapper
+    from logger import Logger
+
+
+class LogControl(BaseWrapper):
+    """RPC access to log levels and log disk usage at runtime"""
+    
+    def get_log_levels(self):
+        """Get the level of every logger, with the default for new loggers under '*'"""
+        return Logger.get_levels()
+    
+    def set_log_level(self, level, name=None):
+        """Set the level of one logger by name, or of all loggers when name is omitted"""
+        self.log(f"set_log_level called with level: {level}, name: {name}")
+        try:
+            return Logger.set_level(level, name)
+        except ValueError as e:
+            error_msg = {"error": str(e)}
+            self.log(f"set_log_level returning error: {error_msg}")
+            return error_msg
+    
+    def get_log_disk_usage(self):
+        """Get log file sizes, the total and the disk budget"""
+        return Logger.get_disk_usage()
@@ -1,159 +1,407 @@
+import atexit
+import glob
+import gzip
 import logging
+import logging.handlers
 import os
-from datetime import datetime
-import inspect
-import traceback
+import queue
+import shutil
+import sys
+import threading
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread"""
+
+    def prepare(self, record):
+        # The queue never leaves the process, so the record can travel as-is
+        # and msg % args is only evaluated when the listener writes it
+        return record
+
+
+class _FileRouter(logging.Handler):
+    """Writes each record to the file handler registered for its logger name
+
+    A budget check record runs Logger._enforce_disk_budget instead, so the
+    check happens on the listener thread between writes.
+    """
+
+    def __init__(self):
+        super().__init__(logging.DEBUG)
+        self.routes = {}
+
+    def add_route(self, name, handler):
+        self.routes[name] = handler
+
+    def emit(self, record):
+        if getattr(record, 'budget_check', False):
+            Logger._enforce_disk_budget()
+            return
+        handler = self.routes.get(record.name)
+        if handler is not None and record.levelno >= handler.level:
+            handler.handle(record)
+
+
+def _gzip_namer(name):
+    return name + '.gz'
+
+
+def _gzip_rotator(source, dest):
+    """Compress the file being rotated out, then keep the log directory within budget"""
+    with open(source, 'rb') as f_in, gzip.open(dest, 'wb') as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+    # Rotation runs on the listener thread
+    Logger._enforce_disk_budget()
+
 
 class Logger:
-    """Centralized logger for the application."""
-    
+    """Centralized logger for the application.
+
+    Log calls only build a LogRecord and put it on an in-memory queue; a
+    single QueueListener thread formats records and writes the per-logger
+    files, so callers never block on disk. Messages may use %-style args,
+    which are only formatted if the record is written.
+
+    Files rotate at MAX_BYTES into gzip-compressed backups. The budget is
+    checked on every rotation, whenever a logger is created and when it is
+    reconfigured, always on the listener thread so no file is truncated
+    while it is being written: the oldest backups of all loggers are deleted once
+    together with the live files they exceed DISK_BUDGET, and if that is not
+    enough the largest live files are truncated. Levels can be changed per
+    logger at runtime with set_level.
+    """
+
     _loggers = {}  # Cache of logger instances
+    _module_names = {}  # Cache of code object -> module logger name
+    _lock = threading.Lock()
+    _queue = None
+    _queue_handler = None
+    _router = None
+    _listener = None
     DEFAULT_LOG_DIR = '/tmp'
     DEFAULT_LOGGER_NAME = 'app'
-    
+    DEFAULT_LEVEL = logging.DEBUG
+    MAX_BYTES = 10 * 1024 * 1024
+    BACKUP_COUNT = 5
+    DISK_BUDGET = 200 * 1024 * 1024
+
     @classmethod
-    def configure(cls, log_dir=None, default_name=None):
+    def configure(cls, log_dir=None, default_name=None, level=None, max_bytes=None,
+                  backup_count=None, disk_budget=None):
         """Configure global logger settings
-        
+
         Args:
             log_dir (str): Directory to store log files
             default_name (str): Default logger name when none specified
+            level (str): Level for all loggers, e.g. 'WARNING'
+            max_bytes (int): Size at which a log file is rotated
+            backup_count (int): Compressed backups kept per log file
+            disk_budget (int): Total bytes allowed for all log files and backups
         """
         if log_dir:
             cls.DEFAULT_LOG_DIR = log_dir
-            
+
         if default_name:
             cls.DEFAULT_LOGGER_NAME = default_name
-    
+
+        if max_bytes is not None:
+            cls.MAX_BYTES = max_bytes
+
+        if backup_count is not None:
+            cls.BACKUP_COUNT = backup_count
+
+        if disk_budget is not None:
+            cls.DISK_BUDGET = disk_budget
+            cls._request_budget_check()
+
+        if level is not None:
+            cls.set_level(level)
+
+    @classmethod
+    def _ensure_listener(cls):
+        """Start the background listener that writes queued records (call with _lock held)"""
+        if cls._listener is not None:
+            return
+
+        cls._queue = queue.SimpleQueue()
+        cls._queue_handler = _DeferredQueueHandler(cls._queue)
+        cls._router = _FileRouter()
+
+        # Console handler with a higher log level
+        console_handler = logging.StreamHandler()
+        console_handler.setLevel(logging.WARNING)  # Only warnings and errors to console
+        console_handler.setFormatter(cls._formatter())
+
+        cls._listener = logging.handlers.QueueListener(
+            cls._queue, cls._router, console_handler, respect_handler_level=True
+        )
+        cls._listener.start()
+        atexit.register(cls.shutdown)
+
+    @classmethod
+    def shutdown(cls):
+        """Write out everything still queued and stop the listener thread"""
+        with cls._lock:
+            listener = cls._listener
+            cls._listener = None
+        if listener is not None:
+            listener.stop()
+
+    @staticmethod
+    def _formatter():
+        return logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    @classmethod
+    def _caller_name(cls, depth):
+        """Name a logger after the calling class, or failing that its module
+
+        Uses sys._getframe rather than inspect.stack() so no source lines or
+        frame info objects are built; module names are cached per code object.
+        """
+        try:
+            frame = sys._getframe(depth)
+        except ValueError:
+            return None
+
+        while frame is not None:
+            # Skip frames inside this module
+            if frame.f_globals is globals():
+                frame = frame.f_back
+                continue
+
+            code = frame.f_code
+            if code.co_argcount and code.co_varnames[0] == 'self':
+                local_self = frame.f_locals.get('self')
+                if local_self is not None:
+                    return local_self.__class__.__name__
+
+            name = cls._module_names.get(code)
+            if name is None:
+                module_name = frame.f_globals.get('__name__')
+                if module_name and module_name != '__main__':
+                    name = module_name.split('.')[-1]  # Take the last part of the module name
+                    cls._module_names[code] = name
+            if name:
+                return name
+
+            frame = frame.f_back
+        return None
+
     @classmethod
     def get_logger(cls, name=None, log_file=None):
         """Get a logger instance by name.
-        
+
         Args:
             name (str): Logger name, defaults to the calling class name
             log_file (str): Path to log file, defaults to /tmp/{name}.log
-            
+
         Returns:
             Logger: A configured logger instance
         """
         # If name is not provided, try to determine it from the calling class
         if name is None:
-            # Walk up the stack to find a reasonable logger name
-            stack = inspect.stack()
-            
-            # Start from 2 to skip this function and its caller
-            for frame_info in stack[2:]:
-                # Try to get self argument from locals
-                local_self = frame_info.frame.f_locals.get('self')
-                if local_self is not None:
-                    name = local_self.__class__.__name__
-                    break
-                
-                # Try the module name
-                module_name = frame_info.frame.f_globals.get('__name__')
-                if module_name and module_name != '__main__':
-                    name = module_name.split('.')[-1]  # Take the last part of the module name
-                    break
-            
-            # If we still don't have a name, use the default
-            if name is None:
-                name = cls.DEFAULT_LOGGER_NAME
-        
+            name = cls._caller_name(2) or cls.DEFAULT_LOGGER_NAME
+
         # Check if we already have a logger for this name
-        if name in cls._loggers:
-            return cls._loggers[name]
-        
-        # Create a new logger
-        logger = logging.getLogger(name)
-        logger.setLevel(logging.DEBUG)
-        
-        # Determine log file if not provided
-        if log_file is None:
-            log_file = os.path.join(cls.DEFAULT_LOG_DIR, f"{name.lower()}.log")
-        
-        # Create file handler
-        file_handler = logging.FileHandler(log_file)
-        file_handler.setLevel(logging.DEBUG)
-        
-        # Create console handler with a higher log level
-        console_handler = logging.StreamHandler()
-        console_handler.setLevel(logging.WARNING)  # Only warnings and errors to console
-        
-        # Create formatter and add it to the handlers
-        formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-        )
-        file_handler.setFormatter(formatter)
-        console_handler.setFormatter(formatter)
-        
-        # Add the handlers to the logger
-        logger.addHandler(file_handler)
-        logger.addHandler(console_handler)
-        
-        # Store in cache
-        cls._loggers[name] = logger
-        
+        logger = cls._loggers.get(name)
+        if logger is not None:
+            return logger
+
+        with cls._lock:
+            if name in cls._loggers:
+                return cls._loggers[name]
+
+            cls._ensure_listener()
+
+            # Create a new logger
+            logger = logging.getLogger(name)
+            logger.setLevel(cls.DEFAULT_LEVEL)
+            # Records go only to this logger's file, never on to the root logger's handlers
+            logger.propagate = False
+
+            # Determine log file if not provided
+            if log_file is None:
+                log_file = os.path.join(cls.DEFAULT_LOG_DIR, f"{name.lower()}.log")
+
+            # The file handler is only ever used from the listener thread
+            file_handler = logging.handlers.RotatingFileHandler(
+                log_file, maxBytes=cls.MAX_BYTES, backupCount=cls.BACKUP_COUNT, delay=True
+            )
+            file_handler.namer = _gzip_namer
+            file_handler.rotator = _gzip_rotator
+            file_handler.setLevel(logging.DEBUG)
+            file_handler.setFormatter(cls._formatter())
+            cls._router.add_route(name, file_handler)
+
+            # The logger itself only enqueues
+            logger.addHandler(cls._queue_handler)
+
+            # Store in cache
+            cls._loggers[name] = logger
+
+        # Files left by earlier runs count against the budget too
+        cls._request_budget_check()
         return logger
-    
+
     @classmethod
-    def log(cls, message, level='info', name=None, log_file=None):
+    def log(cls, message, level='info', name=None, log_file=None, args=()):
         """Log a message with the specified level.
-        
+
         Args:
-            message (str): The message to log
+            message (str): The message to log, optionally with %-style placeholders
             level (str): Log level (debug, info, warning, error, critical)
             name (str): Logger name (optional)
             log_file (str): Path to log file (optional)
+            args (tuple): Values for the placeholders in message, formatted lazily
         """
+        if name is None:
+            name = cls._caller_name(2) or cls.DEFAULT_LOGGER_NAME
         logger = cls.get_logger(name, log_file)
-        
-        level = level.lower()
-        if level == 'debug':
-            logger.debug(message)
-        elif level == 'info':
-            logger.info(message)
-        elif level == 'warning':
-            logger.warning(message)
-        elif level == 'error':
-            logger.error(message)
-        elif level == 'critical':
-            logger.critical(message)
+
+        levelno = logging.getLevelName(level.upper())
+        if not isinstance(levelno, int):
+            levelno = logging.INFO  # Default to info level
+
+        if logger.isEnabledFor(levelno):
+            # Build the record directly - logging's findCaller would walk the stack again
+            record = logger.makeRecord(name, levelno, '(unknown file)', 0, message, args, None)
+            logger.handle(record)
+
+    @classmethod
+    def debug(cls, message, *args, name=None, log_file=None):
+        cls.log(message, 'debug', name or cls._caller_name(2), log_file, args)
+
+    @classmethod
+    def info(cls, message, *args, name=None, log_file=None):
+        cls.log(message, 'info', name or cls._caller_name(2), log_file, args)
+
+    @classmethod
+    def warning(cls, message, *args, name=None, log_file=None):
+        cls.log(message, 'warning', name or cls._caller_name(2), log_file, args)
+
+    @classmethod
+    def error(cls, message, *args, name=None, log_file=None):
+        cls.log(message, 'error', name or cls._caller_name(2), log_file, args)
+
+    @classmethod
+    def critical(cls, message, *args, name=None, log_file=None):
+        cls.log(message, 'critical', name or cls._caller_name(2), log_file, args)
+
+    @staticmethod
+    def _level_number(level):
+        if isinstance(level, int):
+            return level
+        levelno = logging.getLevelName(str(level).upper())
+        if not isinstance(levelno, int):
+            raise ValueError(f"Unknown log level: {level}")
+        return levelno
+
+    @classmethod
+    def set_level(cls, level, name=None):
+        """Set the level of one logger, or of all loggers and the default when name is None
+
+        Args:
+            level (str|int): Level name (debug, info, warning, error, critical) or number
+            name (str): Logger name (optional)
+
+        Returns:
+            dict: The levels now in effect, by logger name
+        """
+        levelno = cls._level_number(level)
+        if name is None:
+            cls.DEFAULT_LEVEL = levelno
+            for logger in list(cls._loggers.values()):
+                logger.setLevel(levelno)
         else:
-            logger.info(message)  # Default to info level
-            
+            cls.get_logger(name).setLevel(levelno)
+        return cls.get_levels()
+
     @classmethod
-    def debug(cls, message, name=None, log_file=None):
-        cls.log(message, 'debug', name, log_file)
-        
+    def get_levels(cls):
+        """Get the level of every logger by name, with the default under '*'"""
+        levels = {name: logging.getLevelName(logger.level) for name, logger in list(cls._loggers.items())}
+        levels['*'] = logging.getLevelName(cls.DEFAULT_LEVEL)
+        return levels
+
     @classmethod
-    def info(cls, message, name=None, log_file=None):
-        cls.log(message, 'info', name, log_file)
-        
+    def _log_files(cls):
+        """List (path, size, mtime, is_backup) for every file owned by a logger"""
+        files = []
+        router = cls._router
+        if router is None:
+            return files
+        for handler in list(router.routes.values()):
+            base = handler.baseFilename
+            for path in [base] + glob.glob(glob.escape(base) + '.*.gz'):
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((path, stat.st_size, stat.st_mtime, path != base))
+        return files
+
     @classmethod
-    def warning(cls, message, name=None, log_file=None):
-        cls.log(message, 'warning', name, log_file)
-        
+    def get_disk_usage(cls):
+        """Get the log files with their sizes and the total against the disk budget"""
+        files = cls._log_files()
+        return {
+            'files': [{'path': path, 'size': size, 'backup': backup} for path, size, _, backup in files],
+            'total_bytes': sum(size for _, size, _, _ in files),
+            'disk_budget': cls.DISK_BUDGET,
+            'max_bytes': cls.MAX_BYTES,
+            'backup_count': cls.BACKUP_COUNT
+        }
+
     @classmethod
-    def error(cls, message, name=None, log_file=None):
-        cls.log(message, 'error', name, log_file)
-        
+    def _request_budget_check(cls):
+        """Queue a disk budget check for the listener thread"""
+        queue_handler = cls._queue_handler
+        if queue_handler is None:
+            # No listener yet, so no log files to check
+            return
+        record = logging.makeLogRecord({'name': cls.__name__, 'levelno': logging.DEBUG,
+                                        'levelname': 'DEBUG', 'budget_check': True})
+        queue_handler.enqueue(record)
+
     @classmethod
-    def critical(cls, message, name=None, log_file=None):
-        cls.log(message, 'critical', name, log_file)
-    
+    def _enforce_disk_budget(cls):
+        """Bring all log files within DISK_BUDGET: delete the oldest backups, then truncate the largest live files
+
+        Only called on the listener thread, which does all the writing.
+        Live files are opened for appending, so truncating one under its
+        handler is safe: the next record is written at the new end.
+        """
+        files = cls._log_files()
+        total = sum(size for _, size, _, _ in files)
+        backups = sorted((f for f in files if f[3]), key=lambda f: f[2])
+        live = sorted((f for f in files if not f[3]), key=lambda f: f[1], reverse=True)
+        for path, size, _, backup in backups + live:
+            if total <= cls.DISK_BUDGET:
+                break
+            try:
+                if backup:
+                    os.remove(path)
+                else:
+                    os.truncate(path, 0)
+                total -= size
+            except OSError:
+                pass
+        return total
+
     @classmethod
     def register_class(cls, class_instance, log_file=None):
         """Register a class to use a specific logger
-        
+
         Args:
             class_instance: The class instance to register
             log_file: Optional specific log file path
         """
         class_name = class_instance.__class__.__name__
-        
+
         if log_file is None:
             log_file = os.path.join(cls.DEFAULT_LOG_DIR, f"{class_name.lower()}.log")
-            
+
         # Create and cache logger for this class
         cls.get_logger(class_name, log_file)
         return True
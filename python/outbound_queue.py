@@ -0,0 +1,194 @@
+import asyncio
+import collections
+import time
+
+try:
+    from .logger import Logger
+except ImportError:
+    from logger import Logger
+
+
+class OutboundMessage:
+    """One RPC push waiting in an outbound queue"""
+
+    __slots__ = ('method', 'args', 'droppable', 'merge_key', 'merge', 'enqueued_at')
+
+    def __init__(self, method, args, droppable=False, merge_key=None, merge=None):
+        self.method = method
+        self.args = args
+        self.droppable = droppable
+        self.merge_key = merge_key
+        self.merge = merge
+        self.enqueued_at = time.monotonic()
+
+
+class OutboundQueue:
+    """Bounded queue of RPC pushes, drained by a single writer task
+
+    Messages are sent one at a time and each send waits for the clients'
+    replies, so a slow or backgrounded client backs up the queue instead of
+    the event loop. A message that can be merged into the last queued message
+    with the same merge_key is folded into it. When the queue is full,
+    droppable messages (intermediate stream frames) are evicted oldest first;
+    non-droppable messages are always delivered, in order.
+    All methods except the writer run on the event loop thread.
+    """
+
+    def __init__(self, name, call_resolver, maxsize=256, send_timeout=30.0):
+        self.name = name
+        self.call_resolver = call_resolver
+        self.maxsize = maxsize
+        self.send_timeout = send_timeout
+        self._items = collections.deque()
+        self._wakeup = asyncio.Event()
+        self._writer = None
+        self.sent = 0
+        self.dropped = 0
+        self.merged = 0
+        self.errors = 0
+        self.high_water = 0
+
+    def put(self, message):
+        """Queue a message, merging or evicting intermediate frames to stay within maxsize"""
+        tail = self._items[-1] if self._items else None
+        if (tail is not None and message.merge is not None and
+                tail.merge_key is not None and tail.merge_key == message.merge_key):
+            merged_args = message.merge(tail.args, message.args)
+            if merged_args is not None:
+                tail.args = merged_args
+                tail.droppable = tail.droppable and message.droppable
+                self.merged += 1
+                return
+
+        if len(self._items) >= self.maxsize:
+            victim = next((item for item in self._items if item.droppable), None)
+            if victim is not None:
+                self._items.remove(victim)
+                self.dropped += 1
+            elif message.droppable:
+                self.dropped += 1
+                return
+
+        self._items.append(message)
+        self.high_water = max(self.high_water, len(self._items))
+        self._wakeup.set()
+        self._ensure_writer()
+
+    def _ensure_writer(self):
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.ensure_future(self._drain())
+
+    async def _drain(self):
+        while True:
+            if not self._items:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            message = self._items.popleft()
+            try:
+                call = self.call_resolver()
+                if call is None:
+                    raise RuntimeError(f"No call table for {self.name}")
+                await asyncio.wait_for(call[message.method](*message.args), timeout=self.send_timeout)
+                self.sent += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errors += 1
+                Logger.warning(f"Outbound {message.method} to {self.name} failed: {e}", name='OutboundQueue')
+
+    def close(self):
+        """Stop the writer and discard anything still queued"""
+        if self._writer is not None:
+            self._writer.cancel()
+            self._writer = None
+        self._items.clear()
+
+    def get_stats(self):
+        """Get depth and delivery counters"""
+        oldest = self._items[0].enqueued_at if self._items else None
+        return {
+            'depth': len(self._items),
+            'maxsize': self.maxsize,
+            'high_water': self.high_water,
+            'sent': self.sent,
+            'dropped': self.dropped,
+            'merged': self.merged,
+            'errors': self.errors,
+            'oldest_wait': time.monotonic() - oldest if oldest is not None else 0.0
+        }
+
+
+def merge_latest(earlier_args, later_args):
+    """Merge for idempotent notifications such as refresh requests: the later push replaces the earlier"""
+    return later_args
+
+
+class OutboundHub:
+    """Queues RPC pushes to the webapp clients behind one bounded writer
+
+    jrpc-oo's only call API is get_call(), whose methods call every connected
+    remote; it has no way to call a single remote by uuid. It also encodes the
+    JSON-RPC request separately inside each remote's connection and gives no
+    hook to write pre-encoded bytes to a socket, so serialize-once fan-out is
+    not possible from this side. The hub therefore builds each push once and
+    keeps a single queue whose writer sends it through get_call() to all
+    clients. A slow client can hold that writer up for at most send_timeout
+    per push; meanwhile intermediate frames are merged or dropped so the
+    queue stays within maxsize.
+    """
+
+    def __init__(self, wrapper, maxsize=256):
+        self.wrapper = wrapper
+        self.maxsize = maxsize
+        self.queue = None
+
+    def push(self, method, *args, droppable=False, merge_key=None, merge=None):
+        """Queue an RPC push to every client - safe to call from any thread"""
+        message = OutboundMessage(method, args, droppable, merge_key, merge)
+        loop = self.wrapper.main_loop
+        if loop is None or loop.is_closed():
+            # No loop to own the queue - send directly as before
+            self.wrapper._safe_create_task(self.wrapper.get_call()[method](*args))
+            return
+
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+
+        if running is loop:
+            self._dispatch(message)
+        else:
+            loop.call_soon_threadsafe(self._dispatch, message)
+
+    def _dispatch(self, message):
+        self._get_queue().put(message)
+
+    def _get_queue(self):
+        # Created on the loop thread, which owns the queue
+        if self.queue is None:
+            self.queue = OutboundQueue('remotes', self.wrapper.get_call, self.maxsize)
+        return self.queue
+
+    def _remote_ids(self):
+        try:
+            return list(self.wrapper.get_remotes() or {})
+        except Exception:
+            return []
+
+    def remove_client(self, client_id):
+        """Discard what is still queued once the last client has disconnected"""
+        if self.queue is None or any(remote_id != client_id for remote_id in self._remote_ids()):
+            return
+        loop = self.wrapper.main_loop
+        if loop is None or loop.is_closed():
+            return
+        loop.call_soon_threadsafe(self.queue.close)
+
+    def get_stats(self):
+        """Get queue depth and delivery counters, and the number of connected clients"""
+        stats = self._get_queue().get_stats()
+        stats['clients'] = len(self._remote_ids())
+        return stats
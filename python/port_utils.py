@@ -3,6 +3,7 @@
 port_utils.py - Shared utilities for port management
 """
 import socket
+import time
 
 def is_port_in_use(port):
     """Check if a port is already in use"""
@@ -23,3 +24,34 @@ def find_available_port(start_port=8999, max_attempts=1000):
             except OSError:
                 continue
     raise RuntimeError(f"Could not find an available port in range {start_port}-{start_port + max_attempts}")
+
+def wait_for_port(port, host='localhost', timeout=30.0, is_alive=None, initial_delay=0.05, max_delay=0.25):
+    """Wait until something accepts TCP connections on port, retrying with backoff
+
+    Args:
+        port: Port to connect to
+        host: Host to connect to
+        timeout: Seconds to keep trying
+        is_alive: Optional callable, the wait is abandoned once it returns False
+        initial_delay: First delay between attempts, doubled after each failure
+        max_delay: Longest delay between attempts
+
+    Returns:
+        bool: True once a connection succeeded, False on timeout or if is_alive failed
+    """
+    deadline = time.monotonic() + timeout
+    delay = initial_delay
+    while True:
+        try:
+            with socket.create_connection((host, port), timeout=max(0.1, min(1.0, deadline - time.monotonic()))):
+                return True
+        except OSError:
+            pass
+        
+        if is_alive is not None and not is_alive():
+            return False
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 2, max_delay)
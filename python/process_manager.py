@@ -10,6 +10,9 @@ import threading
 class ProcessManager:
     """Manages external processes with common patterns for startup, monitoring, and cleanup"""
     
+    # Seconds a process without a port is watched for an immediate exit
+    EARLY_EXIT_CHECK = 0.5
+    
     def __init__(self, name, command, args=None, cwd=None, env_vars=None):
         self.name = name
         self.command = command
@@ -19,13 +22,13 @@ class ProcessManager:
         self.process = None
         self.logging_threads = []
     
-    def start(self, startup_delay=3, check_port=None):
+    def start(self, startup_timeout=30, check_port=None):
         """
-        Start the process with optional port checking
+        Start the process and wait until it is ready
         
         Args:
-            startup_delay: Time to wait after starting before checking status
-            check_port: Port to check if process is listening (optional)
+            startup_timeout: Longest time to wait for the process to become ready
+            check_port: Port the process is ready on once it accepts connections (optional)
         
         Returns:
             bool: True if process started successfully, False otherwise
@@ -56,24 +59,20 @@ class ProcessManager:
             # Set up logging threads
             self._setup_logging()
             
-            # Give the process time to start
-            if startup_delay > 0:
-                print(f"{self.name}: Waiting {startup_delay} seconds for process to start...")
-                time.sleep(startup_delay)
+            # Ready as soon as the port accepts connections
+            if check_port:
+                return self._wait_for_port(check_port, startup_timeout)
             
-            # Check if process is still running
-            if self.process.poll() is None:
+            # Without a port, only check that it did not exit straight away
+            try:
+                self.process.wait(timeout=self.EARLY_EXIT_CHECK)
+            except subprocess.TimeoutExpired:
                 print(f"{self.name}: Process started successfully")
-                
-                # Optional port check
-                if check_port:
-                    return self._check_port_listening(check_port)
-                
                 return True
-            else:
-                print(f"{self.name}: Process failed to start or exited prematurely")
-                self._cleanup_logging_threads()
-                return False
+            
+            print(f"{self.name}: Process failed to start or exited prematurely")
+            self._cleanup_logging_threads()
+            return False
                 
         except FileNotFoundError:
             print(f"{self.name}: Error: {self.command} not found. Please install the required software.")
@@ -82,27 +81,25 @@ class ProcessManager:
             print(f"{self.name}: Error starting process: {e}")
             return False
     
-    def _check_port_listening(self, port):
-        """Check if the process is listening on the specified port"""
+    def _wait_for_port(self, port, timeout):
+        """Wait for the process to accept connections on the specified port"""
         try:
-            from .port_utils import is_port_in_use
+            from .port_utils import wait_for_port
         except ImportError:
-            from port_utils import is_port_in_use
+            from port_utils import wait_for_port
         
-        print(f"{self.name}: Testing if port {port} is listening...")
-        if is_port_in_use(port):
-            print(f"{self.name}: Confirmed - process is listening on port {port}")
+        print(f"{self.name}: Waiting up to {timeout}s for port {port} to accept connections...")
+        start = time.monotonic()
+        if wait_for_port(port, timeout=timeout, is_alive=self.is_running):
+            print(f"{self.name}: Listening on port {port} after {time.monotonic() - start:.2f}s")
             return True
+        
+        if not self.is_running():
+            print(f"{self.name}: Process failed to start or exited prematurely")
+            self._cleanup_logging_threads()
         else:
-            print(f"{self.name}: Warning - process is running but port {port} is not listening yet")
-            # Give it a bit more time
-            time.sleep(2)
-            if is_port_in_use(port):
-                print(f"{self.name}: Process is now listening on port {port}")
-                return True
-            else:
-                print(f"{self.name}: Process failed to bind to port {port}")
-                return False
+            print(f"{self.name}: Process failed to bind to port {port} within {timeout}s")
+        return False
     
     def _setup_logging(self):
         """Set up logging threads for stdout and stderr"""
@@ -188,7 +185,7 @@ class NPMProcessManager(ProcessManager):
             self.env_vars['PORT'] = str(port)
             self.env_vars['LSP_PORT'] = str(port)
     
-    def start_with_port_check(self, port, startup_delay=3):
+    def start_with_port_check(self, port, startup_timeout=30):
         """Start npm process and check if it's listening on the specified port"""
         try:
             from .port_utils import is_port_in_use
@@ -199,7 +196,7 @@ class NPMProcessManager(ProcessManager):
             print(f"{self.name}: Port {port} is already in use - assuming server is running")
             return True
         
-        return self.start(startup_delay=startup_delay, check_port=port)
+        return self.start(startup_timeout=startup_timeout, check_port=port)
 
 class WebappProcessManager(NPMProcessManager):
     """Specialized ProcessManager for webapp dev server"""
@@ -3,18 +3,21 @@ import os
 import asyncio
 import subprocess
 import mimetypes
+import threading
 try:
     from .base_wrapper import BaseWrapper
     from .logger import Logger
+    from .outbound_queue import merge_latest
     from .git_monitor import GitMonitor
     from .git_operations import GitOperations
-    from .git_search import GitSearch
+    from .file_reader import FileReader
 except ImportError:
     from base_wrapper import BaseWrapper
     from logger import Logger
+    from outbound_queue import merge_latest
     from git_monitor import GitMonitor
     from git_operations import GitOperations
-    from git_search import GitSearch
+    from file_reader import FileReader
 
 
 class Repo(BaseWrapper):
@@ -26,15 +29,39 @@ class Repo(BaseWrapper):
         self.repo_path = repo_path or '.'
         self.repo = None
         self._git_change_callbacks = []
+        # Called with the absolute path of each working tree file that changes
+        self._file_change_callbacks = []
         self._line_count_cache = {}
         
-        # Initialize component modules
+        # Initialize component modules; search is loaded on first use
         self.git_monitor = GitMonitor(self)
         self.git_operations = GitOperations(self)
-        self.git_search = GitSearch(self)
+        self.file_reader = FileReader(self)
+        self._git_search = None
+        self._git_diff = None
         
         self._initialize_repo()
     
+    @property
+    def git_search(self):
+        if self._git_search is None:
+            try:
+                from .git_search import GitSearch
+            except ImportError:
+                from git_search import GitSearch
+            self._git_search = GitSearch(self)
+        return self._git_search
+    
+    @property
+    def git_diff(self):
+        if self._git_diff is None:
+            try:
+                from .git_diff import GitDiff
+            except ImportError:
+                from git_diff import GitDiff
+            self._git_diff = GitDiff(self)
+        return self._git_diff
+    
     def _initialize_repo(self):
         """Initialize the Git repository"""
         try:
@@ -45,8 +72,12 @@ class Repo(BaseWrapper):
             self.log(f"Working directory: {self.repo.working_dir}")
             self.log(f"Repository root: {self.repo.working_tree_dir}")
             
-            # Start the git monitor after initializing the repository
-            self.start_git_monitor()
+            # Evict cached content of files as soon as they change
+            self._add_file_change_callback(self.file_reader.forget)
+            
+            # Start the git monitor after initializing the repository. Watching
+            # a large tree takes a while, so do it off the startup path
+            threading.Thread(target=self.start_git_monitor, name='GitMonitorStart', daemon=True).start()
         except git.exc.InvalidGitRepositoryError:
             self.log(f"No Git repository found at: {self.repo_path} or in parent directories")
             self.repo = None
@@ -421,50 +452,71 @@ class Repo(BaseWrapper):
             return error_msg
     
     # Delegate methods to component modules
-    def get_file_content(self, file_path, version='working'):
-        """Get the content of a file from either HEAD, working directory, or specific commit"""
-        self.log(f"get_file_content called for {file_path}, version: {version}")
+    def get_file_content(self, file_path, version='working', etag=None, full=False):
+        """Get the content of a file from either HEAD, working directory, or specific commit
+
+        When etag is given (the etag the client holds, or '' for none) the
+        result is {'content', 'etag'}, or {'not_modified': True, 'etag'} if
+        the file still has that etag. The etag is the git blob hash.
+
+        A working file over FileReader.LARGE_FILE_BYTES is not sent whole:
+        the result is {'content': <head preview>, 'etag': None, 'large': True,
+        'truncated', 'size', 'binary'} and the rest is read with
+        read_file_range. Pass full=True to get the whole file anyway, e.g.
+        before editing and saving it.
+        """
+        self.log(f"get_file_content called for {file_path}, version: {version}, etag: {etag}, full: {full}")
         
         if not self.repo:
             error_msg = {"error": "No Git repository available"}
             self.log(f"get_file_content returning error: {error_msg}")
             return error_msg
         
+        def respond(content, content_etag):
+            if etag is None:
+                return content
+            if content is None:
+                self.log(f"{file_path} not modified ({version})")
+                return {"not_modified": True, "etag": content_etag}
+            return {"content": content, "etag": content_etag}
+        
         try:
-            if version == 'HEAD':
-                # Get file content from HEAD commit
-                try:
-                    blob = self.repo.head.commit.tree[file_path]
-                    content = blob.data_stream.read().decode('utf-8')
-                    self.log(f"HEAD content loaded for {file_path}, length: {len(content)}")
-                    return content
-                except KeyError:
-                    # File doesn't exist in HEAD (new file)
-                    self.log(f"File {file_path} not found in HEAD (new file)")
-                    return ""
-            elif version == 'working':
+            if version == 'working':
+                preview = None if full else self.file_reader.large_preview(file_path)
+                if preview is not None:
+                    self.log(f"{file_path} is {preview['size']} bytes, returning a preview")
+                    return {
+                        "content": preview['preview'],
+                        "etag": None,
+                        "large": True,
+                        "truncated": preview['preview_truncated'],
+                        "size": preview['size'],
+                        "binary": preview['binary']
+                    }
+                
                 # Get file content from working directory
-                full_path = os.path.join(self.repo.working_tree_dir, file_path)
-                if os.path.exists(full_path):
-                    with open(full_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                    self.log(f"Working content loaded for {file_path}, length: {len(content)}")
-                    return content
-                else:
+                result = self.file_reader.read_text(file_path, etag)
+                if result is None:
                     self.log(f"File {file_path} not found in working directory")
-                    return ""
-            else:
-                # Treat version as a commit hash
-                try:
-                    commit = self.repo.commit(version)
-                    blob = commit.tree[file_path]
-                    content = blob.data_stream.read().decode('utf-8')
-                    self.log(f"Content loaded for {file_path} at commit {version[:8]}, length: {len(content)}")
-                    return content
-                except (KeyError, git.exc.BadName):
-                    # File doesn't exist in this commit
-                    self.log(f"File {file_path} not found in commit {version}")
-                    return ""
+                    return respond("", None)
+                content, content_etag = result
+                if content is not None:
+                    self.log(f"Working content loaded for {file_path}, length: {len(content)}")
+                return respond(content, content_etag)
+            
+            # Get file content from HEAD or treat version as a commit hash
+            try:
+                commit = self.repo.head.commit if version == 'HEAD' else self.repo.commit(version)
+                blob = commit.tree[file_path]
+            except (KeyError, git.exc.BadName):
+                # File doesn't exist in this commit (e.g. a new file)
+                self.log(f"File {file_path} not found in {version}")
+                return respond("", None)
+            if blob.hexsha == etag:
+                return respond(None, blob.hexsha)
+            content = blob.data_stream.read().decode('utf-8')
+            self.log(f"Content loaded for {file_path} at {version[:8]}, length: {len(content)}")
+            return respond(content, blob.hexsha)
                 
         except UnicodeDecodeError as e:
             error_msg = {"error": f"File {file_path} contains binary data or invalid encoding: {e}"}
@@ -475,6 +527,22 @@ class Repo(BaseWrapper):
             self.log(f"get_file_content returning error: {error_msg}")
             return error_msg
             
+    def get_file_diff(self, file_path, from_version='HEAD', to_version='working', algorithm='histogram', context=3):
+        """Get the diff hunks of a file between two versions ('working', 'index', 'HEAD' or a commit)"""
+        return self.git_diff.get_file_diff(file_path, from_version, to_version, algorithm, context)
+
+    def get_file_info(self, file_path):
+        """Get a working file's size and line count with a head preview; large files should be read in ranges"""
+        return self.file_reader.get_file_info(file_path)
+
+    def read_file_range(self, file_path, start=0, end=None, unit='bytes'):
+        """Read a byte or line range [start, end) of a working file"""
+        return self.file_reader.read_file_range(file_path, start, end, unit)
+
+    def read_file_chunk(self, file_path, offset=0, chunk_bytes=None):
+        """Read a working file in fixed-size chunks, following the returned next offset"""
+        return self.file_reader.read_file_chunk(file_path, offset, chunk_bytes)
+
     def save_file_content(self, file_path, content):
         """Save file content to disk in the working directory"""
         return self.git_operations.save_file_content(file_path, content)
@@ -495,6 +563,18 @@ class Repo(BaseWrapper):
         """Discard changes to a specific file in the repository by checking it out from HEAD"""
         return self.git_operations.discard_changes(file_path)
             
+    def stage_files(self, file_paths):
+        """Stage several files with one git invocation; returns per-path results"""
+        return self.git_operations.stage_files(file_paths)
+
+    def unstage_files(self, file_paths):
+        """Unstage several files with one git invocation; returns per-path results"""
+        return self.git_operations.unstage_files(file_paths)
+
+    def discard_changes_for_files(self, file_paths):
+        """Discard the changes to several files with one git invocation; returns per-path results"""
+        return self.git_operations.discard_changes_for_files(file_paths)
+            
     def commit_file(self, file_path, commit_message):
         """Commit a specific file to the repository"""
         return self.git_operations.commit_file(file_path, commit_message)
@@ -569,12 +649,24 @@ class Repo(BaseWrapper):
         self.log("Git state changed, notifying RepoTree")
         
         try:
-            # Notify RepoTree using _safe_create_task - call loadGitStatus which triggers a refresh
-            self._safe_create_task(self.get_call()['RepoTree.loadGitStatus']({}))
+            # Call loadGitStatus on every client, which triggers a refresh; queued refreshes collapse into one
+            self.outbound.push('RepoTree.loadGitStatus', {},
+                               merge_key=('RepoTree.loadGitStatus',), merge=merge_latest)
             
         except Exception as e:
             self.log(f"Error in _notify_git_change: {e}")
 
+    def _add_file_change_callback(self, callback):
+        """Call callback(abs_path) from the monitor thread whenever a working tree file changes"""
+        self._file_change_callbacks.append(callback)
+
+    def _notify_file_changed(self, file_path):
+        for callback in list(self._file_change_callbacks):
+            try:
+                callback(file_path)
+            except Exception as e:
+                self.log(f"Error in file change callback: {e}")
+
     def _notify_file_saved(self, file_path):
         """Notify DiffEditor about file save events"""
         self.log(f"_notify_file_saved called for file: {file_path}")
@@ -590,8 +682,9 @@ class Repo(BaseWrapper):
                     file_path = relative_path.replace(os.sep, '/')
             
             try:
-                # Notify DiffEditor using _safe_create_task
-                self._safe_create_task(self.get_call()['DiffEditor.reloadIfCurrentFile']({'filePath': file_path}))
+                # Notify DiffEditor on every client; repeated saves of one file collapse while queued
+                self.outbound.push('DiffEditor.reloadIfCurrentFile', {'filePath': file_path},
+                                   merge_key=('DiffEditor.reloadIfCurrentFile', file_path), merge=merge_latest)
                 self.log(f"Successfully called DiffEditor.reloadIfCurrentFile for file: {file_path}")
             except Exception as e:
                 self.log(f"Error calling DiffEditor.reloadIfCurrentFile: {e}")
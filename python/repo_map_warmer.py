@@ -0,0 +1,179 @@
+import concurrent.futures
+import os
+import threading
+import time
+
+try:
+    from .base_wrapper import BaseWrapper
+except ImportError:
+    from base_wrapper import BaseWrapper
+
+
+class RepoMapWarmer(BaseWrapper):
+    """Parses the coder's repo map tags in the background
+
+    aider builds the repo map on demand inside coder.run, so the first
+    prompt pays for tree-sitter parsing every file. warm_up() fills the
+    tags cache ahead of time on a small worker pool and refresh() re-parses
+    only files that changed. Workers wait while the coder has a job running
+    or queued, so warm-up never competes with a real run.
+    """
+
+    WORKERS = 2
+    # How often a paused worker re-checks for shutdown
+    IDLE_POLL = 1.0
+
+    def __init__(self, coder_wrapper, workers=None):
+        super().__init__()
+        self.coder_wrapper = coder_wrapper
+        self.workers = workers or self.WORKERS
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._stopped = False
+        self.total = 0
+        self.done = 0
+        self.failed = 0
+        self.refreshed = 0
+        self.paused = False
+        self.started_at = None
+        self.finished_at = None
+
+    def _repo_map(self):
+        return getattr(self.coder_wrapper.coder, 'repo_map', None)
+
+    def warm_up(self):
+        """Parse the tags of every file the repo map covers"""
+        coder = self.coder_wrapper.coder
+        if self._repo_map() is None:
+            self.log("Repo map warm-up skipped: the coder has no repo map")
+            return self.get_status()
+        try:
+            fnames = coder.get_all_abs_files()
+        except Exception as e:
+            self.log(f"Repo map warm-up could not list files: {e}")
+            return {"error": str(e)}
+
+        with self._lock:
+            self.total = self.done = self.failed = 0
+            self.started_at = time.monotonic()
+            self.finished_at = None
+        queued = self._schedule(fnames)
+        self.log(f"Repo map warm-up started for {queued} files on {self.workers} workers")
+        return self.get_status()
+
+    def refresh(self, paths):
+        """Re-parse the tags of changed files (absolute or repo-relative paths)"""
+        if self._repo_map() is None:
+            return {"queued": 0}
+        root = getattr(self.coder_wrapper.coder, 'root', None) or os.getcwd()
+        fnames = []
+        for path in paths:
+            fname = path if os.path.isabs(path) else os.path.join(root, path)
+            if os.path.isfile(fname) and self._has_tags(fname):
+                fnames.append(fname)
+        queued = self._schedule(fnames, refresh=True)
+        if queued:
+            self.log(f"Repo map refresh queued for {queued} changed files")
+        return {"queued": queued}
+
+    def refresh_file(self, path):
+        """Repo file change callback"""
+        if os.sep + '.git' + os.sep in path:
+            return
+        self.refresh([path])
+
+    @staticmethod
+    def _has_tags(fname):
+        try:
+            from grep_ast import filename_to_lang
+        except ImportError:
+            return True
+        return bool(filename_to_lang(fname))
+
+    def _schedule(self, fnames, refresh=False):
+        with self._lock:
+            if self._stopped:
+                return 0
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix='RepoMapWarmer')
+            fnames = [fname for fname in fnames if fname not in self._pending]
+            self._pending.update(fnames)
+            if not refresh:
+                self.total += len(fnames)
+        for fname in fnames:
+            self._executor.submit(self._parse, fname, refresh)
+        return len(fnames)
+
+    def _yield_to_runs(self):
+        """Wait while the coder has work; returns False once stopped"""
+        job_queue = self.coder_wrapper.job_queue
+        while not self._stopped:
+            if not job_queue.is_busy():
+                self.paused = False
+                return True
+            self.paused = True
+            job_queue.wait_idle(self.IDLE_POLL)
+        return False
+
+    def _parse(self, fname, refresh):
+        try:
+            if not self._yield_to_runs():
+                return
+            repo_map = self._repo_map()
+            if repo_map is None:
+                return
+            try:
+                # Fills aider's tags cache; a file whose mtime is unchanged is a cache hit
+                repo_map.get_tags(fname, self.coder_wrapper.coder.get_rel_fname(fname))
+                ok = True
+            except Exception as e:
+                self.log(f"Repo map tags failed for {fname}: {e}")
+                ok = False
+        finally:
+            with self._lock:
+                self._pending.discard(fname)
+
+        with self._lock:
+            if refresh:
+                self.refreshed += 1
+            elif ok:
+                self.done += 1
+            else:
+                self.failed += 1
+            if not refresh and self.done + self.failed >= self.total and self.finished_at is None:
+                self.finished_at = time.monotonic()
+                self.log(f"Repo map warm-up finished: {self.done} files in "
+                         f"{self.finished_at - self.started_at:.1f}s, {self.failed} failed")
+
+    def get_status(self):
+        """Warm-up progress: files parsed of total, pending refreshes and whether it is paused for a run"""
+        with self._lock:
+            if self._repo_map() is None:
+                state = 'disabled'
+            elif self.started_at is None:
+                state = 'idle'
+            elif self.finished_at is None:
+                state = 'paused' if self.paused else 'warming'
+            else:
+                state = 'ready'
+            end = self.finished_at or time.monotonic()
+            return {
+                'state': state,
+                'total': self.total,
+                'done': self.done,
+                'failed': self.failed,
+                'pending': len(self._pending),
+                'refreshed': self.refreshed,
+                'elapsed': end - self.started_at if self.started_at is not None else 0.0
+            }
+
+    def close(self):
+        """Drop pending work and shut the workers down"""
+        with self._lock:
+            self._stopped = True
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            # Queued parses see _stopped and return at once
+            executor.shutdown(wait=False)
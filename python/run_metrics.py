@@ -0,0 +1,174 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+try:
+    from .base_wrapper import BaseWrapper
+    from .logger import Logger
+except ImportError:
+    from base_wrapper import BaseWrapper
+    from logger import Logger
+
+
+class RunMetrics:
+    """Timings of one coder run, filled in by the wrappers as the run goes
+
+    All marks are time.monotonic() values; to_dict() reports them as
+    seconds relative to the start of the run.
+    """
+
+    def __init__(self, job, session_id=None):
+        self.job_id = job.id
+        self.session_id = session_id
+        self.message_chars = len(job.message) if isinstance(job.message, str) else None
+        self.wait = job.wait_time
+        self.started_at = time.time()
+        self.start = time.monotonic()
+        self.end = None
+        self.status = None
+        self.requests = 0
+        self.request_start = None
+        self.first_token = None
+        self.last_token = None
+        self.stream_chars = 0
+        self.tokens_sent = None
+        self.tokens_received = None
+        self.edit_apply = 0.0
+        self.commit = 0.0
+        self._lock = threading.Lock()
+
+    def mark_request(self):
+        """An LLM request is being sent"""
+        with self._lock:
+            self.requests += 1
+            if self.request_start is None:
+                self.request_start = time.monotonic()
+
+    def mark_stream_update(self, content_length, final=False):
+        """The assistant stream grew to content_length characters"""
+        now = time.monotonic()
+        with self._lock:
+            if self.first_token is None and content_length:
+                self.first_token = now
+            if content_length:
+                self.last_token = now
+            if final:
+                self.stream_chars += content_length or 0
+
+    def add_edit_apply(self, seconds):
+        with self._lock:
+            self.edit_apply += seconds
+
+    def add_commit(self, seconds):
+        with self._lock:
+            self.commit += seconds
+
+    def set_tokens(self, sent, received):
+        self.tokens_sent = sent
+        self.tokens_received = received
+
+    def finish(self, status):
+        self.end = time.monotonic()
+        self.status = status
+
+    def _offset(self, mark):
+        return round(mark - self.start, 4) if mark is not None else None
+
+    def to_dict(self):
+        stream_time = (self.last_token - self.first_token
+                       if self.first_token is not None and self.last_token is not None else None)
+        tokens_per_sec = None
+        if self.tokens_received and stream_time:
+            tokens_per_sec = round(self.tokens_received / stream_time, 2)
+        ttft = None
+        if self.first_token is not None and self.request_start is not None:
+            ttft = round(self.first_token - self.request_start, 4)
+        return {
+            'job_id': self.job_id,
+            'session_id': self.session_id,
+            'started_at': self.started_at,
+            'status': self.status,
+            'message_chars': self.message_chars,
+            'wait': round(self.wait, 4),
+            'request_start': self._offset(self.request_start),
+            'first_token': self._offset(self.first_token),
+            'ttft': ttft,
+            'stream_time': round(stream_time, 4) if stream_time is not None else None,
+            'stream_chars': self.stream_chars,
+            'requests': self.requests,
+            'tokens_sent': self.tokens_sent,
+            'tokens_received': self.tokens_received,
+            'tokens_per_sec': tokens_per_sec,
+            'edit_apply': round(self.edit_apply, 4),
+            'commit': round(self.commit, 4),
+            'total': self._offset(self.end)
+        }
+
+
+class RunMetricsStore(BaseWrapper):
+    """Keeps the telemetry of recent coder runs and appends each run to a JSONL file
+
+    Exposed over RPC as Metrics. The newest HISTORY_SIZE runs are kept in
+    memory; the file is rotated to .1 once it passes MAX_FILE_BYTES.
+    """
+
+    HISTORY_SIZE = 200
+    MAX_FILE_BYTES = 5 * 1024 * 1024
+    SUMMARY_FIELDS = ('wait', 'ttft', 'tokens_per_sec', 'edit_apply', 'commit', 'total')
+
+    def __init__(self, path=None, history_size=None):
+        super().__init__()
+        self.path = path or os.path.join(Logger.DEFAULT_LOG_DIR, 'run_metrics.jsonl')
+        self._runs = deque(maxlen=history_size or self.HISTORY_SIZE)
+        self._lock = threading.Lock()
+
+    def record(self, metrics):
+        """Store a finished run (called on the coder worker thread)"""
+        entry = metrics.to_dict()
+        with self._lock:
+            self._runs.append(entry)
+            try:
+                if os.path.exists(self.path) and os.path.getsize(self.path) > self.MAX_FILE_BYTES:
+                    os.replace(self.path, self.path + '.1')
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(entry) + '\n')
+            except OSError as e:
+                self.log(f"Could not write run metrics to {self.path}: {e}")
+        self.log("Run %s: wait %.2fs, ttft %s, %s tok/s, edits %.2fs, commit %.2fs, total %.2fs",
+                 entry['job_id'], entry['wait'], entry['ttft'], entry['tokens_per_sec'],
+                 entry['edit_apply'], entry['commit'], entry['total'] or 0.0)
+
+    def get_runs(self, limit=50, session_id=None):
+        """Get the most recent runs, newest first"""
+        with self._lock:
+            runs = list(self._runs)
+        if session_id is not None:
+            runs = [run for run in runs if run['session_id'] == session_id]
+        return list(reversed(runs))[:limit]
+
+    def get_summary(self):
+        """Count, mean, p50, p95 and max of each timing over the runs in memory"""
+        with self._lock:
+            runs = list(self._runs)
+        summary = {'runs': len(runs), 'path': self.path}
+        for field in self.SUMMARY_FIELDS:
+            values = sorted(run[field] for run in runs if run.get(field) is not None)
+            if not values:
+                summary[field] = None
+                continue
+            summary[field] = {
+                'count': len(values),
+                'mean': round(sum(values) / len(values), 4),
+                'p50': values[len(values) // 2],
+                'p95': values[min(len(values) - 1, int(len(values) * 0.95))],
+                'max': values[-1]
+            }
+        return summary
+
+    def clear(self):
+        """Forget the runs held in memory (the JSONL file is kept)"""
+        with self._lock:
+            self._runs.clear()
+        return {"status": "cleared"}
@@ -20,6 +20,19 @@ class ServerConfig:
     # Feature flags
     no_browser: bool = False
     no_lsp: bool = False
+    coder_process: bool = False
+    profile_startup: bool = False
+    
+    # Streaming settings
+    stream_max_rate: float = 30.0
+    
+    # Confirmation settings
+    confirm_timeout: float = 300.0
+    confirm_rules: Optional[str] = None
+    
+    # Logging settings
+    log_level: str = 'DEBUG'
+    log_budget_mb: int = 200
     
     # Aider arguments (passed through)
     aider_args: List[str] = field(default_factory=list)
@@ -65,6 +78,21 @@ Examples:
   # Prevent automatic browser opening
   aider-server --no-browser
   
+  # Run the coder in a child process (the terminal prompt is not available)
+  aider-server --coder-process
+  
+  # Write per-module import and per-phase startup times to a report
+  aider-server --profile-startup
+  
+  # Cap assistant stream updates sent to the webapp at 15 per second
+  aider-server --stream-rate 15
+  
+  # Answer webapp confirmations with their default after 60s, auto-answer from a rule file
+  aider-server --confirm-timeout 60 --confirm-rules confirm_rules.json
+  
+  # Quieter logs with a smaller disk budget
+  aider-server --log-level WARNING --log-budget-mb 50
+  
   # Pass Aider arguments (model, API keys, etc.)
   aider-server --model deepseek --api-key deepseek=<your-key>
   aider-server --model gpt-4 --api-key openai=<your-key>
@@ -102,6 +130,45 @@ Examples:
             action="store_true", 
             help="Don't start LSP server"
         )
+        parser.add_argument(
+            "--coder-process", 
+            action="store_true", 
+            help="Run the coder in a child process so file browsing and search stay responsive during generation"
+        )
+        parser.add_argument(
+            "--profile-startup", 
+            action="store_true", 
+            help="Record import and startup phase times and write them to a report in the temp directory"
+        )
+        parser.add_argument(
+            "--stream-rate", 
+            type=float, 
+            default=30.0, 
+            help="Maximum assistant stream updates per second sent to the webapp, 0 for unlimited (default: 30)"
+        )
+        parser.add_argument(
+            "--confirm-timeout", 
+            type=float, 
+            default=300.0, 
+            help="Seconds to wait for the webapp to answer a confirmation before answering no (or the rule's default), 0 to wait forever (default: 300)"
+        )
+        parser.add_argument(
+            "--confirm-rules", 
+            help="JSON file of confirmation rules (question/subject patterns to answers) applied before asking the webapp"
+        )
+        parser.add_argument(
+            "--log-level", 
+            default='DEBUG', 
+            choices=['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'],
+            type=str.upper,
+            help="Level for the server log files, can be changed at runtime over RPC (default: DEBUG)"
+        )
+        parser.add_argument(
+            "--log-budget-mb", 
+            type=int, 
+            default=200, 
+            help="Total disk space for log files and their compressed backups in MB (default: 200)"
+        )
         
         # Parse known args, leaving the rest for Aider
         parsed_args, unknown_args = parser.parse_known_args(args)
@@ -112,6 +179,13 @@ Examples:
             lsp_port=parsed_args.lsp_port,
             no_browser=parsed_args.no_browser,
             no_lsp=parsed_args.no_lsp,
+            coder_process=parsed_args.coder_process,
+            profile_startup=parsed_args.profile_startup,
+            stream_max_rate=parsed_args.stream_rate,
+            confirm_timeout=parsed_args.confirm_timeout,
+            confirm_rules=parsed_args.confirm_rules,
+            log_level=parsed_args.log_level,
+            log_budget_mb=parsed_args.log_budget_mb,
             aider_args=unknown_args
         )
     
@@ -186,6 +260,18 @@ Examples:
         if self.lsp_port is not None and not (1024 <= self.lsp_port <= 65535):
             errors.append(f"LSP port {self.lsp_port} must be between 1024 and 65535")
         
+        if self.stream_max_rate < 0:
+            errors.append(f"Stream rate {self.stream_max_rate} must not be negative")
+        
+        if self.confirm_timeout < 0:
+            errors.append(f"Confirmation timeout {self.confirm_timeout} must not be negative")
+        
+        if self.confirm_rules and not os.path.isfile(self.confirm_rules):
+            errors.append(f"Confirmation rules file not found: {self.confirm_rules}")
+        
+        if self.log_budget_mb <= 0:
+            errors.append(f"Log budget {self.log_budget_mb} MB must be positive")
+        
         # Check for port conflicts
         ports = [self.aider_port, self.webapp_port]
         if self.lsp_port is not None:
@@ -223,6 +309,13 @@ Examples:
         print("=== Feature Configuration ===")
         print(f"Open browser: {'no' if self.no_browser else 'yes'}")
         print(f"LSP features: {'disabled' if self.no_lsp else 'enabled'}")
+        print(f"Coder process: {'separate' if self.coder_process else 'in server'}")
+        if self.profile_startup:
+            print("Startup profiling: enabled")
+        print(f"Stream rate: {f'{self.stream_max_rate:g}/s' if self.stream_max_rate else 'unlimited'}")
+        print(f"Confirm timeout: {f'{self.confirm_timeout:g}s' if self.confirm_timeout else 'none'}"
+              f"{f' (rules: {self.confirm_rules})' if self.confirm_rules else ''}")
+        print(f"Log level: {self.log_level} (budget {self.log_budget_mb} MB)")
         print()
         if self.aider_args:
             print("=== Aider Arguments ===")
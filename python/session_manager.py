@@ -0,0 +1,326 @@
+import asyncio
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+
+try:
+    from .base_wrapper import BaseWrapper
+    from .coder_wrapper import CoderWrapper
+    from .io_wrapper import IOWrapper
+    from .logger import Logger
+except ImportError:
+    from base_wrapper import BaseWrapper
+    from coder_wrapper import CoderWrapper
+    from io_wrapper import IOWrapper
+    from logger import Logger
+
+
+class CoderSession:
+    """One Coder with its own IO, wrappers and job queue"""
+
+    def __init__(self, session_id, coder_wrapper, io_wrapper, worktree=None, branch=None):
+        self.id = session_id
+        self.coder_wrapper = coder_wrapper
+        self.io_wrapper = io_wrapper
+        self.worktree = worktree
+        self.branch = branch
+        self.created_at = time.time()
+
+    @property
+    def coder(self):
+        return self.coder_wrapper.coder
+
+    def component(self, name):
+        """The object an RPC class name refers to within this session"""
+        return {
+            'EditBlockCoder': self.coder,
+            'Commands': getattr(self.coder, 'commands', None),
+            'CoderWrapper': self.coder_wrapper,
+            'IOWrapper': self.io_wrapper
+        }.get(name)
+
+    def to_dict(self):
+        coder = self.coder
+        try:
+            files = sorted(coder.get_inchat_relative_files())
+        except Exception:
+            files = []
+        return {
+            'id': self.id,
+            'coder_type': coder.__class__.__name__,
+            'edit_format': getattr(coder, 'edit_format', None),
+            'root': getattr(coder, 'root', None),
+            'files': files,
+            'worktree': self.worktree,
+            'branch': self.branch,
+            'created_at': self.created_at,
+            'jobs': self.coder_wrapper.get_job_metrics()
+        }
+
+
+class SessionManager(BaseWrapper):
+    """Runs several independent Coder sessions in one server
+
+    The session the server starts with is 'default' and keeps its usual RPC
+    classes. Each extra session gets its own Coder, InputOutput, IOWrapper and
+    job queue, optionally in its own git worktree, and is reached through
+    call_session(session_id, component, method, args). Sessions share the
+    JRPC server, LSP and webapp and the model settings of the default coder.
+    Coders of different sessions run at the same time, so each keeps its own
+    RepoMap for the per-run map caches, but sessions on the default
+    session's tree use its tags cache, so files parsed (or warmed) once are
+    not parsed again per session. Their pushes go to the webapp's
+    SessionHandler.* with the session id as first argument.
+
+    Creating a session builds a Coder and may add a worktree, which is too
+    slow for the event loop: create_session returns at once and the result
+    is pushed as SessionHandler.sessionCreated or sessionCreateFailed.
+    """
+
+    PRIMARY_SESSION = 'default'
+    MAX_SESSIONS = 8
+
+    def __init__(self, coder_wrapper, io_wrapper, worktree_root=None):
+        super().__init__()
+        self.sessions = {
+            self.PRIMARY_SESSION: CoderSession(self.PRIMARY_SESSION, coder_wrapper, io_wrapper)
+        }
+        self.worktree_root = worktree_root or os.path.join(tempfile.gettempdir(), 'aider-sessions')
+        self._lock = threading.Lock()
+
+    def _get_session(self, session_id):
+        return self.sessions.get(session_id or self.PRIMARY_SESSION)
+
+    def list_sessions(self):
+        """Get every session with its coder, files, worktree and job metrics"""
+        return [session.to_dict() if session is not None else {'id': session_id, 'creating': True}
+                for session_id, session in list(self.sessions.items())]
+
+    def create_session(self, session_id=None, worktree=False, fnames=None):
+        """Start creating a session with a fresh chat; the session is pushed once it is built
+
+        Args:
+            session_id (str): Letters, digits, '-' and '_'; generated if omitted
+            worktree (bool): Give the session its own git worktree on a new branch
+            fnames (list): Repo-relative files to add to the session's chat
+        """
+        self.log(f"create_session called with session_id: {session_id}, worktree: {worktree}")
+        session_id = session_id or uuid.uuid4().hex[:8]
+        if not re.match(r'^[A-Za-z0-9_-]+$', session_id):
+            return {"error": f"Invalid session id: {session_id}"}
+
+        with self._lock:
+            if session_id in self.sessions:
+                return {"error": f"Session {session_id} already exists"}
+            if len(self.sessions) >= self.MAX_SESSIONS:
+                return {"error": f"At most {self.MAX_SESSIONS} sessions can be open"}
+            # Reserve the id while the coder is built
+            self.sessions[session_id] = None
+
+        threading.Thread(target=self._create_in_background, args=(session_id, worktree, fnames or []),
+                         name=f'CreateSession-{session_id}', daemon=True).start()
+        return {"status": "creating", "session_id": session_id}
+
+    def _create_in_background(self, session_id, worktree, fnames):
+        worktree_path = None
+        try:
+            coder, worktree_path, branch = self._build_coder(session_id, worktree, fnames)
+            # The wrappers capture the event loop they are created on
+            session = asyncio.run_coroutine_threadsafe(
+                self._wrap_session(session_id, coder, worktree_path, branch), self.main_loop).result()
+        except Exception as e:
+            with self._lock:
+                self.sessions.pop(session_id, None)
+            if worktree_path:
+                self._remove_worktree(self.sessions[self.PRIMARY_SESSION].coder, worktree_path)
+            self.log(f"Error creating session {session_id}: {e}")
+            self.outbound.push('SessionHandler.sessionCreateFailed', session_id, str(e))
+            return
+
+        with self._lock:
+            self.sessions[session_id] = session
+        self.log(f"Session {session_id} created")
+        self.outbound.push('SessionHandler.sessionCreated', session_id, session.to_dict())
+
+    def _build_coder(self, session_id, worktree, fnames):
+        """Create the session's Coder, in its own worktree if asked (runs off the event loop)"""
+        from aider.coders.base_coder import Coder
+        from aider.io import InputOutput
+
+        base_coder = self.sessions[self.PRIMARY_SESSION].coder
+        base_io = base_coder.io
+
+        io = InputOutput(
+            pretty=getattr(base_io, 'pretty', True),
+            yes=None,
+            encoding=getattr(base_io, 'encoding', 'utf-8'),
+            dry_run=getattr(base_io, 'dry_run', False),
+            fancy_input=False
+        )
+
+        kwargs = dict(
+            from_coder=base_coder,
+            io=io,
+            summarize_from_coder=False,
+            done_messages=[],
+            cur_messages=[],
+            read_only_fnames=[],
+            commands=None
+        )
+
+        root = getattr(base_coder, 'root', os.getcwd())
+        worktree_path = branch = None
+        if worktree:
+            worktree_path, branch = self._add_worktree(base_coder, session_id)
+            root = worktree_path
+        kwargs['fnames'] = [os.path.join(root, fname) for fname in fnames]
+
+        try:
+            if worktree_path:
+                kwargs['repo'] = self._worktree_repo(base_coder, io, worktree_path)
+            with CoderWrapper.creating_session_coder():
+                coder = Coder.create(**kwargs)
+        except Exception:
+            if worktree_path:
+                self._remove_worktree(base_coder, worktree_path)
+            raise
+        coder.io.yes = None
+        if not worktree_path:
+            self._share_tags_cache(base_coder, coder)
+        return coder, worktree_path, branch
+
+    def _share_tags_cache(self, base_coder, coder):
+        """Point the session's RepoMap at the default coder's tags cache
+
+        The tags cache is keyed by file name and mtime and may be used from
+        several threads (a diskcache Cache, or a dict when that is not
+        available), unlike the rest of a RepoMap.
+        """
+        base_map = getattr(base_coder, 'repo_map', None)
+        repo_map = getattr(coder, 'repo_map', None)
+        if base_map is None or repo_map is None or getattr(base_map, 'TAGS_CACHE', None) is None:
+            return
+        if getattr(base_map, 'root', None) != getattr(repo_map, 'root', None):
+            return
+        repo_map.TAGS_CACHE = base_map.TAGS_CACHE
+
+    async def _wrap_session(self, session_id, coder, worktree_path, branch):
+        """Create the session's wrappers on the event loop"""
+        primary = self.sessions[self.PRIMARY_SESSION]
+        io_wrapper = IOWrapper(
+            coder.io,
+            stream_max_rate=primary.io_wrapper.stream_max_rate,
+            confirm_policy=primary.io_wrapper.confirm_policy,
+            session_id=session_id
+        )
+        coder_wrapper = CoderWrapper(coder, track_coder_changes=False)
+        coder_wrapper.io_wrapper = io_wrapper
+        # Runs of every session go to the one Metrics store, tagged with the session id
+        coder_wrapper.metrics_store = primary.coder_wrapper.metrics_store
+
+        # Session wrappers are not JRPC classes of their own: they reach the
+        # clients through the primary wrappers and follow its connection state
+        for wrapper in (io_wrapper, coder_wrapper):
+            wrapper.get_call = primary.io_wrapper.get_call
+            wrapper.get_remotes = primary.io_wrapper.get_remotes
+        io_wrapper._connected = primary.io_wrapper._connected
+
+        return CoderSession(session_id, coder_wrapper, io_wrapper, worktree_path, branch)
+
+    def _add_worktree(self, base_coder, session_id):
+        if getattr(base_coder, 'repo', None) is None:
+            raise ValueError("Worktree sessions need a git repository")
+        os.makedirs(self.worktree_root, exist_ok=True)
+        path = os.path.join(self.worktree_root, session_id)
+        branch = f"aider-session-{session_id}"
+        base_coder.repo.repo.git.worktree('add', '-b', branch, path, 'HEAD')
+        self.log(f"Added worktree {path} on branch {branch}")
+        return path, branch
+
+    def _worktree_repo(self, base_coder, io, path):
+        from aider.repo import GitRepo
+
+        base_repo = base_coder.repo
+        return GitRepo(
+            io, [], path,
+            models=getattr(base_repo, 'models', None),
+            attribute_author=getattr(base_repo, 'attribute_author', True),
+            attribute_committer=getattr(base_repo, 'attribute_committer', True),
+            attribute_commit_message_author=getattr(base_repo, 'attribute_commit_message_author', False),
+            attribute_commit_message_committer=getattr(base_repo, 'attribute_commit_message_committer', False),
+            commit_prompt=getattr(base_repo, 'commit_prompt', None)
+        )
+
+    def _remove_worktree(self, base_coder, path):
+        try:
+            base_coder.repo.repo.git.worktree('remove', '--force', path)
+            self.log(f"Removed worktree {path}")
+        except Exception as e:
+            self.log(f"Error removing worktree {path}: {e}")
+
+    def close_session(self, session_id):
+        """Stop a session's work, drop it and remove its worktree (its branch is kept)"""
+        self.log(f"close_session called for: {session_id}")
+        if session_id == self.PRIMARY_SESSION:
+            return {"error": "The default session cannot be closed"}
+
+        with self._lock:
+            session = self.sessions.get(session_id)
+            if session is None:
+                return {"error": f"No session {session_id}"}
+            del self.sessions[session_id]
+
+        queue = session.coder_wrapper.job_queue
+        if queue.current_job is not None:
+            session.coder_wrapper.stop()
+        queue.close()
+
+        if session.worktree:
+            # git worktree remove can take a while on a large tree
+            threading.Thread(target=self._remove_worktree,
+                             args=(self.sessions[self.PRIMARY_SESSION].coder, session.worktree),
+                             name=f'RemoveWorktree-{session_id}', daemon=True).start()
+        return {"status": "closed", "session_id": session_id, "branch": session.branch}
+
+    def run(self, session_id, message, priority=0):
+        """Queue a message for a session's coder"""
+        session = self._get_session(session_id)
+        if session is None:
+            return {"error": f"No session {session_id}"}
+        result = session.coder_wrapper.run_wrapper(message, priority)
+        result['session_id'] = session.id
+        return result
+
+    def stop(self, session_id):
+        """Cancel the job a session is running"""
+        session = self._get_session(session_id)
+        if session is None:
+            return {"error": f"No session {session_id}"}
+        return session.coder_wrapper.stop()
+
+    def call_session(self, session_id, component, method, args=None):
+        """Call a public method of a session's EditBlockCoder, Commands, CoderWrapper or IOWrapper
+
+        This is how the existing RPCs are routed to a session other than the
+        default one, e.g. call_session('abc', 'CoderWrapper', 'list_jobs').
+        """
+        session = self._get_session(session_id)
+        if session is None:
+            return {"error": f"No session {session_id}"}
+        target = session.component(component)
+        if target is None:
+            return {"error": f"Unknown component: {component}"}
+        if method.startswith('_'):
+            return {"error": f"Method {method} is private"}
+        func = getattr(target, method, None)
+        if not callable(func):
+            return {"error": f"{component} has no method {method}"}
+        try:
+            return func(*(args or []))
+        except Exception as e:
+            Logger.error("Error in %s.%s for session %s: %s", component, method, session_id, e,
+                         name='SessionManager')
+            return {"error": str(e)}
@@ -0,0 +1,186 @@
+"""
+startup_profiler.py - Import timing for aider-server --profile-startup
+
+Records how long each module takes to import, in the manner of
+python -X importtime: 'self' excludes the imports a module makes while it
+loads, 'cumulative' includes them. The report also carries the startup
+phase timings. It only uses the standard library, so aider_server can
+install it before anything heavy is loaded.
+"""
+import importlib.abc
+import os
+import sys
+import tempfile
+import threading
+import time
+
+
+PROFILE_FLAG = '--profile-startup'
+DEFAULT_REPORT = os.path.join(tempfile.gettempdir(), 'aider-server-startup.txt')
+
+
+class _TimedLoader:
+    """Wraps a module's loader to time create_module and exec_module"""
+
+    def __init__(self, loader, profiler, name):
+        self._loader = loader
+        self._profiler = profiler
+        self._name = name
+
+    def create_module(self, spec):
+        create = getattr(self._loader, 'create_module', None)
+        if create is None:
+            return None
+        # Extension modules do their work here
+        with self._profiler.timing(self._name):
+            return create(spec)
+
+    def exec_module(self, module):
+        try:
+            with self._profiler.timing(self._name):
+                self._loader.exec_module(module)
+        finally:
+            # Hand the module back its real loader
+            spec = getattr(module, '__spec__', None)
+            if spec is not None and spec.loader is self:
+                spec.loader = self._loader
+            if getattr(module, '__loader__', None) is self:
+                module.__loader__ = self._loader
+
+    def __getattr__(self, attr):
+        return getattr(self._loader, attr)
+
+
+class _TimingFinder(importlib.abc.MetaPathFinder):
+    """First entry on sys.meta_path: asks the other finders, then wraps the loader"""
+
+    def __init__(self, profiler):
+        self.profiler = profiler
+
+    def find_spec(self, fullname, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self:
+                continue
+            find_spec = getattr(finder, 'find_spec', None)
+            if find_spec is None:
+                continue
+            spec = find_spec(fullname, path, target)
+            if spec is None:
+                continue
+            if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+                spec.loader = _TimedLoader(spec.loader, self.profiler, fullname)
+            return spec
+        return None
+
+
+class _Timing:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.profiler._enter(self.name)
+
+    def __exit__(self, *exc):
+        self.profiler._exit()
+        return False
+
+
+class ImportProfiler:
+    """Times module imports from start() until stop()
+
+    Imports on every thread are recorded, each thread nesting its own.
+    """
+
+    def __init__(self):
+        self.modules = {}
+        self._order = []
+        self._finder = _TimingFinder(self)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def start_if_requested(cls, argv=None):
+        """Start a profiler when --profile-startup is on the command line, else return None"""
+        argv = sys.argv[1:] if argv is None else argv
+        if PROFILE_FLAG not in argv:
+            return None
+        profiler = cls()
+        profiler.start()
+        return profiler
+
+    def start(self):
+        if self._finder not in sys.meta_path:
+            sys.meta_path.insert(0, self._finder)
+
+    def stop(self):
+        if self._finder in sys.meta_path:
+            sys.meta_path.remove(self._finder)
+
+    def timing(self, name):
+        return _Timing(self, name)
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _enter(self, name):
+        stack = self._stack()
+        # [name, start, time spent in nested imports, depth]
+        stack.append([name, time.perf_counter(), 0.0, len(stack)])
+
+    def _exit(self):
+        stack = self._stack()
+        name, start, nested, depth = stack.pop()
+        elapsed = time.perf_counter() - start
+        if stack:
+            stack[-1][2] += elapsed
+        with self._lock:
+            record = self.modules.get(name)
+            if record is None:
+                record = self.modules[name] = {'self': 0.0, 'cumulative': 0.0, 'depth': depth}
+                self._order.append(name)
+            record['self'] += elapsed - nested
+            record['cumulative'] += elapsed
+
+    def get_stats(self):
+        """Modules in the order they started loading, with self and cumulative seconds"""
+        with self._lock:
+            return [dict(self.modules[name], module=name) for name in self._order]
+
+    def format_report(self, timer=None, limit=40):
+        stats = self.get_stats()
+        total = sum(s['self'] for s in stats)
+        lines = ["=== Startup Profile ==="]
+        if timer is not None:
+            lines.append("")
+            lines.append("Phases (start -> end, duration):")
+            for name, phase in timer.phases.items():
+                if phase['end'] is None:
+                    lines.append(f"  {name:<20} {phase['start']:8.3f}s -> (not finished)")
+                else:
+                    lines.append(f"  {name:<20} {phase['start']:8.3f}s -> {phase['end']:8.3f}s  "
+                                 f"{phase['end'] - phase['start']:8.3f}s")
+        lines.append("")
+        lines.append(f"Imports: {len(stats)} modules, {total:.3f}s")
+        lines.append("")
+        lines.append(f"Slowest {min(limit, len(stats))} by cumulative time:")
+        lines.append(f"  {'self [us]':>10} | {'cumulative':>10} | module")
+        for s in sorted(stats, key=lambda s: s['cumulative'], reverse=True)[:limit]:
+            lines.append(f"  {s['self'] * 1e6:10.0f} | {s['cumulative'] * 1e6:10.0f} | {s['module']}")
+        lines.append("")
+        lines.append("All imports (import time: self [us] | cumulative | imported package):")
+        for s in stats:
+            indent = '  ' * s['depth']
+            lines.append(f"import time: {s['self'] * 1e6:9.0f} | {s['cumulative'] * 1e6:10.0f} | "
+                         f"{indent}{s['module']}")
+        return "\n".join(lines) + "\n"
+
+    def write_report(self, path=None, timer=None):
+        """Write the report and return its path"""
+        path = path or DEFAULT_REPORT
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.format_report(timer))
+        return path
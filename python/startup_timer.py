@@ -0,0 +1,47 @@
+import time
+
+
+class StartupTimer:
+    """Records when each startup phase begins and ends, relative to server start"""
+
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.phases = {}
+
+    def start(self, name):
+        self.phases[name] = {'start': time.monotonic() - self.started_at, 'end': None, 'ok': None}
+
+    def finish(self, name, ok=True):
+        phase = self.phases.get(name)
+        if phase is None:
+            self.start(name)
+            phase = self.phases[name]
+        phase['end'] = time.monotonic() - self.started_at
+        phase['ok'] = bool(ok)
+
+    async def run(self, name, awaitable):
+        """Await one phase, timing it; a falsy result or an exception marks it failed"""
+        self.start(name)
+        try:
+            result = await awaitable
+        except BaseException:
+            self.finish(name, False)
+            raise
+        self.finish(name, bool(result) or result is None)
+        return result
+
+    def elapsed(self):
+        return time.monotonic() - self.started_at
+
+    def print_summary(self):
+        """Print each phase with its start offset and duration"""
+        print("=== Startup Timings ===")
+        for name, phase in self.phases.items():
+            if phase['end'] is None:
+                print(f"{name:<20} started at {phase['start']:6.2f}s, not finished")
+                continue
+            status = '' if phase['ok'] else ' (failed)'
+            print(f"{name:<20} {phase['start']:6.2f}s -> {phase['end']:6.2f}s  "
+                  f"({phase['end'] - phase['start']:.2f}s){status}")
+        print(f"{'Total':<20} {self.elapsed():.2f}s")
+        print()
@@ -0,0 +1,126 @@
+import threading
+import time
+
+
+class StreamCoalescer:
+    """Merges rapid stream updates and flushes them at a capped rate
+
+    update() may be called hundreds of times a second from the coder thread.
+    Only the latest pending content is kept; it is flushed at most
+    max_rate_hz times a second, and immediately when final=True.
+    """
+
+    def __init__(self, flush_callback, max_rate_hz=30, loop=None):
+        self.flush_callback = flush_callback
+        self.min_interval = 1.0 / max_rate_hz if max_rate_hz and max_rate_hz > 0 else 0.0
+        self.loop = loop
+        # Held while flushing - take it to act between flushes
+        self.lock = threading.RLock()
+        self._pending = None
+        self._last = None
+        self._last_flush = 0.0
+        self._timer = None
+        self.frames_received = 0
+        self.frames_flushed = 0
+
+    @property
+    def frames_coalesced(self):
+        """Number of updates merged into a later flush instead of being sent"""
+        return self.frames_received - self.frames_flushed
+
+    def get_stats(self):
+        """Get the counters for this stream"""
+        return {
+            'frames_received': self.frames_received,
+            'frames_flushed': self.frames_flushed,
+            'frames_coalesced': self.frames_coalesced,
+            'max_rate_hz': 1.0 / self.min_interval if self.min_interval else None
+        }
+
+    def update(self, content, final=False):
+        """Record the latest content, flushing now if the rate allows or final is set"""
+        with self.lock:
+            self.frames_received += 1
+            self._pending = (content, final)
+
+            delay = self._last_flush + self.min_interval - time.monotonic()
+            if final or delay <= 0:
+                self._flush_locked()
+            elif self._timer is None:
+                self._schedule_flush(delay)
+
+    def flush(self):
+        """Flush any pending content immediately"""
+        with self.lock:
+            self._flush_locked()
+
+    def resend_last(self):
+        """Flush pending content, or send the last flushed content again if nothing is pending"""
+        with self.lock:
+            if self._pending is not None:
+                self._flush_locked()
+            elif self._last is not None:
+                self.flush_callback(*self._last)
+
+    def _flush_locked(self):
+        self._cancel_timer()
+        if self._pending is None:
+            return
+
+        content, final = self._pending
+        self._pending = None
+        self._last = (content, final)
+        self._last_flush = time.monotonic()
+        self.frames_flushed += 1
+        self.flush_callback(content, final)
+
+    def _on_timer(self):
+        with self.lock:
+            self._timer = None
+            self._flush_locked()
+
+    def _schedule_flush(self, delay):
+        self._timer = start_timer(self.loop, delay, self._on_timer)
+
+    def _cancel_timer(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+
+def start_timer(loop, delay, callback):
+    """Call callback after delay seconds, returning a handle with cancel()
+
+    Prefers the event loop's timer wheel over spawning a thread per timer.
+    Safe to call from any thread.
+    """
+    if loop and not loop.is_closed():
+        return _LoopTimer(loop, delay, callback)
+
+    timer = threading.Timer(delay, callback)
+    timer.daemon = True
+    timer.start()
+    return timer
+
+
+class _LoopTimer:
+    """threading.Timer-like handle that fires on an asyncio loop from any thread"""
+
+    def __init__(self, loop, delay, callback):
+        self._handle = None
+        self._cancelled = False
+        self._callback = callback
+        loop.call_soon_threadsafe(self._arm, loop, delay)
+
+    def _arm(self, loop, delay):
+        if not self._cancelled:
+            self._handle = loop.call_later(delay, self._fire)
+
+    def _fire(self):
+        if not self._cancelled:
+            self._callback()
+
+    def cancel(self):
+        self._cancelled = True
+        if self._handle is not None:
+            self._handle.cancel()
@@ -0,0 +1,106 @@
+import uuid
+
+
+class StreamDeltaEncoder:
+    """Turns successive full-content stream updates into append-only delta frames
+
+    aider's markdown stream hands us the whole accumulated message on every
+    update. Only the newly appended suffix is sent, tagged with the UTF-8 byte
+    offset it starts at and the id of the message it belongs to. Whenever the
+    content is not a pure append of what was already sent (or the client asks
+    for it) a full frame is sent instead so the client can resync.
+    """
+
+    def __init__(self, role='assistant', stream_id=None):
+        self.role = role
+        self.stream_id = stream_id or uuid.uuid4().hex
+        self.seq = 0
+        self._sent = ''
+        self._sent_bytes = 0
+        self._force_full = True
+        self.final = False
+
+    def request_resync(self):
+        """Make the next encoded frame a full frame"""
+        self._force_full = True
+
+    def encode(self, content, final=False):
+        """Encode the latest full content into a frame dict for MessageHandler.streamDelta"""
+        content = content or ''
+
+        if not self._force_full and content.startswith(self._sent):
+            op = 'append'
+            offset = self._sent_bytes
+            data = content[len(self._sent):]
+            self._sent_bytes += len(data.encode('utf-8'))
+        else:
+            op = 'full'
+            offset = 0
+            data = content
+            self._sent_bytes = len(data.encode('utf-8'))
+            self._force_full = False
+
+        self._sent = content
+        self.final = bool(final)
+        self.seq += 1
+
+        return {
+            'id': self.stream_id,
+            'seq': self.seq,
+            'op': op,
+            'offset': offset,
+            'data': data,
+            'final': bool(final),
+            'role': self.role
+        }
+
+    def catchup_frame(self):
+        """A full frame of everything sent so far, for a client joining mid-stream
+
+        Does not change the encoder state, so clients that are already in
+        step keep receiving appends.
+        """
+        return {
+            'id': self.stream_id,
+            'seq': self.seq,
+            'op': 'full',
+            'offset': 0,
+            'data': self._sent,
+            'final': self.final,
+            'role': self.role,
+            'catchup': True
+        }
+
+    @property
+    def content(self):
+        """The full content the client should hold after the last frame"""
+        return self._sent
+
+    @property
+    def byte_length(self):
+        """UTF-8 length of the content sent so far"""
+        return self._sent_bytes
+
+
+def merge_frame_args(earlier_args, later_args):
+    """Fold two queued streamDelta argument tuples of the same stream into one
+
+    Returns None when the later frame does not continue the earlier one.
+    """
+    earlier, later = earlier_args[0], later_args[0]
+    if earlier['id'] != later['id']:
+        return None
+
+    # A full frame supersedes everything queued before it
+    if later['op'] == 'full':
+        return later_args
+
+    earlier_end = earlier['offset'] + len(earlier['data'].encode('utf-8'))
+    if later['offset'] != earlier_end:
+        return None
+
+    merged = dict(later)
+    merged['op'] = earlier['op']
+    merged['offset'] = earlier['offset']
+    merged['data'] = earlier['data'] + later['data']
+    return (merged,)
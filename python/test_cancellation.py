@@ -0,0 +1,120 @@
+import queue
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+
+try:
+    from .cancellation import CancelToken, RunCancelled, close_stream
+except ImportError:
+    from cancellation import CancelToken, RunCancelled, close_stream
+
+
+class BlockingStream:
+    """An LLM stream whose read blocks until a chunk is fed or the stream is closed"""
+
+    def __init__(self):
+        self._chunks = queue.Queue()
+        self.closed = False
+
+    def feed(self, chunk):
+        self._chunks.put(chunk)
+
+    def close(self):
+        self.closed = True
+        self._chunks.put(None)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        chunk = self._chunks.get(timeout=5)
+        if chunk is None:
+            raise ConnectionError("response closed")
+        return chunk
+
+
+class CloseStreamTest(unittest.TestCase):
+
+    def test_closes_every_layer(self):
+        closed = []
+        response = SimpleNamespace(close=lambda: closed.append('http'))
+        inner = SimpleNamespace(response=response, close=lambda: closed.append('openai'))
+        stream = SimpleNamespace(completion_stream=inner, close=lambda: closed.append('litellm'))
+        self.assertTrue(close_stream(stream))
+        self.assertEqual(closed, ['litellm', 'openai', 'http'])
+
+    def test_nothing_to_close(self):
+        self.assertFalse(close_stream(iter([])))
+
+    def test_close_errors_are_swallowed(self):
+        def fail():
+            raise OSError("already closed")
+        self.assertFalse(close_stream(SimpleNamespace(close=fail)))
+
+
+class CancelTokenTest(unittest.TestCase):
+
+    def test_cancel_once(self):
+        token = CancelToken()
+        self.assertIsNone(token.latency())
+        self.assertTrue(token.cancel())
+        self.assertFalse(token.cancel())
+        self.assertTrue(token.cancelled)
+        self.assertGreaterEqual(token.latency(), 0)
+        with self.assertRaises(RunCancelled):
+            token.check()
+
+    def test_run_cancelled_unwinds_like_ctrl_c(self):
+        self.assertTrue(issubclass(RunCancelled, KeyboardInterrupt))
+
+    def test_cancel_closes_a_blocked_stream(self):
+        token = CancelToken()
+        stream = BlockingStream()
+        stream.feed('a')
+        received, outcome = [], []
+
+        def consume():
+            try:
+                for chunk in token.iterate(stream):
+                    received.append(chunk)
+            except RunCancelled:
+                outcome.append('cancelled')
+
+        reader = threading.Thread(target=consume)
+        reader.start()
+        while not received:
+            time.sleep(0.01)
+        # The reader is now blocked waiting for the next chunk
+        started = time.monotonic()
+        token.cancel()
+        reader.join(5)
+        self.assertFalse(reader.is_alive())
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertTrue(stream.closed)
+        self.assertEqual((received, outcome), (['a'], ['cancelled']))
+        self.assertEqual(token._streams, [])
+
+    def test_stream_attached_after_cancel_is_closed(self):
+        token = CancelToken()
+        token.cancel()
+        stream = BlockingStream()
+        with self.assertRaises(RunCancelled):
+            next(token.iterate(stream))
+        self.assertTrue(stream.closed)
+
+    def test_other_read_errors_are_raised(self):
+        token = CancelToken()
+        stream = BlockingStream()
+        stream.close()
+        with self.assertRaises(ConnectionError):
+            list(token.iterate(stream))
+
+    def test_finished_stream(self):
+        token = CancelToken()
+        self.assertEqual(list(token.iterate(['a', 'b'])), ['a', 'b'])
+        self.assertEqual(token._streams, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+
+try:
+    from .coder_wrapper import merge_file_deltas
+except ImportError:
+    from coder_wrapper import merge_file_deltas
+
+
+def delta(base_version, version, added=(), dropped=()):
+    return ({'base_version': base_version, 'version': version, 'added': list(added), 'dropped': list(dropped)},)
+
+
+def apply_delta(files, args):
+    frame = args[0]
+    return (set(files) - set(frame['dropped'])) | set(frame['added'])
+
+
+class MergeFileDeltasTest(unittest.TestCase):
+
+    def test_merged_delta_spans_both_versions(self):
+        merged = merge_file_deltas(delta(3, 4, added=['a.py']), delta(4, 5, added=['b.py'], dropped=['c.py']))[0]
+        self.assertEqual(merged, {'base_version': 3, 'version': 5, 'added': ['a.py', 'b.py'], 'dropped': ['c.py']})
+
+    def test_added_then_dropped(self):
+        merged = merge_file_deltas(delta(1, 2, added=['a.py']), delta(2, 3, dropped=['a.py']))[0]
+        self.assertEqual((merged['added'], merged['dropped']), ([], ['a.py']))
+
+    def test_dropped_then_added(self):
+        merged = merge_file_deltas(delta(1, 2, dropped=['a.py']), delta(2, 3, added=['a.py']))[0]
+        self.assertEqual((merged['added'], merged['dropped']), (['a.py'], []))
+
+    def test_merged_delta_applies_like_both(self):
+        start = {'a.py', 'b.py'}
+        first = delta(1, 2, added=['c.py'], dropped=['a.py'])
+        second = delta(2, 3, added=['a.py', 'd.py'], dropped=['c.py', 'b.py'])
+        self.assertEqual(apply_delta(start, merge_file_deltas(first, second)),
+                         apply_delta(apply_delta(start, first), second))
+
+
+if __name__ == '__main__':
+    unittest.main()
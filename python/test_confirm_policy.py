@@ -0,0 +1,92 @@
+import unittest
+
+try:
+    from .confirm_policy import ConfirmPolicy, ConfirmRule, normalize_answer
+except ImportError:
+    from confirm_policy import ConfirmPolicy, ConfirmRule, normalize_answer
+
+
+class NormalizeAnswerTest(unittest.TestCase):
+
+    def test_yes_answers(self):
+        for answer in (True, 'y', 'Yes', ' TRUE ', '1', 1):
+            self.assertIs(normalize_answer(answer), True, answer)
+
+    def test_no_answers(self):
+        for answer in (False, 'n', 'No', 'false', '0', 0):
+            self.assertIs(normalize_answer(answer), False, answer)
+
+    def test_dont_ask_again(self):
+        self.assertEqual(normalize_answer('d'), 'd')
+        self.assertEqual(normalize_answer("Don't"), 'd')
+
+    def test_unknown_answer(self):
+        with self.assertRaises(ValueError):
+            normalize_answer('maybe')
+
+
+class RuleMatchingTest(unittest.TestCase):
+
+    def test_first_matching_rule_wins(self):
+        policy = ConfirmPolicy(rules=[
+            {'group': 'urls', 'question': r'^Open URL', 'answer': 'n'},
+            {'group': 'add', 'question': r'add .* to the chat', 'answer': 'y'},
+            {'group': 'any', 'answer': 'n'},
+        ])
+        rule = policy.match('Add file.py to the chat?', None)
+        self.assertEqual(rule.group, 'add')
+        self.assertIs(rule.answer, True)
+        self.assertEqual(policy.match('Run shell command?', None).group, 'any')
+
+    def test_patterns_are_case_insensitive_searches(self):
+        rule = ConfirmRule(question='create new file')
+        self.assertTrue(rule.matches('Create New File foo.py?', None))
+        self.assertFalse(rule.matches('Delete file?', None))
+
+    def test_every_set_pattern_must_match(self):
+        rule = ConfirmRule(question='run', subject=r'\bpytest\b')
+        self.assertTrue(rule.matches('Run shell command?', 'pytest -q'))
+        self.assertFalse(rule.matches('Run shell command?', 'rm -rf build'))
+        self.assertFalse(rule.matches('Run shell command?', None))
+
+    def test_no_rule_matches(self):
+        policy = ConfirmPolicy(rules=[{'question': 'commit'}])
+        self.assertIsNone(policy.match('Add file?', None))
+
+    def test_hits_are_counted(self):
+        policy = ConfirmPolicy(rules=[{'question': 'add'}])
+        policy.match('Add a?', None)
+        policy.match('Add b?', None)
+        self.assertEqual(policy.get_rules()[0]['hits'], 2)
+
+    def test_invalid_rules_are_rejected(self):
+        policy = ConfirmPolicy()
+        for rules in ([{'question': '('}], [{'answer': 'maybe'}], [{'unknown': 1}]):
+            with self.assertRaises(ValueError):
+                policy.set_rules(rules)
+
+    def test_timeout_for(self):
+        policy = ConfirmPolicy(default_timeout=300)
+        self.assertEqual(policy.timeout_for(None), 300)
+        self.assertEqual(policy.timeout_for(ConfirmRule()), 300)
+        self.assertEqual(policy.timeout_for(ConfirmRule(timeout=5)), 5)
+        # A timeout of 0 waits forever
+        self.assertIsNone(policy.timeout_for(ConfirmRule(timeout=0)))
+
+
+class FallbackAnswerTest(unittest.TestCase):
+
+    def test_without_a_rule_the_answer_is_no(self):
+        self.assertIs(ConfirmPolicy.fallback_answer(None), False)
+
+    def test_rule_without_default_answers_no(self):
+        self.assertIs(ConfirmPolicy.fallback_answer(ConfirmRule(group='slow', timeout=10)), False)
+
+    def test_rule_default_is_used(self):
+        self.assertIs(ConfirmPolicy.fallback_answer(ConfirmRule(default='yes')), True)
+        self.assertIs(ConfirmPolicy.fallback_answer(ConfirmRule(default='n')), False)
+        self.assertEqual(ConfirmPolicy.fallback_answer(ConfirmRule(default='d')), 'd')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import tracemalloc
+import unittest
+
+try:
+    from .diagnostics import Diagnostics
+except ImportError:
+    from diagnostics import Diagnostics
+
+
+class DiagnosticsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.assertFalse(tracemalloc.is_tracing(), "tracing must be off before the test")
+        self.diagnostics = Diagnostics()
+        self.addCleanup(tracemalloc.stop)
+
+    def test_tracing_is_opt_in(self):
+        self.assertFalse(self.diagnostics.get_tracing_status()['tracing'])
+        self.assertIn('error', self.diagnostics.take_snapshot())
+        self.assertEqual(self.diagnostics.stop_tracing()['status'], 'info')
+
+    def test_start_and_stop(self):
+        status = self.diagnostics.start_tracing(frames=3)
+        self.assertEqual(status['status'], 'success')
+        self.assertEqual(status['traceback_limit'], 3)
+        self.assertEqual(self.diagnostics.start_tracing()['status'], 'info')
+        self.diagnostics.take_snapshot('a')
+        self.assertEqual(self.diagnostics.stop_tracing()['status'], 'success')
+        self.assertFalse(tracemalloc.is_tracing())
+        # Snapshots go with the tracing session
+        self.assertEqual(self.diagnostics.get_tracing_status()['snapshots'], [])
+
+    def test_compare_finds_the_growth(self):
+        self.diagnostics.start_tracing()
+        before = self.diagnostics.take_snapshot('before')['id']
+        grown = [bytearray(1024) for _ in range(200)]
+        after = self.diagnostics.take_snapshot('after')['id']
+
+        result = self.diagnostics.compare_snapshots(before, after, limit=5)
+        self.assertGreater(result['size_diff_bytes'], 150 * 1024)
+        self.assertTrue(any('test_diagnostics.py' in frame
+                            for stat in result['top'] for frame in stat['traceback']))
+        top = self.diagnostics.get_top_allocations(limit=3, key_type='filename')
+        self.assertEqual(len(top['top']), 3)
+        del grown
+
+    def test_invalid_requests(self):
+        self.diagnostics.start_tracing()
+        self.assertIn('error', self.diagnostics.get_top_allocations())
+        self.assertIn('error', self.diagnostics.get_top_allocations(key_type='bogus'))
+        self.assertIn('error', self.diagnostics.compare_snapshots(1, 2))
+        self.assertIn('error', self.diagnostics.delete_snapshot(99))
+
+    def test_snapshot_store_is_bounded(self):
+        self.diagnostics.MAX_SNAPSHOTS = 2
+        self.diagnostics.start_tracing()
+        ids = [self.diagnostics.take_snapshot(str(i))['id'] for i in range(3)]
+        stored = [snapshot['id'] for snapshot in self.diagnostics.get_tracing_status()['snapshots']]
+        self.assertEqual(stored, ids[1:])
+        self.assertEqual(self.diagnostics.delete_snapshot(ids[1])['status'], 'success')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,209 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from types import SimpleNamespace
+
+try:
+    from .file_reader import FileReader, LineIndex
+except ImportError:
+    from file_reader import FileReader, LineIndex
+
+
+class FileReaderTestCase(unittest.TestCase):
+    """A FileReader over a temporary directory standing in for the working tree"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.reader = FileReader(SimpleNamespace(repo=SimpleNamespace(working_tree_dir=self.root),
+                                                 log=lambda message: None))
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def write(self, name, data):
+        path = os.path.join(self.root, name)
+        with open(path, 'wb') as f:
+            f.write(data.encode('utf-8') if isinstance(data, str) else data)
+        return path
+
+
+class LineIndexTest(FileReaderTestCase):
+
+    def test_offsets_of_line_starts(self):
+        index = LineIndex.build(self.write('a.txt', 'ab\ncd\n\nef'))
+        self.assertEqual(list(index.offsets), [0, 3, 6, 7])
+        self.assertEqual(index.line_count, 4)
+
+    def test_trailing_newline_does_not_start_a_line(self):
+        index = LineIndex.build(self.write('a.txt', 'ab\ncd\n'))
+        self.assertEqual(list(index.offsets), [0, 3])
+        self.assertEqual(index.line_count, 2)
+
+    def test_empty_file(self):
+        self.assertEqual(LineIndex.build(self.write('a.txt', '')).line_count, 0)
+
+    def test_byte_range_is_clamped(self):
+        index = LineIndex.build(self.write('a.txt', 'ab\ncd\nef\n'))
+        self.assertEqual(index.byte_range(1, 2), (3, 6, 1, 2))
+        self.assertEqual(index.byte_range(1, None), (3, 9, 1, 3))
+        self.assertEqual(index.byte_range(5, 9), (9, 9, 3, 3))
+
+
+class RangedReadTest(FileReaderTestCase):
+
+    def test_byte_range_snaps_to_characters(self):
+        self.write('u.txt', 'aé€b')  # a(1) é(2) €(3) b(1)
+        result = self.reader.read_file_range('u.txt', 2, 5)
+        # Starting inside é moves forward to €; ending inside € keeps it whole only at the file end
+        self.assertEqual((result['start'], result['end'], result['content']), (3, 3, ''))
+        result = self.reader.read_file_range('u.txt', 1, 6)
+        self.assertEqual((result['content'], result['next']), ('é€', 6))
+
+    def test_line_range_and_next(self):
+        self.write('l.txt', ''.join(f'line {i}\n' for i in range(10)))
+        result = self.reader.read_file_range('l.txt', 2, 4, 'lines')
+        self.assertEqual(result['content'], 'line 2\nline 3\n')
+        self.assertEqual((result['start'], result['end'], result['next'], result['line_count']), (2, 4, 4, 10))
+        self.assertIsNone(self.reader.read_file_range('l.txt', 8, None, 'lines')['next'])
+
+    def test_clipped_line_range_ends_on_a_whole_line(self):
+        self.write('l.txt', ''.join(f'line {i}\n' for i in range(10)))
+        self.reader.MAX_RANGE_BYTES = 16
+        result = self.reader.read_file_range('l.txt', 0, None, 'lines')
+        self.assertEqual(result['content'], 'line 0\nline 1\n')
+        self.assertEqual(result['next'], 2)
+
+    def test_chunks_rebuild_the_file(self):
+        text = ''.join(f'{i} é€\n' for i in range(200))
+        self.write('c.txt', text)
+        parts, offset = [], 0
+        while offset is not None:
+            result = self.reader.read_file_chunk('c.txt', offset, 100)
+            parts.append(result['content'])
+            offset = result['next']
+        self.assertEqual(''.join(parts), text)
+
+    def test_invalid_requests(self):
+        self.write('a.txt', 'a\n')
+        self.assertIn('error', self.reader.read_file_range('a.txt', 0, 1, 'pages'))
+        self.assertIn('error', self.reader.read_file_range('a.txt', 3, 1))
+        self.assertIn('error', self.reader.read_file_range('missing.txt', 0, 1))
+
+    def test_index_follows_file_changes(self):
+        self.write('a.txt', 'a\nb\n')
+        self.assertEqual(self.reader.read_file_range('a.txt', 0, None, 'lines')['line_count'], 2)
+        self.write('a.txt', 'a\nb\nc\n')
+        self.assertEqual(self.reader.read_file_range('a.txt', 0, None, 'lines')['line_count'], 3)
+
+
+class FileInfoTest(FileReaderTestCase):
+
+    def test_small_file(self):
+        self.write('a.txt', 'a\nb\n')
+        info = self.reader.get_file_info('a.txt')
+        self.assertEqual((info['large'], info['line_count'], info['preview'], info['preview_truncated']),
+                         (False, 2, 'a\nb\n', False))
+
+    def test_large_file_preview_ends_on_a_line(self):
+        self.reader.LARGE_FILE_BYTES = 50
+        self.reader.PREVIEW_BYTES = 20
+        self.write('big.txt', 'line\n' * 30)
+        info = self.reader.get_file_info('big.txt')
+        self.assertTrue(info['large'])
+        self.assertIsNone(info['line_count'])
+        self.assertEqual(info['preview'], 'line\n' * 4)
+        self.assertTrue(info['preview_truncated'])
+
+    def test_binary_file(self):
+        self.write('b.bin', b'\x00\x01\x02')
+        self.assertTrue(self.reader.get_file_info('b.bin')['binary'])
+
+
+class ReadTextTest(FileReaderTestCase):
+
+    def test_etag_is_the_git_blob_hash(self):
+        self.write('a.txt', 'hello\n')
+        # git hash-object of "hello\n"
+        self.assertEqual(self.reader.read_text('a.txt'), ('hello\n', 'ce013625030ba8dba906f756967f9e9ca394464a'))
+
+    def test_matching_etag_is_not_modified(self):
+        self.write('a.txt', 'hello\n')
+        content, etag = self.reader.read_text('a.txt')
+        self.assertEqual(self.reader.read_text('a.txt', etag), (None, etag))
+        self.reader.forget('a.txt')
+        # Uncached, the etag is still checked before the file is decoded
+        self.assertEqual(self.reader.read_text('a.txt', etag), (None, etag))
+        self.assertEqual(self.reader.read_text('a.txt', 'stale'), (content, etag))
+
+    def test_change_gives_a_new_etag(self):
+        path = self.write('a.txt', 'one\n')
+        _, etag = self.reader.read_text('a.txt')
+        self.write('a.txt', 'two\n')
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000))
+        content, new_etag = self.reader.read_text('a.txt', etag)
+        self.assertEqual(content, 'two\n')
+        self.assertNotEqual(new_etag, etag)
+
+    def test_newlines_are_normalised(self):
+        self.write('a.txt', 'a\r\nb\rc\n')
+        self.assertEqual(self.reader.read_text('a.txt')[0], 'a\nb\nc\n')
+
+    def test_missing_and_non_utf8_files(self):
+        self.assertIsNone(self.reader.read_text('missing.txt'))
+        self.write('b.bin', b'\xff\xfe')
+        with self.assertRaises(UnicodeDecodeError):
+            self.reader.read_text('b.bin')
+
+    def test_cache_is_bounded(self):
+        self.reader.CACHE_BYTES = 6
+        self.reader.MAX_CACHED_FILE_BYTES = 6
+        self.write('a.txt', 'aaaa')
+        self.write('b.txt', 'bbbb')
+        self.write('c.txt', 'cccccccc')
+        for name in ('a.txt', 'b.txt', 'c.txt'):
+            self.reader.read_text(name)
+        # c.txt is too big to cache and a.txt was evicted to make room for b.txt
+        self.assertEqual([os.path.basename(path) for path in self.reader._contents], ['b.txt'])
+        self.assertEqual(self.reader._cached_bytes, 4)
+
+
+class EventLoopTest(FileReaderTestCase):
+    """RPC methods run on the event loop and must return plain values there"""
+
+    def test_calls_on_the_loop_return_plain_values(self):
+        self.reader.LARGE_FILE_BYTES = 50
+        self.write('small.txt', 'a\nb\n')
+        self.write('big.txt', 'line\n' * 30)
+
+        async def calls():
+            return [
+                self.reader.get_file_info('small.txt'),
+                self.reader.get_file_info('big.txt'),
+                self.reader.read_file_range('small.txt', 0, 1, 'lines'),
+                self.reader.read_file_range('big.txt', 0, 2, 'lines'),
+            ]
+
+        small_info, big_info, small_lines, big_lines = asyncio.run(calls())
+        for result in (small_info, big_info, small_lines, big_lines):
+            self.assertIsInstance(result, dict)
+        self.assertEqual(small_info['line_count'], 2)
+        self.assertEqual(small_lines['content'], 'a\n')
+        # The large file's index is built in the background; the client asks again
+        self.assertEqual(big_lines['status'], 'indexing')
+
+        deadline = time.monotonic() + 5
+        while True:
+            result = asyncio.run(calls())[3]
+            if result.get('status') != 'indexing' or time.monotonic() > deadline:
+                break
+            time.sleep(0.01)
+        self.assertEqual(result['content'], 'line\nline\n')
+        self.assertEqual(result['line_count'], 30)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,206 @@
+import os
+import unittest
+
+try:
+    from .git_diff import GitDiff
+except ImportError:
+    from git_diff import GitDiff
+
+
+def lines_of(result):
+    return [line for hunk in result['hunks'] for line in hunk['lines']]
+
+
+class ParseTest(unittest.TestCase):
+
+    def test_modified_lines_are_numbered_in_both_versions(self):
+        result = GitDiff._parse(
+            "diff --git a/f.py b/f.py\n"
+            "--- a/f.py\n"
+            "+++ b/f.py\n"
+            "@@ -2,3 +2,3 @@ def f():\n"
+            " a\n"
+            "-b\n"
+            "+B\n"
+            " c\n"
+        )
+        self.assertFalse(result['binary'])
+        self.assertEqual(result['additions'], 1)
+        self.assertEqual(result['deletions'], 1)
+        hunk = result['hunks'][0]
+        self.assertEqual((hunk['old_start'], hunk['old_lines'], hunk['new_start'], hunk['new_lines']), (2, 3, 2, 3))
+        self.assertEqual(hunk['header'], 'def f():')
+        self.assertEqual(hunk['lines'], [
+            {'type': 'context', 'old': 2, 'new': 2, 'text': 'a'},
+            {'type': 'del', 'old': 3, 'new': None, 'text': 'b'},
+            {'type': 'add', 'old': None, 'new': 3, 'text': 'B'},
+            {'type': 'context', 'old': 4, 'new': 4, 'text': 'c'},
+        ])
+
+    def test_only_newline_ends_a_line(self):
+        result = GitDiff._parse(
+            "@@ -1 +1 @@\n"
+            "-a\rb\x0cc d\n"
+            "+a\r\n"
+        )
+        self.assertEqual([line['text'] for line in lines_of(result)], ['a\rb\x0cc d', 'a\r'])
+        self.assertEqual((result['additions'], result['deletions']), (1, 1))
+
+    def test_counts_default_to_one(self):
+        hunk = GitDiff._parse("@@ -5 +5 @@\n-x\n+y\n")['hunks'][0]
+        self.assertEqual((hunk['old_lines'], hunk['new_lines']), (1, 1))
+
+    def test_empty_old_range_starts_after_its_line(self):
+        # Two lines inserted after line 3
+        result = GitDiff._parse("@@ -3,0 +4,2 @@\n+x\n+y\n")
+        self.assertEqual([(line['old'], line['new']) for line in lines_of(result)], [(None, 4), (None, 5)])
+        self.assertEqual(result['line_map'], [[1, 1, 3], [4, 6, None]])
+
+    def test_empty_new_range_starts_after_its_line(self):
+        # Lines 4 and 5 deleted, the new file goes on at line 4
+        result = GitDiff._parse("@@ -4,2 +3,0 @@\n-x\n-y\n")
+        self.assertEqual([(line['old'], line['new']) for line in lines_of(result)], [(4, None), (5, None)])
+        self.assertEqual(result['line_map'], [[1, 1, 3], [6, 4, None]])
+
+    def test_no_newline_marks_the_line_before_it(self):
+        result = GitDiff._parse(
+            "@@ -1,2 +1,2 @@\n"
+            " a\n"
+            "-b\n"
+            "\\ No newline at end of file\n"
+            "+b\n"
+        )
+        lines = lines_of(result)
+        self.assertTrue(lines[1]['no_newline'])
+        self.assertNotIn('no_newline', lines[0])
+        self.assertNotIn('no_newline', lines[2])
+        self.assertEqual(len(lines), 3)
+
+    def test_untracked_file_against_dev_null(self):
+        result = GitDiff._parse(
+            "diff --git a/dev/null b/new.txt\n"
+            "new file mode 100644\n"
+            "--- /dev/null\n"
+            "+++ b/new.txt\n"
+            "@@ -0,0 +1,2 @@\n"
+            "+one\n"
+            "+two\n"
+            "\\ No newline at end of file\n"
+        )
+        self.assertEqual(result['additions'], 2)
+        self.assertEqual([(line['old'], line['new']) for line in lines_of(result)], [(None, 1), (None, 2)])
+        self.assertTrue(lines_of(result)[-1]['no_newline'])
+        self.assertEqual(result['line_map'], [[1, 3, None]])
+
+    def test_reversed_diff_swaps_additions_and_deletions(self):
+        # What diff -R prints for the untracked file above
+        result = GitDiff._parse(
+            "--- b/new.txt\n"
+            "+++ /dev/null\n"
+            "@@ -1,2 +0,0 @@\n"
+            "-one\n"
+            "-two\n"
+        )
+        self.assertEqual((result['additions'], result['deletions']), (0, 2))
+        self.assertEqual([(line['old'], line['new']) for line in lines_of(result)], [(1, None), (2, None)])
+        self.assertEqual(result['line_map'], [[3, 1, None]])
+
+    def test_binary_files_have_no_hunks(self):
+        result = GitDiff._parse("diff --git a/x.png b/x.png\nBinary files a/x.png and b/x.png differ\n")
+        self.assertTrue(result['binary'])
+        self.assertEqual(result['hunks'], [])
+
+    def test_no_output_means_no_changes(self):
+        result = GitDiff._parse('')
+        self.assertEqual(result['hunks'], [])
+        self.assertEqual(result['line_map'], [[1, 1, None]])
+
+
+class LineMapTest(unittest.TestCase):
+
+    def test_unchanged_segments_between_hunks(self):
+        result = GitDiff._parse(
+            "@@ -2,3 +2,4 @@\n"
+            " a\n"
+            "+new\n"
+            " b\n"
+            " c\n"
+            "@@ -10,3 +11,2 @@\n"
+            " x\n"
+            "-y\n"
+            " z\n"
+        )
+        # Context lines next to the untouched runs are merged into them
+        self.assertEqual(result['line_map'], [[1, 1, 2], [3, 4, 8], [12, 12, 1], [13, 13, None]])
+
+    def test_adjacent_segments_are_merged(self):
+        hunks = [{'old_start': 3, 'old_lines': 1, 'new_start': 3, 'new_lines': 1, 'lines': [
+            {'type': 'context', 'old': 3, 'new': 3, 'text': 'c'}
+        ]}]
+        self.assertEqual(GitDiff._line_map(hunks), [[1, 1, 3], [4, 4, None]])
+
+    def test_change_on_the_first_line(self):
+        result = GitDiff._parse("@@ -1 +1,2 @@\n-a\n+b\n+c\n")
+        self.assertEqual(result['line_map'], [[2, 3, None]])
+
+
+class RunDiffTest(unittest.TestCase):
+    """The git command lines _run_diff builds, with git itself replaced by a recorder"""
+
+    class RecordingDiff(GitDiff):
+
+        def __init__(self, untracked=False):
+            super().__init__(None)
+            self.calls = []
+            self.untracked = untracked
+
+        def _git(self, args):
+            self.calls.append(args)
+            return ''
+
+        def _is_untracked(self, file_path):
+            return self.untracked
+
+    def run_diff(self, from_version, to_version, untracked=False):
+        diff = self.RecordingDiff(untracked)
+        from_commit = 'a' * 40 if from_version not in ('working', 'index') else None
+        to_commit = 'b' * 40 if to_version not in ('working', 'index') else None
+        diff._run_diff('f.txt', from_version, to_version, from_commit, to_commit, 'histogram', 3)
+        return diff.calls
+
+    def test_commit_to_working(self):
+        args = self.run_diff('HEAD', 'working')[0]
+        self.assertEqual(args[-3:], ['a' * 40, '--', 'f.txt'])
+        self.assertNotIn('-R', args)
+        self.assertNotIn('--cached', args)
+
+    def test_commit_to_index_uses_cached(self):
+        args = self.run_diff('HEAD', 'index')[0]
+        self.assertIn('--cached', args)
+        self.assertNotIn('-R', args)
+
+    def test_working_to_commit_is_reversed(self):
+        args = self.run_diff('working', 'HEAD')[0]
+        self.assertIn('-R', args)
+        self.assertEqual(args[-2:], ['--', 'f.txt'])
+        self.assertIn('b' * 40, args)
+
+    def test_same_side_versions_have_no_diff(self):
+        self.assertEqual(self.run_diff('working', 'working'), [])
+        self.assertEqual(self.run_diff('index', 'index'), [])
+
+    def test_untracked_file_is_diffed_against_dev_null(self):
+        calls = self.run_diff('HEAD', 'working', untracked=True)
+        self.assertEqual(len(calls), 2)
+        self.assertIn('--no-index', calls[1])
+        self.assertEqual(calls[1][-3:], ['--', os.devnull, 'f.txt'])
+        self.assertNotIn('-R', calls[1])
+
+    def test_reversed_untracked_file(self):
+        calls = self.run_diff('working', 'HEAD', untracked=True)
+        self.assertIn('-R', calls[1])
+        self.assertEqual(calls[1][-3:], ['--', os.devnull, 'f.txt'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+try:
+    from .git_operations_basic import GitBasicOperations
+except ImportError:
+    from git_operations_basic import GitBasicOperations
+
+
+@unittest.skipIf(shutil.which('git') is None, "needs the git command")
+class BulkOperationsTest(unittest.TestCase):
+    """stage_files, unstage_files and discard_changes_for_files against a scratch repository"""
+
+    FILES = ('a.txt', 'b.txt', 'c.txt', 'my file[1].txt', 'my file1.txt')
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.git('init', '-q')
+        self.git('config', 'user.email', 'test@example.com')
+        self.git('config', 'user.name', 'Test')
+        for name in self.FILES:
+            self.write(name, name + '\n')
+        self.git('add', '.')
+        self.git('commit', '-q', '-m', 'initial')
+        self.ops = GitBasicOperations(SimpleNamespace(repo=SimpleNamespace(working_tree_dir=self.root),
+                                                      log=lambda message: None))
+
+    def git(self, *args):
+        return subprocess.run(['git'] + list(args), cwd=self.root, check=True,
+                              capture_output=True, text=True).stdout
+
+    def write(self, name, content):
+        with open(os.path.join(self.root, name), 'w') as f:
+            f.write(content)
+
+    def staged(self):
+        return self.git('diff', '--cached', '--name-status').splitlines()
+
+    def test_stage_files(self):
+        self.write('a.txt', 'changed\n')
+        os.remove(os.path.join(self.root, 'b.txt'))
+        self.write('d.txt', 'new\n')
+
+        result = self.ops.stage_files(['a.txt', 'b.txt', 'd.txt', 'c.txt', 'missing.txt', 'a.txt'])
+        self.assertEqual(result['status'], 'partial')
+        self.assertEqual((result['succeeded'], result['failed']), (3, 2))
+        # Duplicates are dropped and the request order is kept
+        self.assertEqual(list(result['results']), ['a.txt', 'b.txt', 'd.txt', 'c.txt', 'missing.txt'])
+        self.assertEqual(result['results']['c.txt'], {"error": "File c.txt has no changes to stage"})
+        self.assertEqual(result['results']['missing.txt'], {"error": "File missing.txt does not exist"})
+        self.assertEqual(self.staged(), ['M\ta.txt', 'D\tb.txt', 'A\td.txt'])
+
+    def test_paths_are_literal(self):
+        self.write('my file[1].txt', 'changed\n')
+        self.write('my file1.txt', 'changed\n')
+        # As a glob, "my file[1].txt" would also match "my file1.txt"
+        result = self.ops.stage_files(['my file[1].txt'])
+        self.assertEqual(result['status'], 'success')
+        self.assertEqual(self.staged(), ['M\tmy file[1].txt'])
+
+    def test_long_pathspec_queries_the_whole_tree(self):
+        self.ops.MAX_STATUS_PATHSPEC_CHARS = 0
+        self.write('a.txt', 'changed\n')
+        result = self.ops.stage_files(['a.txt', 'c.txt'])
+        self.assertEqual(result['results'], {'a.txt': {"status": "success"},
+                                             'c.txt': {"error": "File c.txt has no changes to stage"}})
+
+    def test_unstage_files(self):
+        self.write('a.txt', 'changed\n')
+        self.write('d.txt', 'new\n')
+        self.git('add', 'a.txt', 'd.txt')
+
+        result = self.ops.unstage_files(['a.txt', 'd.txt', 'c.txt'])
+        self.assertEqual(result['results'], {'a.txt': {"status": "success"},
+                                             'd.txt': {"status": "success"},
+                                             'c.txt': {"error": "File c.txt is not staged"}})
+        self.assertEqual(self.staged(), [])
+        # Unstaging keeps the working tree changes
+        with open(os.path.join(self.root, 'a.txt')) as f:
+            self.assertEqual(f.read(), 'changed\n')
+
+    def test_discard_changes_for_files(self):
+        self.write('a.txt', 'changed\n')
+        os.remove(os.path.join(self.root, 'b.txt'))
+        self.write('d.txt', 'new\n')
+
+        result = self.ops.discard_changes_for_files(['a.txt', 'b.txt', 'd.txt'])
+        self.assertEqual(result['status'], 'partial')
+        # Untracked files are never deleted
+        self.assertEqual(result['results']['d.txt'], {"error": "File d.txt has no changes to discard"})
+        self.assertTrue(os.path.exists(os.path.join(self.root, 'd.txt')))
+        self.assertEqual(self.git('status', '--porcelain'), '?? d.txt\n')
+
+    def test_nothing_applies(self):
+        result = self.ops.discard_changes_for_files(['c.txt'])
+        self.assertEqual((result['status'], result['succeeded']), ('failed', 0))
+
+    def test_no_repository(self):
+        self.ops.repo.repo = None
+        self.assertIn('error', self.ops.stage_files(['a.txt']))
+
+
+if __name__ == '__main__':
+    unittest.main()
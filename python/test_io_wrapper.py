@@ -0,0 +1,66 @@
+import unittest
+
+try:
+    from .confirm_policy import ConfirmPolicy
+    from .io_wrapper import IOWrapper
+except ImportError:
+    from confirm_policy import ConfirmPolicy
+    from io_wrapper import IOWrapper
+
+
+class FakeIO:
+    """The parts of aider's InputOutput that IOWrapper hooks"""
+
+    def __init__(self):
+        self.never_prompts = set()
+        self.history = []
+        self.asked = []
+
+    def append_chat_history(self, text, linebreak=False, blockquote=False):
+        self.history.append(text)
+
+    def confirm_ask(self, question, default=None, subject=None, explicit_yes_required=False, group=None,
+                    allow_never=False):
+        self.asked.append(question)
+        return False
+
+    def assistant_output(self, *args, **kwargs):
+        pass
+
+    def tool_output(self, *args, **kwargs):
+        pass
+
+    tool_error = tool_warning = print = tool_output
+
+
+class ConfirmAskRulesTest(unittest.TestCase):
+    """Rule answers, without an event loop to reach the webapp through"""
+
+    def setUp(self):
+        self.io = FakeIO()
+        self.wrapper = IOWrapper(self.io, confirm_policy=ConfirmPolicy(rules=[
+            {'group': 'add', 'question': 'add', 'answer': 'y'},
+            {'group': 'urls', 'question': 'open url', 'answer': 'd'},
+        ]))
+        self.wrapper.main_loop = None
+
+    def test_rule_answer_is_recorded_in_the_chat_history(self):
+        self.assertIs(self.io.confirm_ask('Add a.py to the chat?'), True)
+        self.assertEqual(self.io.history, ['Add a.py to the chat? y'])
+        self.assertEqual(self.io.asked, [])
+
+    def test_rule_never_says_yes_when_explicit_yes_is_required(self):
+        self.assertIs(self.io.confirm_ask('Add a.py to the chat?', explicit_yes_required=True), False)
+        # Asked the user instead, through aider's own prompt here
+        self.assertEqual(self.io.asked, ['Add a.py to the chat?'])
+        self.assertEqual(self.io.history, [])
+        self.assertEqual(self.wrapper.confirm_policy.auto_answered, 0)
+
+    def test_dont_ask_again_rule(self):
+        self.assertIs(self.io.confirm_ask('Open URL for more info?', allow_never=True), False)
+        self.assertIn(('Open URL for more info?', None), self.io.never_prompts)
+        self.assertEqual(self.io.history, ['Open URL for more info? d'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+import threading
+import unittest
+
+try:
+    from .job_queue import CoderJob, CoderJobQueue
+except ImportError:
+    from job_queue import CoderJob, CoderJobQueue
+
+
+class JobQueueTest(unittest.TestCase):
+    """The queue runs a real worker thread; the first job is held so the rest stay queued"""
+
+    def setUp(self):
+        self.ran = []
+        self.done = []
+        self.release = threading.Event()
+        self.started = threading.Event()
+        self.queue = CoderJobQueue(self.run_job, self.job_done, name='TestCoderRunThread')
+
+    def tearDown(self):
+        self.release.set()
+        self.queue.close()
+
+    def run_job(self, job):
+        self.ran.append(job.message)
+        if job.message == 'hold':
+            self.started.set()
+            self.release.wait(5)
+        if job.message == 'fail':
+            raise RuntimeError('boom')
+        if job.message == 'interrupt':
+            raise KeyboardInterrupt()
+
+    def job_done(self, job):
+        # The queue's lock must be free while the callback runs
+        self.assertTrue(self.queue._cond.acquire(timeout=1))
+        self.queue._cond.release()
+        self.done.append((job.message, job.status))
+
+    def hold_worker(self):
+        job = self.queue.submit('hold')
+        self.assertTrue(self.started.wait(5))
+        return job
+
+    def finish(self):
+        self.release.set()
+        self.assertTrue(self.queue.wait_idle(5))
+
+    def queued_messages(self):
+        return [job['message'] for job in self.queue.list_jobs()['queued']]
+
+    def test_higher_priority_first_then_submission_order(self):
+        self.hold_worker()
+        self.queue.submit('a')
+        self.queue.submit('b', priority=1)
+        self.queue.submit('c')
+        self.queue.submit('d', priority=1)
+        self.assertEqual(self.queued_messages(), ['b', 'd', 'a', 'c'])
+        self.finish()
+        self.assertEqual(self.ran, ['hold', 'b', 'd', 'a', 'c'])
+
+    def test_reorder(self):
+        self.hold_worker()
+        a = self.queue.submit('a')
+        self.queue.submit('b')
+        c = self.queue.submit('c')
+        self.queue.reorder(c.id, position=0)
+        self.assertEqual(self.queued_messages(), ['c', 'a', 'b'])
+        self.assertEqual(self.queue.position(c.id), 0)
+        # Without a position the job is placed by its new priority
+        self.queue.reorder(a.id, priority=5)
+        self.assertEqual(self.queued_messages(), ['a', 'c', 'b'])
+        self.assertIsNone(self.queue.reorder('missing', position=0))
+
+    def test_cancel_queued_job(self):
+        self.hold_worker()
+        a = self.queue.submit('a')
+        self.queue.submit('b')
+        cancelled = self.queue.cancel(a.id)
+        self.assertIs(cancelled, a)
+        self.assertEqual(a.status, CoderJob.CANCELLED)
+        self.assertTrue(a.cancel_token.cancelled)
+        self.assertIsNone(self.queue.cancel(a.id))
+        self.finish()
+        self.assertEqual(self.ran, ['hold', 'b'])
+        finished = {job['message']: job['status'] for job in self.queue.list_jobs()['finished']}
+        self.assertEqual(finished['a'], CoderJob.CANCELLED)
+
+    def test_cancelled_queued_job_is_reported_done(self):
+        self.hold_worker()
+        a = self.queue.submit('a')
+        self.queue.cancel(a.id)
+        self.assertEqual(self.done, [('a', CoderJob.CANCELLED)])
+        self.release.set()
+        # on_job_done runs after the queue goes idle, so close and join the worker first
+        self.queue.close()
+        self.queue.worker.join(5)
+        self.assertEqual(self.done, [('a', CoderJob.CANCELLED), ('hold', CoderJob.DONE)])
+
+    def test_running_job_cancelled_by_its_token(self):
+        job = self.hold_worker()
+        job.cancel_token.cancel()
+        self.finish()
+        self.assertEqual(job.status, CoderJob.CANCELLED)
+        self.assertIsNotNone(job.cancel_latency)
+
+    def test_outcomes(self):
+        done = self.queue.submit('ok')
+        failed = self.queue.submit('fail')
+        interrupted = self.queue.submit('interrupt')
+        self.finish()
+        self.assertEqual(done.status, CoderJob.DONE)
+        self.assertEqual((failed.status, failed.error), (CoderJob.FAILED, 'boom'))
+        # An interrupt ends the job, not the worker
+        self.assertEqual(interrupted.status, CoderJob.CANCELLED)
+        after = self.queue.submit('after')
+        self.assertTrue(self.queue.wait_idle(5))
+        self.assertEqual(after.status, CoderJob.DONE)
+        self.assertEqual(self.queue.get_metrics()['completed'], 4)
+
+    def test_close_cancels_queued_jobs(self):
+        self.hold_worker()
+        a = self.queue.submit('a')
+        self.queue.close()
+        self.assertEqual(a.status, CoderJob.CANCELLED)
+        self.release.set()
+        self.queue.worker.join(5)
+        self.assertFalse(self.queue.worker.is_alive())
+        self.assertEqual(self.ran, ['hold'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import gzip
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+import uuid
+from unittest import mock
+
+try:
+    from .logger import Logger
+except ImportError:
+    from logger import Logger
+
+
+def wait_for(condition, timeout=5):
+    """Poll until the listener thread has done what condition checks for"""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+class LoggerFilesTest(unittest.TestCase):
+    """Loggers writing into a temporary directory; the budget only sees files there"""
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.loggers = []
+        self.saved = (Logger.MAX_BYTES, Logger.BACKUP_COUNT, Logger.DISK_BUDGET)
+        log_files = Logger._log_files
+        patcher = mock.patch.object(
+            Logger, '_log_files', lambda: [f for f in log_files() if f[0].startswith(self.dir)])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        # Let the listener finish with this test's files before they are removed
+        for name, path in self.loggers:
+            self.flush(name, path)
+        Logger.MAX_BYTES, Logger.BACKUP_COUNT, Logger.DISK_BUDGET = self.saved
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def new_logger(self):
+        name = f"Test{uuid.uuid4().hex[:8]}"
+        path = os.path.join(self.dir, f"{name.lower()}.log")
+        self.loggers.append((name, path))
+        return name, path, Logger.get_logger(name, path)
+
+    def flush(self, name, path):
+        """Wait until everything queued before now has been handled by the listener"""
+        marker = f"flush {uuid.uuid4().hex}"
+        Logger.info(marker, name=name)
+
+        def written():
+            try:
+                with open(path) as f:
+                    return marker in f.read()
+            except OSError:
+                return False
+        self.assertTrue(wait_for(written))
+
+    def test_rotates_into_gzip_backups(self):
+        Logger.MAX_BYTES = 2000
+        Logger.BACKUP_COUNT = 2
+        name, path, _ = self.new_logger()
+        for i in range(200):
+            Logger.info("line %d %s", i, 'x' * 40, name=name)
+        self.flush(name, path)
+        self.assertTrue(os.path.exists(path + '.2.gz'))
+        with gzip.open(path + '.1.gz', 'rt') as f:
+            self.assertIn('line', f.read())
+        self.assertFalse(os.path.exists(path + '.3.gz'))
+        self.assertLessEqual(os.path.getsize(path), 2000)
+
+    def test_oldest_backups_go_first(self):
+        _, path, _ = self.new_logger()
+        for n, age in ((1, 100), (2, 200)):
+            with open(f"{path}.{n}.gz", 'wb') as f:
+                f.write(b'x' * 1000)
+            os.utime(f"{path}.{n}.gz", (time.time() - age, time.time() - age))
+        Logger.configure(disk_budget=1500)
+        self.assertTrue(wait_for(lambda: not os.path.exists(path + '.2.gz')))
+        self.assertTrue(os.path.exists(path + '.1.gz'))
+
+    def test_live_file_is_truncated_when_backups_are_not_enough(self):
+        name, path, _ = self.new_logger()
+        Logger.info('x' * 3000, name=name)
+        self.assertTrue(wait_for(lambda: os.path.exists(path) and os.path.getsize(path) > 3000))
+        Logger.configure(disk_budget=1000)
+        self.assertTrue(wait_for(lambda: os.path.getsize(path) == 0))
+        # Appending continues at the new end of the file
+        Logger.info('after', name=name)
+        self.assertTrue(wait_for(lambda: os.path.getsize(path) > 0))
+        with open(path) as f:
+            self.assertNotIn('\0', f.read())
+
+    def test_budget_is_enforced_on_the_listener_thread(self):
+        threads = []
+        with mock.patch.object(Logger, '_enforce_disk_budget',
+                               side_effect=lambda: threads.append(threading.current_thread())):
+            self.new_logger()
+            Logger.configure(disk_budget=Logger.DISK_BUDGET)
+            self.assertTrue(wait_for(lambda: len(threads) >= 2))
+        self.assertNotIn(threading.current_thread(), threads)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+import asyncio
+import unittest
+
+try:
+    from .outbound_queue import OutboundHub, OutboundMessage, OutboundQueue, merge_latest
+except ImportError:
+    from outbound_queue import OutboundHub, OutboundMessage, OutboundQueue, merge_latest
+
+
+class FakeCallTable:
+    """A get_call() table whose calls can be held to make the queue back up (create it on the loop)"""
+
+    def __init__(self):
+        self.sent = []
+        self.release = asyncio.Event()
+        self.release.set()
+
+    def __getitem__(self, method):
+        async def call(*args):
+            await self.release.wait()
+            self.sent.append((method,) + args)
+            return {}
+        return call
+
+
+class OutboundQueueTest(unittest.TestCase):
+
+    def run_queue(self, scenario, maxsize=4):
+        """Run scenario(queue, calls) on a fresh loop and return what was sent"""
+        async def main():
+            calls = FakeCallTable()
+            queue = OutboundQueue('test', lambda: calls, maxsize=maxsize)
+            await scenario(queue, calls)
+            # Let the writer drain
+            for _ in range(50):
+                if not queue.get_stats()['depth']:
+                    break
+                await asyncio.sleep(0.01)
+            self.stats = queue.get_stats()
+            queue.close()
+            return calls.sent
+
+        return asyncio.run(main())
+
+    def test_messages_are_sent_in_order(self):
+        async def scenario(queue, calls):
+            for i in range(3):
+                queue.put(OutboundMessage('M.x', (i,)))
+
+        self.assertEqual(self.run_queue(scenario), [('M.x', 0), ('M.x', 1), ('M.x', 2)])
+        self.assertEqual(self.stats['sent'], 3)
+
+    def test_droppable_frames_are_evicted_when_full(self):
+        async def scenario(queue, calls):
+            calls.release.clear()
+            queue.put(OutboundMessage('M.first', ()))
+            await asyncio.sleep(0)  # The writer takes it and waits on the client
+            for i in range(3):
+                queue.put(OutboundMessage('M.frame', (i,), droppable=True))
+            queue.put(OutboundMessage('M.out', ('a',)))
+            # Full: the oldest frame makes room, for output and for frames alike
+            queue.put(OutboundMessage('M.out', ('b',)))
+            queue.put(OutboundMessage('M.frame', (9,), droppable=True))
+            calls.release.set()
+
+        sent = self.run_queue(scenario)
+        self.assertEqual(sent, [('M.first',), ('M.frame', 2), ('M.out', 'a'), ('M.out', 'b'), ('M.frame', 9)])
+        self.assertEqual(self.stats['dropped'], 2)
+        self.assertEqual(self.stats['high_water'], 4)
+
+    def test_non_droppable_messages_are_never_dropped(self):
+        async def scenario(queue, calls):
+            calls.release.clear()
+            for i in range(6):
+                queue.put(OutboundMessage('M.out', (i,)))
+            # A frame arriving at a queue full of output is the one dropped
+            queue.put(OutboundMessage('M.frame', ('x',), droppable=True))
+            calls.release.set()
+
+        sent = self.run_queue(scenario)
+        self.assertEqual(sent, [('M.out', i) for i in range(6)])
+        self.assertEqual(self.stats['dropped'], 1)
+
+    def test_merges_into_the_tail(self):
+        async def scenario(queue, calls):
+            calls.release.clear()
+            queue.put(OutboundMessage('M.first', ()))
+            await asyncio.sleep(0)
+            for i in range(3):
+                queue.put(OutboundMessage('M.refresh', (i,), merge_key='refresh', merge=merge_latest))
+            queue.put(OutboundMessage('M.out', ()))
+            # Not the tail any more, so this one queues behind M.out
+            queue.put(OutboundMessage('M.refresh', (5,), merge_key='refresh', merge=merge_latest))
+            calls.release.set()
+
+        sent = self.run_queue(scenario)
+        self.assertEqual(sent, [('M.first',), ('M.refresh', 2), ('M.out',), ('M.refresh', 5)])
+        self.assertEqual(self.stats['merged'], 2)
+
+    def test_failed_send_does_not_stop_the_writer(self):
+        class Failing(FakeCallTable):
+            def __getitem__(self, method):
+                if method == 'M.bad':
+                    raise KeyError(method)
+                return super().__getitem__(method)
+
+        async def main():
+            failing = Failing()
+            queue = OutboundQueue('test', lambda: failing)
+            queue.put(OutboundMessage('M.bad', ()))
+            queue.put(OutboundMessage('M.good', ()))
+            await asyncio.sleep(0.05)
+            stats = queue.get_stats()
+            queue.close()
+            return failing, stats
+
+        failing, stats = asyncio.run(main())
+        self.assertEqual(failing.sent, [('M.good',)])
+        self.assertEqual((stats['errors'], stats['sent']), (1, 1))
+
+    def test_hub_push_from_another_thread(self):
+        class Wrapper:
+            main_loop = None
+
+            def __init__(self):
+                self.calls = FakeCallTable()
+
+            def get_call(self):
+                return self.calls
+
+            def get_remotes(self):
+                return {'a': None, 'b': None}
+
+        async def main():
+            wrapper = Wrapper()
+            wrapper.main_loop = asyncio.get_running_loop()
+            hub = OutboundHub(wrapper)
+            await asyncio.get_running_loop().run_in_executor(None, lambda: hub.push('M.x', 1))
+            await asyncio.sleep(0.05)
+            return wrapper.calls, hub.get_stats()
+
+        calls, stats = asyncio.run(main())
+        # One send reaches every client through get_call()
+        self.assertEqual(calls.sent, [('M.x', 1)])
+        self.assertEqual((stats['sent'], stats['clients']), (1, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
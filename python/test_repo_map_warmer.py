@@ -0,0 +1,131 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+
+try:
+    from .job_queue import CoderJobQueue
+    from .repo_map_warmer import RepoMapWarmer
+except ImportError:
+    from job_queue import CoderJobQueue
+    from repo_map_warmer import RepoMapWarmer
+
+
+class FakeRepoMap:
+    """Records get_tags calls; files named bad* fail to parse"""
+
+    def __init__(self):
+        self.parsed = []
+        self.lock = threading.Lock()
+
+    def get_tags(self, fname, rel_fname):
+        if os.path.basename(fname).startswith('bad'):
+            raise ValueError("parse error")
+        with self.lock:
+            self.parsed.append(rel_fname)
+        return []
+
+
+class FakeCoder:
+
+    def __init__(self, root, fnames, repo_map):
+        self.root = root
+        self.fnames = fnames
+        self.repo_map = repo_map
+
+    def get_all_abs_files(self):
+        return [os.path.join(self.root, fname) for fname in self.fnames]
+
+    def get_rel_fname(self, fname):
+        return os.path.relpath(fname, self.root)
+
+
+class RepoMapWarmerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.fnames = ['a.py', 'b.py', 'bad.py']
+        for fname in self.fnames:
+            with open(os.path.join(self.root, fname), 'w') as f:
+                f.write('x = 1\n')
+        self.repo_map = FakeRepoMap()
+        self.release = threading.Event()
+        self.release.set()
+        self.job_queue = CoderJobQueue(lambda job: self.release.wait(5))
+        self.addCleanup(self.job_queue.close)
+        self.coder_wrapper = SimpleNamespace(
+            coder=FakeCoder(self.root, self.fnames, self.repo_map), job_queue=self.job_queue)
+        self.warmer = RepoMapWarmer(self.coder_wrapper)
+        self.warmer.IDLE_POLL = 0.05
+        self.addCleanup(self.warmer.close)
+
+    def test_warm_up_parses_every_file(self):
+        self.assertEqual(self.warmer.get_status()['state'], 'idle')
+        self.assertEqual(self.warmer.warm_up()['total'], 3)
+        self.assertTrue(wait_until(lambda: self.warmer.get_status()['state'] == 'ready'))
+        status = self.warmer.get_status()
+        self.assertEqual((status['done'], status['failed'], status['pending']), (2, 1, 0))
+        self.assertEqual(sorted(self.repo_map.parsed), ['a.py', 'b.py'])
+
+    def test_waits_for_a_running_job(self):
+        self.release.clear()
+        self.job_queue.submit('run')
+        self.assertTrue(wait_until(self.job_queue.is_busy))
+        self.warmer.warm_up()
+        self.assertTrue(wait_until(lambda: self.warmer.get_status()['state'] == 'paused'))
+        self.assertEqual(self.repo_map.parsed, [])
+
+        self.release.set()
+        self.assertTrue(wait_until(lambda: self.warmer.get_status()['state'] == 'ready'))
+        self.assertEqual(len(self.repo_map.parsed), 2)
+
+    def test_refresh_reparses_changed_files(self):
+        self.warmer.warm_up()
+        self.assertTrue(wait_until(lambda: self.warmer.get_status()['state'] == 'ready'))
+        del self.repo_map.parsed[:]
+
+        # Missing files are skipped; relative paths resolve against the coder root
+        result = self.warmer.refresh(['a.py', os.path.join(self.root, 'b.py'), 'gone.py'])
+        self.assertEqual(result, {'queued': 2})
+        self.assertTrue(wait_until(lambda: self.warmer.get_status()['refreshed'] == 2))
+        self.assertEqual(sorted(self.repo_map.parsed), ['a.py', 'b.py'])
+        # A refresh does not change the warm-up totals
+        self.assertEqual(self.warmer.get_status()['total'], 3)
+
+    def test_git_internals_are_ignored(self):
+        self.warmer.refresh_file(os.path.join(self.root, '.git', 'index'))
+        self.assertEqual(self.warmer.get_status()['refreshed'], 0)
+        self.assertIsNone(self.warmer._executor)
+
+    def test_pending_files_are_not_queued_twice(self):
+        self.release.clear()
+        self.job_queue.submit('run')
+        self.assertTrue(wait_until(self.job_queue.is_busy))
+        self.assertEqual(self.warmer.warm_up()['total'], 3)
+        self.assertEqual(self.warmer.refresh(['a.py']), {'queued': 0})
+        self.release.set()
+
+    def test_no_repo_map(self):
+        self.coder_wrapper.coder.repo_map = None
+        self.assertEqual(self.warmer.warm_up()['state'], 'disabled')
+        self.assertEqual(self.warmer.refresh(['a.py']), {'queued': 0})
+
+    def test_close_stops_scheduling(self):
+        self.warmer.close()
+        self.assertEqual(self.warmer.warm_up()['total'], 0)
+        self.assertEqual(self.warmer.refresh(['a.py']), {'queued': 0})
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+try:
+    from .job_queue import CoderJob
+    from .run_metrics import RunMetrics, RunMetricsStore
+except ImportError:
+    from job_queue import CoderJob
+    from run_metrics import RunMetrics, RunMetricsStore
+
+
+def finished_run(session_id=None, status='done'):
+    metrics = RunMetrics(CoderJob('fix the bug'), session_id=session_id)
+    metrics.finish(status)
+    return metrics
+
+
+class RunMetricsTest(unittest.TestCase):
+
+    def test_marks_are_relative_to_the_start(self):
+        metrics = RunMetrics(CoderJob('hello'))
+        metrics.mark_request()
+        metrics.mark_request()
+        metrics.mark_stream_update(0)
+        metrics.mark_stream_update(5)
+        time.sleep(0.02)
+        metrics.mark_stream_update(40, final=True)
+        metrics.set_tokens(100, 20)
+        metrics.add_edit_apply(0.5)
+        metrics.add_edit_apply(0.25)
+        metrics.add_commit(0.1)
+        metrics.finish('done')
+
+        run = metrics.to_dict()
+        self.assertEqual((run['status'], run['message_chars'], run['requests']), ('done', 5, 2))
+        # An empty update is not the first token
+        self.assertGreaterEqual(run['first_token'], run['request_start'])
+        self.assertGreaterEqual(run['ttft'], 0)
+        self.assertGreaterEqual(run['stream_time'], 0.02)
+        self.assertEqual(run['stream_chars'], 40)
+        self.assertEqual(run['tokens_per_sec'], round(20 / (metrics.last_token - metrics.first_token), 2))
+        self.assertEqual((run['edit_apply'], run['commit']), (0.75, 0.1))
+        self.assertGreaterEqual(run['total'], run['first_token'])
+
+    def test_run_without_tokens(self):
+        run = finished_run(status='cancelled').to_dict()
+        for field in ('request_start', 'first_token', 'ttft', 'stream_time', 'tokens_per_sec'):
+            self.assertIsNone(run[field], field)
+        self.assertEqual(run['status'], 'cancelled')
+
+
+class RunMetricsStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.path = os.path.join(self.dir, 'run_metrics.jsonl')
+        self.store = RunMetricsStore(path=self.path, history_size=3)
+
+    def test_runs_are_appended_to_the_file(self):
+        runs = [finished_run() for _ in range(2)]
+        for metrics in runs:
+            self.store.record(metrics)
+        with open(self.path, encoding='utf-8') as f:
+            lines = [json.loads(line) for line in f]
+        self.assertEqual([line['job_id'] for line in lines], [metrics.job_id for metrics in runs])
+
+    def test_history_is_bounded_and_newest_first(self):
+        runs = [finished_run(session_id=i % 2) for i in range(5)]
+        for metrics in runs:
+            self.store.record(metrics)
+        ids = [run['job_id'] for run in self.store.get_runs()]
+        self.assertEqual(ids, [metrics.job_id for metrics in reversed(runs[2:])])
+        self.assertEqual(len(self.store.get_runs(limit=1)), 1)
+        self.assertEqual([run['job_id'] for run in self.store.get_runs(session_id=1)], [runs[3].job_id])
+
+    def test_file_is_rotated(self):
+        self.store.MAX_FILE_BYTES = 10
+        self.store.record(finished_run())
+        self.store.record(finished_run())
+        self.assertTrue(os.path.exists(self.path + '.1'))
+        with open(self.path, encoding='utf-8') as f:
+            self.assertEqual(len(f.readlines()), 1)
+
+    def test_unwritable_file_keeps_the_run(self):
+        store = RunMetricsStore(path=os.path.join(self.dir, 'missing', 'run_metrics.jsonl'))
+        store.record(finished_run())
+        self.assertEqual(len(store.get_runs()), 1)
+
+    def test_summary(self):
+        self.assertIsNone(self.store.get_summary()['total'])
+        for wait in (0.1, 0.2, 0.3):
+            metrics = finished_run()
+            metrics.wait = wait
+            self.store.record(metrics)
+        summary = self.store.get_summary()
+        self.assertEqual(summary['runs'], 3)
+        self.assertEqual(summary['wait'], {'count': 3, 'mean': 0.2, 'p50': 0.2, 'p95': 0.3, 'max': 0.3})
+        # Runs that never reached the model have no ttft
+        self.assertIsNone(summary['ttft'])
+
+        self.assertEqual(self.store.clear(), {'status': 'cleared'})
+        self.assertEqual(self.store.get_summary()['runs'], 0)
+        self.assertTrue(os.path.exists(self.path))
+
+
+if __name__ == '__main__':
+    unittest.main()
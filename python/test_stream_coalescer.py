@@ -0,0 +1,93 @@
+import asyncio
+import threading
+import time
+import unittest
+
+try:
+    from .stream_coalescer import StreamCoalescer
+except ImportError:
+    from stream_coalescer import StreamCoalescer
+
+
+class StreamCoalescerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.flushed = []
+
+    def flush(self, content, final):
+        self.flushed.append((content, final))
+
+    def test_first_update_is_sent_at_once(self):
+        coalescer = StreamCoalescer(self.flush, max_rate_hz=10)
+        coalescer.update('a')
+        self.assertEqual(self.flushed, [('a', False)])
+
+    def test_burst_is_merged_into_the_latest_content(self):
+        coalescer = StreamCoalescer(self.flush, max_rate_hz=10)
+        for i in range(100):
+            coalescer.update(f'text {i}')
+        self.assertEqual(self.flushed, [('text 0', False)])
+        # The timer sends only the latest pending content
+        self.assertTrue(wait_until(lambda: len(self.flushed) == 2))
+        self.assertEqual(self.flushed[-1], ('text 99', False))
+        self.assertEqual(coalescer.get_stats()['frames_coalesced'], 98)
+
+    def test_rate_is_capped(self):
+        coalescer = StreamCoalescer(self.flush, max_rate_hz=20)
+        start = time.monotonic()
+        while time.monotonic() - start < 0.5:
+            coalescer.update('x')
+            time.sleep(0.001)
+        coalescer.flush()
+        # About 10 flushes in half a second at 20 Hz, never one per update
+        self.assertLessEqual(len(self.flushed), 13)
+        self.assertGreater(coalescer.frames_received, 100)
+
+    def test_final_is_flushed_immediately(self):
+        coalescer = StreamCoalescer(self.flush, max_rate_hz=1)
+        coalescer.update('a')
+        coalescer.update('ab')
+        coalescer.update('abc', final=True)
+        self.assertEqual(self.flushed, [('a', False), ('abc', True)])
+
+    def test_resend_last(self):
+        coalescer = StreamCoalescer(self.flush, max_rate_hz=1)
+        coalescer.update('a')
+        coalescer.resend_last()
+        coalescer.update('ab')
+        coalescer.resend_last()
+        self.assertEqual(self.flushed, [('a', False), ('a', False), ('ab', False)])
+
+    def test_no_rate_limit(self):
+        coalescer = StreamCoalescer(self.flush, max_rate_hz=0)
+        for i in range(5):
+            coalescer.update(str(i))
+        self.assertEqual(len(self.flushed), 5)
+        self.assertIsNone(coalescer.get_stats()['max_rate_hz'])
+
+    def test_timer_runs_on_the_loop(self):
+        threads = []
+
+        async def run():
+            coalescer = StreamCoalescer(lambda content, final: threads.append(threading.current_thread()),
+                                        max_rate_hz=50, loop=asyncio.get_running_loop())
+            # Updates come from another thread, as they do from the coder
+            worker = threading.Thread(target=lambda: [coalescer.update(str(i)) for i in range(3)])
+            worker.start()
+            worker.join()
+            await asyncio.sleep(0.1)
+
+        asyncio.run(run())
+        self.assertEqual(len(threads), 2)
+        self.assertIs(threads[1], threading.main_thread())
+
+
+def wait_until(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+
+try:
+    from .stream_delta import StreamDeltaEncoder, merge_frame_args
+except ImportError:
+    from stream_delta import StreamDeltaEncoder, merge_frame_args
+
+
+def apply_frame(content, frame):
+    """What the webapp does with a frame: replace on full, append at the byte offset otherwise"""
+    data = content.encode('utf-8')
+    if frame['op'] == 'full':
+        return frame['data']
+    assert frame['offset'] == len(data), (frame['offset'], len(data))
+    return content + frame['data']
+
+
+class StreamDeltaEncoderTest(unittest.TestCase):
+
+    def test_first_frame_is_full_then_appends(self):
+        encoder = StreamDeltaEncoder(stream_id='s1')
+        first = encoder.encode('Hello')
+        second = encoder.encode('Hello, world')
+        self.assertEqual((first['op'], first['offset'], first['data'], first['seq']), ('full', 0, 'Hello', 1))
+        self.assertEqual((second['op'], second['offset'], second['data'], second['seq']), ('append', 5, ', world', 2))
+        self.assertEqual(second['id'], 's1')
+
+    def test_offsets_count_utf8_bytes(self):
+        encoder = StreamDeltaEncoder()
+        encoder.encode('héllo ')
+        frame = encoder.encode('héllo 🙂 ok')
+        self.assertEqual(frame['offset'], len('héllo '.encode('utf-8')))
+        self.assertEqual(encoder.byte_length, len('héllo 🙂 ok'.encode('utf-8')))
+
+    def test_rewritten_content_is_sent_full(self):
+        encoder = StreamDeltaEncoder()
+        encoder.encode('abc')
+        frame = encoder.encode('abX')
+        self.assertEqual((frame['op'], frame['offset'], frame['data']), ('full', 0, 'abX'))
+
+    def test_resync_forces_a_full_frame(self):
+        encoder = StreamDeltaEncoder()
+        encoder.encode('abc')
+        encoder.request_resync()
+        self.assertEqual(encoder.encode('abcd')['op'], 'full')
+        self.assertEqual(encoder.encode('abcde')['op'], 'append')
+
+    def test_frames_rebuild_the_content(self):
+        encoder = StreamDeltaEncoder()
+        content = ''
+        for update in ('a', 'ab', 'ab ü', 'xy', 'xyz', 'xyz 🙂'):
+            content = apply_frame(content, encoder.encode(update))
+            self.assertEqual(content, update)
+
+    def test_final_flag(self):
+        encoder = StreamDeltaEncoder()
+        encoder.encode('a')
+        self.assertFalse(encoder.final)
+        self.assertTrue(encoder.encode('ab', final=True)['final'])
+        self.assertTrue(encoder.final)
+
+    def test_catchup_frame_leaves_the_stream_in_step(self):
+        encoder = StreamDeltaEncoder(stream_id='s1')
+        encoder.encode('abc')
+        catchup = encoder.catchup_frame()
+        self.assertEqual((catchup['op'], catchup['data'], catchup['seq']), ('full', 'abc', 1))
+        self.assertTrue(catchup['catchup'])
+        self.assertEqual(encoder.encode('abcd')['op'], 'append')
+
+
+class MergeFrameArgsTest(unittest.TestCase):
+
+    def test_consecutive_appends_merge(self):
+        encoder = StreamDeltaEncoder()
+        first = (encoder.encode('ab'),)
+        second = (encoder.encode('abc'),)
+        third = (encoder.encode('abcdé'),)
+        merged = merge_frame_args(merge_frame_args(first, second), third)[0]
+        self.assertEqual((merged['op'], merged['offset'], merged['data'], merged['seq']), ('full', 0, 'abcdé', 3))
+
+    def test_appends_merge_keep_the_first_offset(self):
+        encoder = StreamDeltaEncoder()
+        encoder.encode('ab')
+        second = (encoder.encode('abc'),)
+        third = (encoder.encode('abcd'),)
+        merged = merge_frame_args(second, third)[0]
+        self.assertEqual((merged['op'], merged['offset'], merged['data']), ('append', 2, 'cd'))
+
+    def test_full_frame_supersedes(self):
+        encoder = StreamDeltaEncoder()
+        encoder.encode('ab')
+        append = (encoder.encode('abc'),)
+        full = (encoder.encode('xyz'),)
+        self.assertEqual(merge_frame_args(append, full), full)
+
+    def test_other_streams_and_gaps_do_not_merge(self):
+        first = ({'id': 'a', 'op': 'append', 'offset': 0, 'data': 'x'},)
+        self.assertIsNone(merge_frame_args(first, ({'id': 'b', 'op': 'append', 'offset': 1, 'data': 'y'},)))
+        self.assertIsNone(merge_frame_args(first, ({'id': 'a', 'op': 'append', 'offset': 5, 'data': 'y'},)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,3 @@
+import { SessionHandler } from './src/SessionHandler.js';
+
+customElements.define('session-handler', SessionHandler);
@@ -9,6 +9,7 @@ import '../commands-tab.js';
 import '../find-in-files.js';
 import '../prompt-view.js';
 import '../repo-tree.js';
+import '../session-handler.js';
 import {SidebarStyles} from './sidebar/SidebarStyles.js';
 import {TabConfig} from './sidebar/TabConfig.js';
 
@@ -210,7 +211,11 @@ export class AppSidebar extends LitElement {
             <commands-tab .serverURI=${this.serverURI}></commands-tab>
           `)}
           
-          ${this._renderTabPanel(3, this._renderServerSettings())}
+          ${this._renderTabPanel(3, html`
+            <session-handler .serverURI=${this.serverURI}></session-handler>
+          `)}
+          
+          ${this._renderTabPanel(4, this._renderServerSettings())}
         </div>
       </div>
     `;
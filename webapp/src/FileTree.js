@@ -31,6 +31,8 @@ export class FileTree extends KeyboardShortcutsMixin(JRPCClient) {
   initializeProperties() {
     this.files = [];
     this.addedFiles = [];
+    // Version of addedFiles as known to the server, null until the first load
+    this.chatFilesVersion = null;
     this.loading = false;
     this.error = null;
     this.treeData = new TreeNode('root', '', false);
@@ -252,6 +254,7 @@ export class FileTree extends KeyboardShortcutsMixin(JRPCClient) {
       
       const fileData = await this.fileTreeManager.loadFileData();
       this.addedFiles = fileData.addedFiles;
+      this.chatFilesVersion = fileData.chatFilesVersion;
       this.files = fileData.allFiles;
       this.treeData = fileData.treeData;
       
@@ -331,16 +334,10 @@ export class FileTree extends KeyboardShortcutsMixin(JRPCClient) {
       
       if (allAdded) {
         // Remove all files
-        for (const filePath of allFiles) {
-          await this.fileTreeManager.removeFile(filePath);
-        }
+        await this.fileTreeManager.removeFiles(allFiles);
       } else {
         // Add all files
-        for (const filePath of allFiles) {
-          if (!this.addedFiles.includes(filePath)) {
-            await this.fileTreeManager.addFile(filePath);
-          }
-        }
+        await this.fileTreeManager.addFiles(allFiles.filter(filePath => !this.addedFiles.includes(filePath)));
       }
     } catch (error) {
       console.error('Error handling directory checkbox:', error);
@@ -367,6 +364,35 @@ export class FileTree extends KeyboardShortcutsMixin(JRPCClient) {
     return allFiles.length > 0 && allFiles.every(file => this.addedFiles.includes(file));
   }
   
+  async applyChatFilesDelta(delta) {
+    // Already included in the list we loaded
+    if (this.chatFilesVersion !== null && delta.version <= this.chatFilesVersion) return;
+    // A delta that does not follow the version we hold means one was missed - refetch the list
+    if (this.chatFilesVersion === null || delta.base_version !== this.chatFilesVersion) {
+      console.log(`Chat files delta v${delta.version} does not follow v${this.chatFilesVersion}, resyncing`);
+      await this.resyncChatFiles();
+      return;
+    }
+    
+    const dropped = new Set(delta.dropped);
+    const added = delta.added.filter(filePath => !this.addedFiles.includes(filePath));
+    this.addedFiles = [...this.addedFiles.filter(f => !dropped.has(f)), ...added];
+    added.forEach(filePath => this.treeExpansion.expandPathToFile(filePath));
+    this.chatFilesVersion = delta.version;
+    this.requestUpdate();
+  }
+  
+  async resyncChatFiles() {
+    try {
+      const chatFiles = await this.fileTreeManager.loadChatFiles();
+      this.addedFiles = chatFiles.files;
+      this.chatFilesVersion = chatFiles.version;
+      this.requestUpdate();
+    } catch (error) {
+      console.error('Error reloading chat files:', error);
+    }
+  }
+  
   add_rel_fname_notification(filePath) {
     console.log(`File added notification: ${filePath}`);
     
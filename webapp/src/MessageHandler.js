@@ -7,6 +7,7 @@ export class MessageHandler extends JRPCClient {
   static properties = {
     messageHistory: { type: Array, state: true },
     isProcessing: { type: Boolean, state: true },
+    pendingConfirmation: { type: Object, state: true },
     serverURI: { type: String }
   };
   
@@ -16,8 +17,11 @@ export class MessageHandler extends JRPCClient {
     this.debug = false;
     this.messageHistory = [];
     this.isProcessing = false;
+    this.pendingConfirmation = null;  // The confirmation dialog being shown
     this.serverURI = "";  // Will be set from parent component
     this.messageHistory = [];
+    this._streamState = null;  // {id, bytes} of the assistant stream being received
+    this._utf8 = new TextEncoder();
   }
 
   connectedCallback() {
@@ -36,75 +40,69 @@ export class MessageHandler extends JRPCClient {
 
   /**
    * Handle confirmation request from IOWrapper
-   * This method is called via JRPC and returns the user's response
+   * This method is called via JRPC and resolves with the user's response once
+   * they answer the dialog. The server stops waiting after data.timeout seconds
+   * and answers on its own, so the dialog closes itself then.
    */
   confirmation_request(data) {
     console.log('Confirmation request received:', data);
     
-    // Build the prompt message
-    let promptMessage = '';
-    if (data.subject) {
-      promptMessage += `${data.subject}\n\n`;
-    }
-    promptMessage += data.question || 'Confirm action?';
+    // Only one confirmation is asked at a time; a newer one replaces a stale dialog
+    this._closeConfirmation(null);
     
-    // Add default information to the prompt
-    let defaultText = '';
-    let defaultValue = '';
-    if (data.default !== null) {
-      if (data.default === true) {
-        defaultText = ' (default: Yes)';
-        defaultValue = 'yes';
-      } else if (data.default === false) {
-        defaultText = ' (default: No)';
-        defaultValue = 'no';
-      } else {
-        defaultText = ` (default: ${data.default})`;
-        defaultValue = String(data.default);
+    return new Promise(resolve => {
+      const pending = {
+        ...data,
+        resolve,
+        remaining: data.timeout ? Math.ceil(data.timeout) : null,
+        timer: null
+      };
+      if (pending.remaining !== null) {
+        pending.timer = setInterval(() => {
+          pending.remaining -= 1;
+          if (pending.remaining <= 0) {
+            this._closeConfirmation(null);
+          } else {
+            this.requestUpdate();
+          }
+        }, 1000);
       }
+      this.pendingConfirmation = pending;
+      this.onConfirmationRequested?.(pending);
+    });
+  }
+  
+  /**
+   * Answer the open confirmation dialog with true, false or 'd' (don't ask again)
+   */
+  answerConfirmation(answer) {
+    if (!this.pendingConfirmation) return;
+    if (answer === 'd' && !this.pendingConfirmation.allow_never) {
+      answer = false;
     }
-    
-    promptMessage += defaultText;
-    
-    // Show window.prompt with the message and default value
-    const userInput = window.prompt(promptMessage, defaultValue);
-    console.log('userInput', userInput);
-    
-    // Handle the response
-    if (userInput === null) {
-      // User cancelled - use default or false
-      return data.default !== null ? data.default : false;
-    }
-    
-    // Parse the user's response
-    const response = userInput.toLowerCase().trim();
-    
-    if (data.allow_never && (response === 'd' || response === "don't")) {
-      console.log('returning never');
-      return 'd';
-    }
-    
-    // Check for yes/true responses
-    if (response === 'yes' || response === 'y' || response === 'true' || response === '1') {
-      console.log('returning true');
-      return true;
-    }
-    
-    // Check for no/false responses
-    if (response === 'n' || response === 'no' || response === 'false' || response === '0') {
-      console.log('returning false');
-      return false;
+    console.log('Confirmation answered:', answer);
+    this._closeConfirmation(answer);
+  }
+  
+  /**
+   * Called by IOWrapper when the server answered a confirmation without us
+   */
+  confirmationDismissed(data) {
+    console.log('Confirmation dismissed:', data);
+    if (this.pendingConfirmation && this.pendingConfirmation.question_id === data?.question_id) {
+      this._closeConfirmation(null);
     }
-    
-    // If empty response, use default
-    if (response === '') {
-      console.log('returning ""');
-      return data.default !== null ? data.default : false;
+  }
+  
+  _closeConfirmation(answer) {
+    const pending = this.pendingConfirmation;
+    if (!pending) return;
+    if (pending.timer) {
+      clearInterval(pending.timer);
     }
-    console.log('returning final');
-    
-    // For any other response, treat as false unless default is true
-    return data.default === true ? true : false;
+    this.pendingConfirmation = null;
+    // After a timeout the server has already answered and ignores this
+    pending.resolve(answer);
   }
 
   /**
@@ -185,6 +183,80 @@ export class MessageHandler extends JRPCClient {
     this.onStreamChunk?.(chunk, final, role);
   }
   
+  /**
+   * Handle a batch of command output lines from Aider
+   * Called by IOWrapper._send_command_batch via RPC with [{type, message}, ...]
+   * Returns immediately to avoid blocking Python
+   */
+  streamCommandBatch(entries) {
+    if (!Array.isArray(entries) || entries.length === 0) return;
+    const chunk = entries.map(entry => `${entry.type}:${entry.message}`).join('\n');
+    setTimeout(() => this._processStreamChunk(chunk, false, 'command'), 0);
+  }
+  
+  /**
+   * Handle append-only stream frames from Aider
+   * Called by IOWrapper.send_stream_update via RPC - frame is
+   * {id, seq, op: 'append'|'full', offset, data, final, role, catchup?}
+   * Returns immediately to avoid blocking Python
+   */
+  streamDelta(frame) {
+    setTimeout(() => this._processStreamDelta(frame), 0);
+  }
+  
+  /**
+   * Apply a stream frame to the current message asynchronously
+   */
+  async _processStreamDelta(frame) {
+    if (!frame || !frame.id) {
+      console.warn('Received invalid stream frame');
+      return;
+    }
+    
+    const role = frame.role || 'assistant';
+    const state = this._streamState;
+    const sameStream = state && state.id === frame.id;
+    
+    if (frame.op === 'append') {
+      // An append must continue exactly where our copy ends
+      if (!sameStream || state.bytes !== frame.offset) {
+        console.warn(`Stream ${frame.id} out of step at frame ${frame.seq}, requesting resync`);
+        this.call?.['IOWrapper.request_stream_resync']?.(frame.id);
+        return;
+      }
+    }
+    
+    // A full frame for a new stream id starts a new message, even right after
+    // another assistant message; a full frame for the current id is a resync
+    const lastMessage = this.messageHistory[this.messageHistory.length - 1];
+    if (!lastMessage || lastMessage.role !== role || (frame.op === 'full' && !sameStream)) {
+      this.addMessageToHistory(role, '');
+    }
+    
+    const lastIndex = this.messageHistory.length - 1;
+    const dataBytes = this._utf8.encode(frame.data || '').length;
+    
+    // A catch-up frame after (re)connecting means a run is still in progress
+    if (frame.catchup && !frame.final) {
+      this.isProcessing = true;
+    }
+    
+    if (frame.op === 'append') {
+      this.messageHistory[lastIndex].content += frame.data;
+      state.bytes += dataBytes;
+    } else {
+      this.messageHistory[lastIndex].content = frame.data || '';
+      this._streamState = { id: frame.id, bytes: dataBytes };
+    }
+    
+    // Force a re-render by creating a new array
+    this.messageHistory = [...this.messageHistory];
+    this.requestUpdate();
+    
+    // Call hook for subclasses
+    this.onStreamChunk?.(frame.data, frame.final, role);
+  }
+  
   /**
    * Handle message chunks
    */
@@ -284,7 +356,7 @@ export class MessageHandler extends JRPCClient {
   }
 
   /**
-   * Stop the current running process by sending a KeyboardInterrupt
+   * Cancel the current run - the server closes the LLM stream and stops at the next safe point
    */
   async stopRunning() {
     try {
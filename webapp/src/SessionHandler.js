@@ -0,0 +1,554 @@
+/**
+ * SessionHandler class that shows the extra coder sessions and receives their pushes
+ *
+ * The server's secondary sessions push to SessionHandler.* with the session id
+ * as first argument, mirroring the MessageHandler methods of the default session.
+ */
+import {JRPCClient} from '@flatmax/jrpc-oo';
+import {html, css} from 'lit';
+import {repeat} from 'lit/directives/repeat.js';
+import '@material/web/button/filled-button.js';
+import '@material/web/textfield/filled-text-field.js';
+import './prompt/AssistantCard.js';
+import './prompt/UserCard.js';
+import './prompt/CommandsCard.js';
+import {extractResponseData} from './Utils.js';
+
+export class SessionHandler extends JRPCClient {
+  static properties = {
+    sessions: { type: Object, state: true },
+    activeSessionId: { type: String, state: true },
+    inputValue: { type: String, state: true },
+    error: { type: String, state: true },
+    serverURI: { type: String }
+  };
+
+  constructor() {
+    super();
+    this.remoteTimeout = 300;
+    this.sessions = {};  // {id: {info, creating, messageHistory, isProcessing, pendingConfirmation, streamState}}
+    this.activeSessionId = null;
+    this.inputValue = '';
+    this.error = null;
+    this.serverURI = "";  // Will be set from parent component
+    this._utf8 = new TextEncoder();
+  }
+
+  static styles = css`
+    :host {
+      display: flex;
+      flex-direction: column;
+      height: 100%;
+      padding: 10px;
+      box-sizing: border-box;
+      gap: 8px;
+    }
+
+    .session-tabs {
+      display: flex;
+      flex-wrap: wrap;
+      gap: 4px;
+    }
+
+    .session-tab {
+      padding: 4px 8px;
+      border: 1px solid #ccc;
+      border-radius: 4px;
+      background: #f5f5f5;
+      cursor: pointer;
+      font-size: 13px;
+    }
+
+    .session-tab.active {
+      background: #e3f2fd;
+      border-color: #90caf9;
+    }
+
+    .session-tab.busy::after {
+      content: ' …';
+    }
+
+    .create-row {
+      display: flex;
+      align-items: center;
+      gap: 8px;
+      font-size: 13px;
+    }
+
+    .session-header {
+      display: flex;
+      align-items: center;
+      gap: 8px;
+      font-size: 12px;
+      color: #666;
+    }
+
+    .session-header .spacer {
+      flex: 1;
+    }
+
+    .message-history {
+      flex: 1;
+      overflow-y: auto;
+      min-height: 0;
+    }
+
+    .confirmation-card {
+      padding: 10px;
+      background: #fff8e1;
+      border: 1px solid #ffe082;
+      border-radius: 4px;
+    }
+
+    .confirmation-subject {
+      font-family: monospace;
+      white-space: pre-wrap;
+      margin-bottom: 6px;
+    }
+
+    .confirmation-question {
+      margin-bottom: 8px;
+    }
+
+    .confirmation-actions {
+      display: flex;
+      align-items: center;
+      flex-wrap: wrap;
+      gap: 8px;
+    }
+
+    .confirmation-timeout {
+      font-size: 12px;
+      color: #757575;
+    }
+
+    .input-area {
+      display: flex;
+      gap: 8px;
+      align-items: flex-end;
+    }
+
+    .input-area md-filled-text-field {
+      flex: 1;
+    }
+
+    .error {
+      color: #d32f2f;
+      font-size: 13px;
+    }
+
+    .empty {
+      color: #666;
+      font-style: italic;
+    }
+  `;
+
+  connectedCallback() {
+    super.connectedCallback();
+    this.addClass?.(this);
+  }
+
+  /**
+   * Called when server is ready to use
+   */
+  setupDone() {
+    console.log('SessionHandler setupDone');
+    this.loadSessions();
+  }
+
+  async loadSessions() {
+    try {
+      const response = await this.call['Sessions.list_sessions']();
+      const list = extractResponseData(response, [], true);
+      for (const info of list) {
+        if (info.id === 'default') continue;
+        this._session(info.id).info = info;
+        this._session(info.id).creating = !!info.creating;
+      }
+      this._changed();
+    } catch (error) {
+      console.error('Error loading sessions:', error);
+    }
+  }
+
+  async createSession(worktree) {
+    this.error = null;
+    try {
+      const response = await this.call['Sessions.create_session'](null, worktree);
+      const result = extractResponseData(response);
+      if (result?.error) {
+        this.error = result.error;
+        return;
+      }
+      this._session(result.session_id).creating = true;
+      this.activeSessionId = result.session_id;
+      this._changed();
+    } catch (error) {
+      this.error = `Failed to create session: ${error.message}`;
+    }
+  }
+
+  async closeSession(sessionId) {
+    try {
+      const response = await this.call['Sessions.close_session'](sessionId);
+      const result = extractResponseData(response);
+      if (result?.error) {
+        this.error = result.error;
+        return;
+      }
+      this._closeConfirmation(sessionId, null);
+      delete this.sessions[sessionId];
+      if (this.activeSessionId === sessionId) {
+        this.activeSessionId = Object.keys(this.sessions)[0] || null;
+      }
+      this._changed();
+    } catch (error) {
+      this.error = `Failed to close session: ${error.message}`;
+    }
+  }
+
+  async sendPrompt() {
+    const sessionId = this.activeSessionId;
+    const session = this.sessions[sessionId];
+    const message = this.inputValue.trim();
+    if (!session || session.creating || !message) return;
+
+    this.inputValue = '';
+    this._addMessage(session, 'user', message);
+    session.isProcessing = true;
+    this._changed();
+    try {
+      const response = await this.call['Sessions.run'](sessionId, message);
+      const result = extractResponseData(response);
+      if (result?.error) {
+        this._addMessage(session, 'assistant', `Error: ${result.error}`);
+        session.isProcessing = false;
+        this._changed();
+      }
+    } catch (error) {
+      this._addMessage(session, 'assistant', `Error: ${error.message}`);
+      session.isProcessing = false;
+      this._changed();
+    }
+  }
+
+  stopSession(sessionId) {
+    this.call['Sessions.stop'](sessionId).catch(error => console.error('Error stopping session:', error));
+  }
+
+  /**
+   * Called by SessionManager once a session's coder is built
+   */
+  sessionCreated(sessionId, info) {
+    const session = this._session(sessionId);
+    session.info = info;
+    session.creating = false;
+    if (!this.activeSessionId) {
+      this.activeSessionId = sessionId;
+    }
+    this._changed();
+  }
+
+  /**
+   * Called by SessionManager when building a session failed
+   */
+  sessionCreateFailed(sessionId, errorMessage) {
+    delete this.sessions[sessionId];
+    if (this.activeSessionId === sessionId) {
+      this.activeSessionId = Object.keys(this.sessions)[0] || null;
+    }
+    this.error = `Session ${sessionId} could not be created: ${errorMessage}`;
+    this._changed();
+  }
+
+  /**
+   * Stream frames of a session's assistant message, as MessageHandler.streamDelta
+   */
+  streamDelta(sessionId, frame) {
+    setTimeout(() => this._processStreamDelta(sessionId, frame), 0);
+  }
+
+  _processStreamDelta(sessionId, frame) {
+    if (!frame || !frame.id) return;
+    const session = this._session(sessionId);
+    const role = frame.role || 'assistant';
+    const state = session.streamState;
+    const sameStream = state && state.id === frame.id;
+
+    if (frame.op === 'append' && (!sameStream || state.bytes !== frame.offset)) {
+      console.warn(`Session ${sessionId} stream ${frame.id} out of step at frame ${frame.seq}, requesting resync`);
+      this.call?.['Sessions.call_session']?.(sessionId, 'IOWrapper', 'request_stream_resync', [frame.id]);
+      return;
+    }
+
+    const history = session.messageHistory;
+    const lastMessage = history[history.length - 1];
+    if (!lastMessage || lastMessage.role !== role || (frame.op === 'full' && !sameStream)) {
+      this._addMessage(session, role, '');
+    }
+
+    const dataBytes = this._utf8.encode(frame.data || '').length;
+    const message = history[history.length - 1];
+    if (frame.catchup && !frame.final) {
+      session.isProcessing = true;
+    }
+    if (frame.op === 'append') {
+      message.content += frame.data;
+      state.bytes += dataBytes;
+    } else {
+      message.content = frame.data || '';
+      session.streamState = { id: frame.id, bytes: dataBytes };
+    }
+    this._changed();
+  }
+
+  /**
+   * Whole messages of a session, as MessageHandler.streamWrite
+   */
+  streamWrite(sessionId, chunk, final = false, role = 'assistant') {
+    if (!chunk) return;
+    const session = this._session(sessionId);
+    const history = session.messageHistory;
+    if (!history.length || history[history.length - 1].role !== role) {
+      this._addMessage(session, role, '');
+    }
+    history[history.length - 1].content = chunk;
+    this._changed();
+  }
+
+  /**
+   * Command output lines of a session, as MessageHandler.streamCommandBatch
+   */
+  streamCommandBatch(sessionId, entries) {
+    if (!Array.isArray(entries) || entries.length === 0) return;
+    const session = this._session(sessionId);
+    const chunk = entries.map(entry => `${entry.type}:${entry.message}`).join('\n');
+    const history = session.messageHistory;
+    const lastMessage = history[history.length - 1];
+    if (lastMessage && lastMessage.role === 'command') {
+      lastMessage.content = lastMessage.content ? `${lastMessage.content}\n${chunk}` : chunk;
+    } else {
+      this._addMessage(session, 'command', chunk);
+    }
+    this._changed();
+  }
+
+  streamComplete(sessionId) {
+    this._session(sessionId).isProcessing = false;
+    this._changed();
+  }
+
+  streamError(sessionId, errorMessage) {
+    const session = this._session(sessionId);
+    const history = session.messageHistory;
+    const lastMessage = history[history.length - 1];
+    if (lastMessage && lastMessage.role === 'assistant') {
+      lastMessage.content += `\n\nError: ${errorMessage}`;
+    } else {
+      this._addMessage(session, 'assistant', `Error: ${errorMessage}`);
+    }
+    this._changed();
+  }
+
+  /**
+   * A session's confirmation, as MessageHandler.confirmation_request - resolves with the answer
+   */
+  confirmation_request(sessionId, data) {
+    const session = this._session(sessionId);
+    // Only one confirmation per session is asked at a time
+    this._closeConfirmation(sessionId, null);
+
+    return new Promise(resolve => {
+      const pending = {
+        ...data,
+        resolve,
+        remaining: data.timeout ? Math.ceil(data.timeout) : null,
+        timer: null
+      };
+      if (pending.remaining !== null) {
+        pending.timer = setInterval(() => {
+          pending.remaining -= 1;
+          if (pending.remaining <= 0) {
+            this._closeConfirmation(sessionId, null);
+          } else {
+            this.requestUpdate();
+          }
+        }, 1000);
+      }
+      session.pendingConfirmation = pending;
+      // Bring the asking session to the front
+      this.activeSessionId = sessionId;
+      this._changed();
+    });
+  }
+
+  answerConfirmation(sessionId, answer) {
+    const pending = this.sessions[sessionId]?.pendingConfirmation;
+    if (!pending) return;
+    if (answer === 'd' && !pending.allow_never) {
+      answer = false;
+    }
+    this._closeConfirmation(sessionId, answer);
+  }
+
+  /**
+   * Called when the server answered a session's confirmation without us
+   */
+  confirmationDismissed(sessionId, data) {
+    const pending = this.sessions[sessionId]?.pendingConfirmation;
+    if (pending && pending.question_id === data?.question_id) {
+      this._closeConfirmation(sessionId, null);
+    }
+  }
+
+  _closeConfirmation(sessionId, answer) {
+    const session = this.sessions[sessionId];
+    const pending = session?.pendingConfirmation;
+    if (!pending) return;
+    if (pending.timer) {
+      clearInterval(pending.timer);
+    }
+    session.pendingConfirmation = null;
+    // After a timeout the server has already answered and ignores this
+    pending.resolve(answer);
+    this._changed();
+  }
+
+  /**
+   * A session's chat files changed, as RepoTree.applyChatFilesDelta
+   */
+  applyChatFilesDelta(sessionId, delta) {
+    const session = this._session(sessionId);
+    if (!session.info || !delta) return;
+    const files = new Set(session.info.files || []);
+    (delta.dropped || []).forEach(file => files.delete(file));
+    (delta.added || []).forEach(file => files.add(file));
+    session.info = { ...session.info, files: [...files].sort() };
+    this._changed();
+  }
+
+  onCoderTypeChanged(sessionId, coderType, editFormat) {
+    const session = this._session(sessionId);
+    if (!session.info) return;
+    session.info = { ...session.info, coder_type: coderType, edit_format: editFormat };
+    this._changed();
+  }
+
+  _session(sessionId) {
+    if (!this.sessions[sessionId]) {
+      this.sessions[sessionId] = {
+        info: null,
+        creating: false,
+        messageHistory: [],
+        isProcessing: false,
+        pendingConfirmation: null,
+        streamState: null
+      };
+    }
+    return this.sessions[sessionId];
+  }
+
+  _addMessage(session, role, content) {
+    session.messageHistory.push({ role, content });
+  }
+
+  _changed() {
+    // Sessions are mutated in place; a new object triggers the re-render
+    this.sessions = { ...this.sessions };
+  }
+
+  renderConfirmation(sessionId, confirmation) {
+    const defaultText = confirmation.default === true ? 'Yes'
+      : confirmation.default === false ? 'No'
+      : confirmation.default !== null && confirmation.default !== undefined ? String(confirmation.default) : null;
+    return html`
+      <div class="confirmation-card">
+        ${confirmation.subject ? html`<div class="confirmation-subject">${confirmation.subject}</div>` : ''}
+        <div class="confirmation-question">
+          ${confirmation.question || 'Confirm action?'}${defaultText ? ` (default: ${defaultText})` : ''}
+        </div>
+        <div class="confirmation-actions">
+          <md-filled-button @click=${() => this.answerConfirmation(sessionId, true)}>Yes</md-filled-button>
+          <md-filled-button @click=${() => this.answerConfirmation(sessionId, false)}>No</md-filled-button>
+          ${confirmation.allow_never ? html`
+            <md-filled-button @click=${() => this.answerConfirmation(sessionId, 'd')}>Don't ask again</md-filled-button>
+          ` : ''}
+          ${confirmation.remaining !== null ? html`
+            <span class="confirmation-timeout">Answered automatically in ${confirmation.remaining}s</span>
+          ` : ''}
+        </div>
+      </div>
+    `;
+  }
+
+  renderSession(sessionId, session) {
+    if (session.creating) {
+      return html`<div class="empty">Creating session ${sessionId}…</div>`;
+    }
+    const info = session.info || {};
+    return html`
+      <div class="session-header">
+        <span>${info.coder_type || ''}${info.branch ? ` on ${info.branch}` : ''}</span>
+        <span>${(info.files || []).length} files</span>
+        <span class="spacer"></span>
+        ${session.isProcessing ? html`
+          <md-filled-button @click=${() => this.stopSession(sessionId)}>Stop</md-filled-button>
+        ` : ''}
+        <md-filled-button @click=${() => this.closeSession(sessionId)}>Close</md-filled-button>
+      </div>
+      <div class="message-history">
+        ${repeat(
+          session.messageHistory,
+          (message, i) => i,
+          message => {
+            if (message.role === 'user') {
+              return html`<user-card .content=${message.content}></user-card>`;
+            } else if (message.role === 'assistant') {
+              return html`<assistant-card .content=${message.content}></assistant-card>`;
+            } else if (message.role === 'command') {
+              return html`<commands-card .content=${message.content}></commands-card>`;
+            }
+          }
+        )}
+      </div>
+      ${session.pendingConfirmation ? this.renderConfirmation(sessionId, session.pendingConfirmation) : ''}
+      <div class="input-area">
+        <md-filled-text-field
+          type="textarea"
+          rows="2"
+          label="Prompt for session ${sessionId}"
+          .value=${this.inputValue}
+          @input=${e => this.inputValue = e.target.value}
+          @keydown=${e => {
+            if (e.key === 'Enter' && !e.shiftKey) {
+              e.preventDefault();
+              this.sendPrompt();
+            }
+          }}
+        ></md-filled-text-field>
+        <md-filled-button ?disabled=${session.isProcessing} @click=${() => this.sendPrompt()}>Send</md-filled-button>
+      </div>
+    `;
+  }
+
+  render() {
+    const active = this.activeSessionId ? this.sessions[this.activeSessionId] : null;
+    return html`
+      <div class="create-row">
+        <md-filled-button @click=${() => this.createSession(false)}>New session</md-filled-button>
+        <md-filled-button @click=${() => this.createSession(true)}>New worktree session</md-filled-button>
+      </div>
+      ${this.error ? html`<div class="error">${this.error}</div>` : ''}
+      <div class="session-tabs">
+        ${Object.entries(this.sessions).map(([sessionId, session]) => html`
+          <button
+            class="session-tab ${sessionId === this.activeSessionId ? 'active' : ''} ${session.isProcessing || session.pendingConfirmation ? 'busy' : ''}"
+            @click=${() => this.activeSessionId = sessionId}
+          >${sessionId}</button>
+        `)}
+      </div>
+      ${active ? this.renderSession(this.activeSessionId, active)
+        : html`<div class="empty">No extra sessions. The default session is in the prompt view.</div>`}
+    `;
+  }
+}
@@ -18,6 +18,7 @@ export class DiffEditor extends JRPCClient {
     isLoading: { type: Boolean, state: true },
     headContent: { type: String, state: true },
     workingContent: { type: String, state: true },
+    workingPreview: { type: Object, state: true },
     isSaving: { type: Boolean, state: true }
   };
 
@@ -30,6 +31,9 @@ export class DiffEditor extends JRPCClient {
     this.isLoading = false;
     this.headContent = '';
     this.workingContent = '';
+    // Set when only the head of a large working file is loaded: {size, truncated, binary}
+    this.workingPreview = null;
+    this.workingFull = false;
     this.fileLoader = null;
     this.isSaving = false;
     this.languageDetector = new LanguageDetector();
@@ -95,6 +99,11 @@ export class DiffEditor extends JRPCClient {
             ${this.isSaving ? html`
               <span class="label save-indicator">Saving...</span>
             ` : ''}
+            ${this.workingPreview ? html`
+              <span class="label preview-label" title="Only the start of this file is loaded">
+                Preview of ${(this.workingPreview.size / (1024 * 1024)).toFixed(1)} MB
+              </span>
+            ` : ''}
             <span class="label working-label">Working Copy</span>
           </div>
         </div>
@@ -167,6 +176,17 @@ export class DiffEditor extends JRPCClient {
       return;
     }
 
+    if (this.workingPreview) {
+      // Saving the preview would cut the file down to its first part
+      const sizeMb = (this.workingPreview.size / (1024 * 1024)).toFixed(1);
+      if (confirm(`${this.currentFile} is ${sizeMb} MB and only its start is loaded, so it cannot be saved.\n\n` +
+                  'Load the whole file for editing? Changes made to the preview are discarded.')) {
+        const position = this.navigationManager.getLastCursorPosition();
+        await this.fileManager.loadFileContent(this.currentFile, position.line, position.character, true);
+      }
+      return;
+    }
+
     const content = event.detail.content;
     this.isSaving = true;
 
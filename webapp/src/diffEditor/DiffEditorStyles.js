@@ -115,6 +115,11 @@ export class DiffEditorStyles {
         color: #ffd700;
       }
 
+      .preview-label {
+        background: rgba(255, 140, 0, 0.2);
+        color: #ff8c00;
+      }
+
       .save-indicator {
         background: rgba(0, 255, 0, 0.2);
         color: #00ff00;
@@ -1,28 +1,70 @@
 import {extractResponseData} from '../Utils.js';
 
 export class FileContentLoader {
+  static MAX_CACHED_FILES = 50;
+
   constructor(jrpcClient) {
     this.jrpcClient = jrpcClient;
+    // "version:filePath" -> {etag, content}; unchanged files come back as not_modified
+    this.contentCache = new Map();
   }
 
-  async loadFileContent(filePath) {
+  /**
+   * Load the HEAD and working versions of a file. A large working file comes
+   * back as a preview of its head (workingPreview holds its size) unless full
+   * is set, so only load it in full when it is going to be edited.
+   */
+  async loadFileContent(filePath, full = false) {
     console.log(`Loading file content for: ${filePath}`);
     
     // Get HEAD version and working directory version
-    const headResponse = await this.jrpcClient.call['Repo.get_file_content'](filePath, 'HEAD');
-    const workingResponse = await this.jrpcClient.call['Repo.get_file_content'](filePath, 'working');
-    
-    // Extract content from responses (handle UUID wrapper)
-    const headContent = this.extractContent(headResponse);
-    const workingContent = this.extractContent(workingResponse);
+    const [head, working] = await Promise.all([
+      this.fetchContent(filePath, 'HEAD'),
+      this.fetchContent(filePath, 'working', full)
+    ]);
+    const headContent = head.content;
+    const workingContent = working.content;
     
     console.log('File content loaded:', {
       filePath,
       headLength: headContent.length,
-      workingLength: workingContent.length
+      workingLength: workingContent.length,
+      workingPreview: working.preview
     });
     
-    return { headContent, workingContent };
+    return { headContent, workingContent, workingPreview: working.preview };
+  }
+
+  async fetchContent(filePath, version, full = false, uncached = false) {
+    const key = `${version}:${filePath}`;
+    const cached = uncached ? undefined : this.contentCache.get(key);
+    const response = await this.jrpcClient.call['Repo.get_file_content'](filePath, version, cached?.etag || '', full);
+
+    // Unwrap the UUID wrapper without extractResponseData, which would drop the etag
+    const keys = response && typeof response === 'object' ? Object.keys(response) : [];
+    const data = keys.length === 1 && !('error' in response) ? response[keys[0]] : response;
+
+    if (data?.not_modified && !uncached) {
+      if (cached) {
+        return { content: cached.content, preview: null };
+      }
+      // Nothing to reuse, so ask again without an etag, which always returns the content
+      return this.fetchContent(filePath, version, full, true);
+    }
+    if (data && typeof data === 'object' && data.content !== undefined) {
+      this.contentCache.delete(key);
+      if (data.etag) {
+        this.contentCache.set(key, { etag: data.etag, content: data.content });
+        if (this.contentCache.size > FileContentLoader.MAX_CACHED_FILES) {
+          this.contentCache.delete(this.contentCache.keys().next().value);
+        }
+      }
+      // Large files come back as a preview without an etag, so they are never cached
+      const preview = data.large ? { size: data.size, truncated: data.truncated, binary: data.binary } : null;
+      return { content: data.content, preview };
+    }
+    this.contentCache.delete(key);
+    return { content: this.extractContent(response), preview: null };
   }
 
   extractContent(response) {
@@ -37,6 +79,7 @@ export class FileContentLoader {
     if (response.error) {
       throw new Error(`Failed to save file: ${response.error}`);
     }
+    this.contentCache.delete(`working:${filePath}`);
     
     console.log('File saved successfully');
     return response;
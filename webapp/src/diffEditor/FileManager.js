@@ -11,7 +11,7 @@ export class FileManager {
     this.fileLoader = fileLoader;
   }
 
-  async loadFileContent(filePath, lineNumber = null, characterNumber = null) {
+  async loadFileContent(filePath, lineNumber = null, characterNumber = null, full = false) {
     if (!this.fileLoader) {
       console.error('File loader not initialized');
       return;
@@ -28,9 +28,11 @@ export class FileManager {
     this.diffEditor.currentFile = filePath;
 
     try {
-      const { headContent, workingContent } = await this.fileLoader.loadFileContent(filePath);
+      const { headContent, workingContent, workingPreview } = await this.fileLoader.loadFileContent(filePath, full);
       this.diffEditor.headContent = headContent;
       this.diffEditor.workingContent = workingContent;
+      this.diffEditor.workingPreview = workingPreview;
+      this.diffEditor.workingFull = full;
       this.diffEditor.isLoading = false;
       
       console.log('File content loaded:', {
@@ -75,7 +77,8 @@ export class FileManager {
       
       // Load the new content from disk
       try {
-        const { headContent, workingContent } = await this.fileLoader.loadFileContent(filePath);
+        const { headContent, workingContent, workingPreview } =
+          await this.fileLoader.loadFileContent(filePath, this.diffEditor.workingFull);
         
         // Only reload if the content has actually changed
         if (currentContent !== workingContent) {
@@ -87,6 +90,7 @@ export class FileManager {
           // Update the content
           this.diffEditor.headContent = headContent;
           this.diffEditor.workingContent = workingContent;
+          this.diffEditor.workingPreview = workingPreview;
           
           // Wait for the editor to update, then restore cursor position
           await this.diffEditor.updateComplete;
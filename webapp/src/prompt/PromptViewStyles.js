@@ -279,6 +279,35 @@ export const promptViewStyles = css`
     border-top: 1px solid #e0e0e0;
   }
   
+  .confirmation-card {
+    flex-shrink: 0;
+    padding: 10px;
+    background: #fff8e1;
+    border-top: 1px solid #ffe082;
+  }
+  
+  .confirmation-subject {
+    font-family: monospace;
+    white-space: pre-wrap;
+    margin-bottom: 6px;
+  }
+  
+  .confirmation-question {
+    margin-bottom: 8px;
+  }
+  
+  .confirmation-actions {
+    display: flex;
+    align-items: center;
+    gap: 8px;
+  }
+  
+  .confirmation-timeout {
+    margin-left: auto;
+    font-size: 12px;
+    color: #757575;
+  }
+  
   :host(.minimized) .input-area {
     grid-template-columns: 1fr;
     grid-gap: 5px;
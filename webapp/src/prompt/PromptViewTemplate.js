@@ -70,6 +70,7 @@ export function renderPromptView(component) {
                 </md-icon-button>
               ` : ''}
             </div>
+            ${component.pendingConfirmation ? renderConfirmation(component, component.pendingConfirmation) : ''}
             <div class="input-area">
               <md-filled-text-field
                 id="promptInput"
@@ -125,3 +126,27 @@ export function renderPromptView(component) {
     </div>
   `;
 }
+
+function renderConfirmation(component, confirmation) {
+  const defaultText = confirmation.default === true ? 'Yes'
+    : confirmation.default === false ? 'No'
+    : confirmation.default !== null && confirmation.default !== undefined ? String(confirmation.default) : null;
+  return html`
+    <div class="confirmation-card">
+      ${confirmation.subject ? html`<div class="confirmation-subject">${confirmation.subject}</div>` : ''}
+      <div class="confirmation-question">
+        ${confirmation.question || 'Confirm action?'}${defaultText ? ` (default: ${defaultText})` : ''}
+      </div>
+      <div class="confirmation-actions">
+        <md-filled-button @click=${() => component.answerConfirmation(true)}>Yes</md-filled-button>
+        <md-filled-button @click=${() => component.answerConfirmation(false)}>No</md-filled-button>
+        ${confirmation.allow_never ? html`
+          <md-filled-button @click=${() => component.answerConfirmation('d')}>Don't ask again</md-filled-button>
+        ` : ''}
+        ${confirmation.remaining !== null ? html`
+          <span class="confirmation-timeout">Answered automatically in ${confirmation.remaining}s</span>
+        ` : ''}
+      </div>
+    </div>
+  `;
+}
@@ -16,6 +16,11 @@ export class TabConfig {
         title: "Commands", 
         icon: "tune"
       },
+      {
+        label: "Sessions Tab",
+        title: "Sessions",
+        icon: "forum"
+      },
       {
         label: "Settings Tab",
         title: "Settings",
@@ -12,9 +12,8 @@ export class FileTreeManager {
     const allFilesResponse = await this.jrpcClient.call['EditBlockCoder.get_all_relative_files']();
     const all_files = extractResponseData(allFilesResponse, [], true);
     
-    // Get files that are already added to the chat context
-    const addedFilesResponse = await this.jrpcClient.call['EditBlockCoder.get_inchat_relative_files']();
-    const added_files = extractResponseData(addedFilesResponse, [], true);
+    // Get files that are already added to the chat context, with the version deltas build on
+    const chatFiles = await this.loadChatFiles();
     
     // Get Git status to include untracked files
     let untracked_files = [];
@@ -31,11 +30,21 @@ export class FileTreeManager {
     
     return {
       allFiles: all_files_with_untracked,
-      addedFiles: added_files,
+      addedFiles: chatFiles.files,
+      chatFilesVersion: chatFiles.version,
       treeData: TreeBuilder.buildTreeFromPaths(all_files_with_untracked)
     };
   }
 
+  async loadChatFiles() {
+    const response = await this.jrpcClient.call['CoderWrapper.get_chat_files']();
+    const chatFiles = extractResponseData(response, {});
+    return {
+      files: Array.isArray(chatFiles.files) ? chatFiles.files : [],
+      version: typeof chatFiles.version === 'number' ? chatFiles.version : null
+    };
+  }
+
   extractStatusFromResponse(statusResponse) {
     let status = {};
     
@@ -67,15 +76,18 @@ export class FileTreeManager {
     await this.jrpcClient.call['EditBlockCoder.drop_rel_fname'](filePath);
   }
 
+  // Batch changes reach the coder in one call and come back as one delta
+  async addFiles(filePaths) {
+    if (filePaths.length === 0) return;
+    await this.jrpcClient.call['CoderWrapper.add_files'](filePaths);
+  }
+
+  async removeFiles(filePaths) {
+    if (filePaths.length === 0) return;
+    await this.jrpcClient.call['CoderWrapper.drop_files'](filePaths);
+  }
+
   async removeAllFiles(addedFiles) {
-    const filesToRemove = [...addedFiles];
-    
-    for (const filePath of filesToRemove) {
-      try {
-        await this.removeFile(filePath);
-      } catch (error) {
-        console.error(`Error removing file ${filePath}:`, error);
-      }
-    }
+    await this.removeFiles([...addedFiles]);
   }
 }